@@ -23,8 +23,10 @@ from ex2_iceberg_lattice import exec_ex2
 from ex3_ps_intervals import exec_ex3
 from ex4_ps_custom_pattern import exec_ex4
 from ex7_ps_partitions import exec_ex7
+from ex24_incremental import exec_ex24
 
 __fctx_path__ = 'data/example.txt'
+__new_fctx_path__ = 'data/example_new.txt'
 __ps_path__ = 'data/numerical_data.txt'
 __part_ps_path__ = 'data/xyzw.csv'
 __a_min_sup__ = 2
@@ -64,3 +66,10 @@ if __name__ == "__main__":
     print("Input File: {}".format(__ps_path__))
     print("*"*__nasterisks__)
     exec_ex7(__ps_path__)
+
+    print("*"*__nasterisks__)
+    print("Example 24: Incremental lattice updates with AddIntent")
+    print("Input File: {}".format(__fctx_path__))
+    print("New Objects: {}".format(__new_fctx_path__))
+    print("*"*__nasterisks__)
+    exec_ex24(__fctx_path__, __new_fctx_path__)
@@ -0,0 +1,61 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+import os
+import tempfile
+from fca.algorithms import dict_printer
+from fca.algorithms.addIntent import AddIntent
+from fca.defs import SetPattern
+from fca.io import read_representations
+
+
+def exec_ex24(filepath, new_filepath):
+    """
+    Example 24: Incremental lattice updates with AddIntent
+    The lattice of filepath is saved to disk. Later on, it is loaded
+    and only the objects in new_filepath are added to it.
+    Finally, the new objects are removed from the lattice
+    """
+    fd, lattice_path = tempfile.mkstemp(suffix='.lat')
+    os.close(fd)
+    SetPattern.reset()
+    AddIntent(read_representations(filepath), lazy=False).save(lattice_path)
+
+    # A NEW PROCESS ONLY READS THE NEW OBJECTS
+    SetPattern.reset()
+    algorithm = AddIntent(read_representations(new_filepath), lattice_path=lattice_path, lazy=True)
+    first_object = algorithm.n_objects
+    algorithm.run()
+    dict_printer(algorithm.lat)
+
+    print('Removing objects {} to {}'.format(first_object, algorithm.n_objects - 1))
+    for obj in range(first_object, algorithm.n_objects):
+        algorithm.remove_object(obj)
+    algorithm.save(lattice_path)
+    dict_printer(algorithm.lat)
+    os.remove(lattice_path)
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 24 - Incremental lattice updates with AddIntent')
+    __parser__.add_argument('context_path', metavar='context_path', type=str, help='path to the formal context')
+    __parser__.add_argument('new_context_path', metavar='new_context_path', type=str, help='path to the new objects')
+    __args__ = __parser__.parse_args()
+    exec_ex24(__args__.context_path, __args__.new_context_path)
@@ -22,6 +22,8 @@ from ex5_fca import exec_ex5
 from ex6_ps_intervals import exec_ex6
 from ex8_ps_partitions import exec_ex8
 from ex16_ondisk import exec_ex16
+from ex22_bitsets import exec_ex22
+from ex23_ps_columnar_intervals import exec_ex23
 
 __fctx_path__ = 'data/example.txt'
 __ps_path__ = 'data/numerical_data.txt'
@@ -62,3 +64,16 @@ if __name__ == "__main__":
     print("*"*__nasterisks__)
     print (__ps_path__)
     exec_ex16(__ps_path__, __r_min_sup__, None)
+
+    print("*"*__nasterisks__)
+    print("Example 22: FCA with Close-by-One (CbO) over bitsets")
+    print("Input File: {}".format(__fctx_path__))
+    print("Min. Sup.: {}".format(__r_min_sup__))
+    print("*"*__nasterisks__)
+    exec_ex22(__fctx_path__, __r_min_sup__)
+
+    print("*"*__nasterisks__)
+    print("Example 23: Columnar Interval Pattern Structures with CbO")
+    print("Input File: {}".format(__ps_path__))
+    print("*"*__nasterisks__)
+    exec_ex23(__ps_path__)
@@ -0,0 +1,50 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+from fca.algorithms import dict_printer
+from fca.algorithms.cbo import CbO
+from fca.defs.patterns.bitsets import BitSetPattern
+from fca.io.input_models import BitSetFormalContextModel
+
+
+def exec_ex22(filepath, min_sup=0):
+    """
+    Example 22: CbO over a bitset formal context
+    Object rows and attribute columns are integer bitmasks
+    """
+    BitSetPattern.reset()
+    dict_printer(
+        CbO(
+            BitSetFormalContextModel(
+                filepath=filepath
+            ),
+            pattern=BitSetPattern,
+            min_sup=min_sup,
+            lazy=False
+        ).poset
+    )
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 22 - FCA with Close-by-One (CbO) over bitsets')
+    __parser__.add_argument('context_path', metavar='context_path', type=str, help='path to the formal context')
+    __parser__.add_argument('-m', '--min_sup', metavar='min_sup', type=float, help='Relative minimum support [0,1]', default=0.0)
+    __args__ = __parser__.parse_args()
+    exec_ex22(__args__.context_path, __args__.min_sup)
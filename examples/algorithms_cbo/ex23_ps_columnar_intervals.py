@@ -0,0 +1,53 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+from fca.algorithms import dict_printer
+from fca.algorithms.cbo import PSCbO
+from fca.defs.patterns.columnar import ColumnarIntervalPattern
+from fca.io.transformers import List2ColumnarIntervalsTransformer
+from fca.io.input_models import PatternStructureModel
+
+
+def exec_ex23(filepath):
+    """
+    Example 23: Interval pattern structures with CbO over NumPy columns
+    Each description is a pair of arrays (lows, highs), object descriptions
+    are stacked so that subsumption is tested for all of them at once
+    Requires numpy
+    """
+    ColumnarIntervalPattern.reset()
+    dict_printer(
+        PSCbO(
+            PatternStructureModel(
+                filepath=filepath,
+                transformer=List2ColumnarIntervalsTransformer(int)
+            ),
+            pattern=ColumnarIntervalPattern,
+            lazy=False
+        ).poset,
+        transposed=True
+    )
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 23 - Columnar interval pattern structures with CbO')
+    __parser__.add_argument('context_path', metavar='context_path', type=str, help='path to the numerical context')
+    __args__ = __parser__.parse_args()
+    exec_ex23(__args__.context_path)
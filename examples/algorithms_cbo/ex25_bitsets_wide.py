@@ -0,0 +1,50 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+from fca.algorithms.cbo import CbO
+from fca.defs import SetPattern
+from fca.defs.patterns.bitsets import BitSetPattern
+from fca.io.input_models import FormalContextModel, BitSetFormalContextModel
+
+
+def exec_ex25(filepath):
+    """
+    Example 25: CbO over a bitset formal context with more than 64 attributes
+    Intents span several 64-bit words, the number of concepts should be
+    the same as with set intents
+    """
+    SetPattern.reset()
+    with_sets = len(CbO(FormalContextModel(filepath=filepath), lazy=False).poset.nodes())
+    BitSetPattern.reset()
+    with_bitsets = len(CbO(
+        BitSetFormalContextModel(filepath=filepath),
+        pattern=BitSetPattern,
+        lazy=False
+    ).poset.nodes())
+    print('{} concepts with sets, {} concepts with bitsets'.format(with_sets, with_bitsets))
+    if with_sets != with_bitsets:
+        raise AssertionError('Bitset intents lost concepts')
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 25 - CbO over bitsets with more than 64 attributes')
+    __parser__.add_argument('context_path', metavar='context_path', type=str, help='path to the formal context')
+    __args__ = __parser__.parse_args()
+    exec_ex25(__args__.context_path)
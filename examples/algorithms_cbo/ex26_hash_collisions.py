@@ -0,0 +1,104 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+from itertools import combinations
+from fca.algorithms.cbo import CbO
+from fca.algorithms.cbo.pattern_structures import CbOPS
+from fca.algorithms.lexenum_closures import LexEnumClosures
+from fca.defs import SetPattern
+from fca.defs.patterns import IntervalPattern
+from fca.defs.patterns.enumerators import IntervalObjectEnumerator
+from fca.io.input_models import FormalContextModel
+from fca.io.transformers import List2IntervalsTransformer
+
+
+def closed_extents(g_prime, derive_intent, leq):
+    """
+    Non-empty extents of a small context, closing every subset of objects
+    """
+    extents = set([])
+    for size in range(1, len(g_prime) + 1):
+        for objects in combinations(sorted(g_prime), size):
+            intent = derive_intent([g_prime[g] for g in objects])
+            extents.add(frozenset([g for g in g_prime if leq(intent, g_prime[g])]))
+    return len(extents)
+
+
+def found_extents(poset):
+    """
+    Non-empty extents found by an algorithm
+    """
+    return len([cid for cid, concept in poset.concepts() if bool(concept.extent)])
+
+
+def hull(descriptions):
+    """
+    Smallest vector of intervals containing the descriptions
+    """
+    return [
+        (min([desc[i][0] for desc in descriptions]), max([desc[i][1] for desc in descriptions]))
+        for i in range(len(descriptions[0]))
+    ]
+
+
+def exec_ex26(set_path, interval_path):
+    """
+    Example 26: Canonicity caches keep the hashes of the descriptions found,
+    the contexts have descriptions whose builtin hashes collide,
+    the sets of the first one and the intervals (-1 and -2) of the second one.
+    Every concept should be found nevertheless
+    """
+    ctx = FormalContextModel(filepath=set_path)
+    expected = closed_extents(
+        ctx.g_prime,
+        lambda descs: set.intersection(*descs),
+        lambda intent, desc: intent.issubset(desc)
+    )
+    for algorithm in [CbO, LexEnumClosures]:
+        SetPattern.reset()
+        found = found_extents(algorithm(FormalContextModel(filepath=set_path), lazy=False).poset)
+        print('{}: {} concepts, {} expected'.format(algorithm.__name__, found, expected))
+        if found != expected:
+            raise AssertionError('{} lost concepts'.format(algorithm.__name__))
+
+    ctx = FormalContextModel(filepath=interval_path, transformer=List2IntervalsTransformer(int))
+    expected = closed_extents(
+        ctx.g_prime,
+        hull,
+        lambda intent, desc: all([i[0] <= d[0] and d[1] <= i[1] for i, d in zip(intent, desc)])
+    )
+    IntervalPattern.reset()
+    found = found_extents(CbOPS(
+        FormalContextModel(filepath=interval_path, transformer=List2IntervalsTransformer(int)),
+        pattern=IntervalPattern,
+        enumerator=IntervalObjectEnumerator,
+        lazy=False
+    ).poset)
+    print('CbOPS: {} concepts, {} expected'.format(found, expected))
+    if found != expected:
+        raise AssertionError('CbOPS lost concepts')
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 26 - Concepts whose descriptions have colliding hashes')
+    __parser__.add_argument('set_path', metavar='set_path', type=str, help='path to the formal context')
+    __parser__.add_argument('interval_path', metavar='interval_path', type=str, help='path to the numerical context')
+    __args__ = __parser__.parse_args()
+    exec_ex26(__args__.set_path, __args__.interval_path)
@@ -0,0 +1,69 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import argparse
+from fca.algorithms.cbo import CbO
+from fca.algorithms.cbo.pattern_structures import CbOPS
+from fca.defs import SetPattern
+from fca.defs.patterns import IntervalPattern
+from fca.defs.patterns.enumerators import IntervalObjectEnumerator
+from fca.io.input_models import FormalContextModel
+from fca.io.transformers import List2IntervalsTransformer
+
+
+def stream(algorithm):
+    """
+    Prints the concepts of a lazy algorithm as they are enumerated,
+    they are not stored in its poset
+    returns the number of concepts
+    """
+    n_concepts = 0
+    for extent, intent in algorithm.iter_concepts():
+        print('{:30s}\t{}'.format(str(sorted(extent)), algorithm.pattern.to_string(intent)))
+        n_concepts += 1
+    return n_concepts
+
+
+def exec_ex27(fctx_path, ps_path):
+    """
+    Example 27: Streaming concepts with iter_concepts()
+    Algorithms are created with lazy=True and their concepts are consumed
+    while they are enumerated, in the same order run() adds them to the poset
+    """
+    SetPattern.reset()
+    print('{} concepts streamed by CbO'.format(
+        stream(CbO(FormalContextModel(filepath=fctx_path), lazy=True))
+    ))
+    IntervalPattern.reset()
+    print('{} concepts streamed by CbOPS'.format(
+        stream(CbOPS(
+            FormalContextModel(filepath=ps_path, transformer=List2IntervalsTransformer(int)),
+            pattern=IntervalPattern,
+            enumerator=IntervalObjectEnumerator,
+            lazy=True
+        ))
+    ))
+
+
+if __name__ == '__main__':
+    __parser__ = argparse.ArgumentParser(description='Example 27 - Streaming concepts with iter_concepts')
+    __parser__.add_argument('context_path', metavar='context_path', type=str, help='path to the formal context')
+    __parser__.add_argument('ps_path', metavar='ps_path', type=str, help='path to the numerical context')
+    __args__ = __parser__.parse_args()
+    exec_ex27(__args__.context_path, __args__.ps_path)
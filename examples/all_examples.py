@@ -30,7 +30,13 @@ from ex2_iceberg_lattice import exec_ex2
 from ex3_ps_intervals import exec_ex3
 from ex4_ps_custom_pattern import exec_ex4
 from ex7_ps_partitions import exec_ex7
+from ex24_incremental import exec_ex24
 from ex16_ondisk import exec_ex16
+from ex22_bitsets import exec_ex22
+from ex23_ps_columnar_intervals import exec_ex23
+from ex25_bitsets_wide import exec_ex25
+from ex26_hash_collisions import exec_ex26
+from ex27_iter_concepts import exec_ex27
 
 from ex5_fca import exec_ex5
 from ex6_ps_intervals import exec_ex6
@@ -53,6 +59,10 @@ from ex19_ps_ondisk import exec_ex19
 
 
 __fctx_path__ = '../data/example.txt'
+__new_fctx_path__ = '../data/example_new.txt'
+__wide_fctx_path__ = '../data/wide_example.txt'
+__collision_fctx_path__ = '../data/collision_example.txt'
+__collision_ps_path__ = '../data/collision_intervals.txt'
 __ps_path__ = '../data/numerical_data.txt'
 __part_ps_path__ = '../data/xyzw.csv'
 __output_path__ = '../data/results.csv'
@@ -205,3 +215,41 @@ if __name__ == "__main__":
     print("Input File: {}".format(__part_ps_path__))
     print("*"*__nasterisks__)
     exec_ex21(__part_ps_path__, None)
+
+    print("*"*__nasterisks__)
+    print("Example 22: FCA with Close-by-One (CbO) over bitsets")
+    print("Input File: {}".format(__fctx_path__))
+    print("Min. Sup.: {}".format(__r_min_sup__))
+    print("*"*__nasterisks__)
+    exec_ex22(__fctx_path__, __r_min_sup__)
+
+    print("*"*__nasterisks__)
+    print("Example 23: Columnar Interval Pattern Structures with CbO")
+    print("Input File: {}".format(__ps_path__))
+    print("*"*__nasterisks__)
+    exec_ex23(__ps_path__)
+
+    print("*"*__nasterisks__)
+    print("Example 24: Incremental lattice updates with AddIntent")
+    print("Input File: {}".format(__fctx_path__))
+    print("New Objects: {}".format(__new_fctx_path__))
+    print("*"*__nasterisks__)
+    exec_ex24(__fctx_path__, __new_fctx_path__)
+
+    print("*"*__nasterisks__)
+    print("Example 25: CbO over bitsets with more than 64 attributes")
+    print("Input File: {}".format(__wide_fctx_path__))
+    print("*"*__nasterisks__)
+    exec_ex25(__wide_fctx_path__)
+
+    print("*"*__nasterisks__)
+    print("Example 26: Concepts whose descriptions have colliding hashes")
+    print("Input Files: {} {}".format(__collision_fctx_path__, __collision_ps_path__))
+    print("*"*__nasterisks__)
+    exec_ex26(__collision_fctx_path__, __collision_ps_path__)
+
+    print("*"*__nasterisks__)
+    print("Example 27: Streaming concepts with iter_concepts")
+    print("Input Files: {} {}".format(__fctx_path__, __ps_path__))
+    print("*"*__nasterisks__)
+    exec_ex27(__fctx_path__, __ps_path__)
@@ -14,4 +14,8 @@ GNU General Public License for more details.
 
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
-"""
\ No newline at end of file
+"""
+from fca.defs.backends import configure
+
+# BACKENDS FOR Intent CLASSMETHODS, SEE FCA_BACKEND
+configure()
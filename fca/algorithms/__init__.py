@@ -17,6 +17,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 import sys
 import os
+from fca.algorithms.metrics import Metrics
 
 lst2str = lambda lst: reduce(lambda x, y: str(x)+', '+str(y), lst+['']).strip()[:-1] if len(lst) > 0 else "[]"
 
@@ -60,19 +61,57 @@ class Algorithm(object):
     """
     Abstract class for algorithm.
     Implemented by AddIntent and PSCbO
+
+    TIMED: methods timed when the algorithm is executed with metrics
+    REJECTIONS: timed method -> (counter, test), counts results for which test holds
+    COUNTERS: attribute -> counter, read at the end of the execution
     """
+    TIMED = ('derive_extent', 'derive_intent', 'canonical_test', 'evaluate_conditions')
+    REJECTIONS = {
+        'canonical_test': ('canonical_test_failures', lambda result: not result),
+        'evaluate_conditions': ('condition_rejections', lambda result: not result)
+    }
+    COUNTERS = {'calls': 'closures'}
+
     def __init__(self, **params):
         """
         if not lazy it should run the algorithm as soon as this class
         is instantiated
+        metrics: Metrics instance (or True for a new one) collecting
+        counters, timers and traces of the execution, see fca.algorithms.metrics
         """
         self.stdout = sys.stdout
+        self.devnull = None
         self.lazy = params.get('lazy', False)
         self.silent = params.get('silent', True)
+        self.metrics = params.get('metrics', None)
+        if self.metrics is True:
+            self.metrics = Metrics()
         if not self.lazy:
-            if self.silent:
-                self.silence()
-            self.run()
+            self.execute()
+
+    def instrument(self):
+        """
+        Wraps the timed methods and the cache in the metrics, if any
+        Called by execute(), should be called before iter_concepts() on lazy instances
+        """
+        if self.metrics is not None:
+            self.metrics.instrument(self)
+
+    def execute(self):
+        """
+        Runs the algorithm, silenced and measured if required
+        """
+        if self.silent:
+            self.silence()
+        try:
+            if self.metrics is None:
+                self.run()
+            else:
+                self.instrument()
+                with self.metrics.measure(self):
+                    self.run()
+        finally:
             if self.silent:
                 self.talk()
 
@@ -88,14 +127,25 @@ class Algorithm(object):
         """
         raise NotImplementedError
 
+    def iter_concepts(self):
+        """
+        Generator of the concepts found by the algorithm as (extent, intent) pairs
+        Should be used on an instance created with lazy=True
+        """
+        raise NotImplementedError
+
     def silence(self):
         """
         Makes printing unavailable
         """
-        sys.stdout = open(os.devnull, "w")
+        self.devnull = open(os.devnull, "w")
+        sys.stdout = self.devnull
 
     def talk(self):
         """
         Makes printing available
         """
         sys.stdout = self.stdout
+        if self.devnull is not None:
+            self.devnull.close()
+            self.devnull = None
@@ -20,17 +20,28 @@ import copy
 import sys
 import os
 from fca.defs import ConceptLattice, SetPattern
+from fca.defs.patterns.bitsets import BitSetPattern
 from fca.algorithms import Algorithm
 
 class AddIntent(Algorithm):
     """
     AddIntent algorithm executer
     """
+    TIMED = ('get_maximal_concept', 'add_intent_iteration', 'add_parent', 'add_object')
+    COUNTERS = {'n_objects': 'objects'}
+
     def __init__(self, input_manager, pattern=SetPattern, **params):
         self.ctx = input_manager
         self.lat = ConceptLattice(transformer=self.ctx.transformer)
         self.pattern = pattern
         self.silent = params.get('silent', True)
+        # LATTICE PREVIOUSLY SAVED WITH AddIntent.save, ONLY NEW OBJECTS ARE ADDED
+        self.lattice_path = params.get('lattice_path', None)
+        self.n_objects = 0
+        # THE REPRESENTATIONS OF THE CONTEXT HAVE BEEN INSERTED BY run()
+        self.built = False
+        # INTENTS ARE INDEXED BY ATTRIBUTE AND SIZE, ONLY FOR SET-LIKE PATTERNS
+        self.indexed = params.get('indexed', issubclass(pattern, (SetPattern, BitSetPattern)))
 
         self.config()
 
@@ -47,14 +58,18 @@ class AddIntent(Algorithm):
         """
         Configure the algorithm parameters
         """
-        # Infimum
-        self.lat.supremum = self.lat.infimum
+        if self.lattice_path is not None:
+            self.load(self.lattice_path)
+        else:
+            # Infimum
+            self.lat.supremum = self.lat.infimum
 
-        self.lat.new_concept(
-            self.lat.infimum,
-            {self.lat.INTENT_MARK:self.pattern.top(), self.lat.EXTENT_MARK:[]}
-            )
-        
+            self.lat.new_concept(
+                self.lat.infimum,
+                {self.lat.INTENT_MARK:self.pattern.top(), self.lat.EXTENT_MARK:[]}
+                )
+        if self.indexed:
+            self.lat.index_intents(self.pattern)
 
     def run(self, *args, **kwargs):
         """
@@ -64,40 +79,154 @@ class AddIntent(Algorithm):
         representations: iterable of representations
         Pattern: type of pattern to use (SetIntent, IntervalPattern, etc.)
         """
-        for obj, intent in enumerate(self.ctx.representations):
-            print('\r -> EXECUTING OBJECT:{}'.format(obj), end='')
+        for intent in self.ctx.representations:
+            print('\r -> EXECUTING OBJECT:{}'.format(self.n_objects), end='')
             sys.stdout.flush()
-            
-            intent = self.pattern.fix_desc(intent)
-            # self.pattern.join(self.lat[self.lat.infimum].intent, intent)
-            self.pattern.top(intent)
-
-            aid = self.add_intent_iteration(intent, self.lat.infimum)
-            self.add_object(aid, obj)
-            self.lat.reset_parcour()
+            self.insert_object(intent)
+        self.built = True
 
         print ('')
         print('{} concepts found'.format(len(self.lat.nodes())))
 
-    def add_object(self, concept, obj, depth=1):
+    def iter_concepts(self):
         """
-        Adds an object to the extent of a formal concept in the lattice and to
-        the concepts of its entire super-lattice.
-        lattice: ConceptLattice(DiGraph)
-        concept: concept to add the object to
-        object: object to add - integer
-        depth: internal
+        Generator of the concepts (extent, intent) of the lattice, by concept id
+        AddIntent only knows the final concepts once every object is inserted,
+        thus the lattice is built first unless run() was already called
+        """
+        if not self.built:
+            self.execute()
+        for cid in sorted(self.lat.nodes()):
+            concept = self.lat[cid]
+            yield concept.extent, concept.intent
+
+    def insert_object(self, intent):
+        """
+        Adds a new object to the lattice given its representation,
+        objects are numbered after the ones already in the lattice
+        returns the index of the object
+        """
+        obj = self.n_objects
+        self.n_objects += 1
+
+        intent = self.pattern.fix_desc(intent)
+        # self.pattern.join(self.lat[self.lat.infimum].intent, intent)
+        # BITSET INTENTS ARE IMMUTABLE, top() REBINDS A NEW ONE
+        self.lat[self.lat.infimum][self.lat.INTENT_MARK] = self.pattern.top(intent)
+
+        aid = self.add_intent_iteration(intent, self.lat.infimum)
+        self.add_object(aid, obj)
+        self.lat.reset_parcour()
+        return obj
+
+    def remove_object(self, obj):
         """
-        if self.lat.is_visited(concept):
-            return 0
+        Removes an object from the lattice.
+        A concept (A, B) with obj in A remains a concept (A - {obj}, B)
+        unless A - {obj} is already an extent, this is, a lower neighbor (C, D)
+        has C = A - {obj}. In such a case, (A, B) is merged into (C, D).
+        The new upper neighbors of a concept are the minimal ones
+        among its old upper neighbors, once merged concepts are replaced.
+        obj: index of the object, labels are mapped by ctx.transformer.objects
+        """
+        ema = self.lat.EXTENT_MARK
+        holders = [cid for cid, concept in self.lat.concepts() if obj in concept[ema]]
+        merged = {}
+        for cid in holders:
+            size = len(self.lat[cid].extent) - 1
+            for lower in self.lat.lower_neighbors(cid):
+                extent = self.lat[lower].extent
+                if len(extent) == size and obj not in extent:
+                    merged[cid] = lower
+                    break
 
-        self.lat.visit(concept)
-        self.lat[concept].extent.append(obj)
+        # CONCEPTS WHOSE UPPER NEIGHBORS CHANGE
+        affected = set([])
+        for cid in merged:
+            affected.update(self.lat.lower_neighbors(cid))
+        affected.difference_update(merged)
 
-        for j in self.lat.upper_neighbors(concept):
-            self.add_object(j, obj, depth+1)
+        new_uppers = {}
+        for cid in affected:
+            candidates = set([])
+            for upper in self.lat.upper_neighbors(cid):
+                # A CONCEPT MERGED INTO cid IS REPLACED BY ITS OWN UPPER NEIGHBORS
+                if merged.get(upper, None) == cid:
+                    candidates.update([merged.get(i, i) for i in self.lat.upper_neighbors(upper)])
+                else:
+                    candidates.add(merged.get(upper, upper))
+            new_uppers[cid] = [
+                upper for upper in candidates
+                if not any(
+                    other != upper and self.pattern.leq(self.lat[upper].intent, self.lat[other].intent)
+                    for other in candidates
+                )
+            ]
 
+        for cid in merged:
+            self.lat.remove_concept(cid)
+        for cid, uppers in new_uppers.items():
+            for upper in list(self.lat.upper_neighbors(cid)):
+                self.lat.remove_edge(cid, upper)
+            for upper in uppers:
+                self.lat.add_edge(cid, upper)
+        for cid in holders:
+            if cid not in merged:
+                self.lat[cid].extent.remove(obj)
 
+        if self.lat.supremum in merged:
+            self.lat.supremum = merged[self.lat.supremum]
+
+    def save(self, path):
+        """
+        Saves the lattice together with the object counter
+        and the objects and attributes registered by the transformer,
+        so that new objects can be added later on
+        """
+        transformer = self.ctx.transformer
+        self.lat.save(
+            path,
+            n_objects=self.n_objects,
+            objects=dict(transformer.objects),
+            attributes=dict(transformer.attributes)
+        )
+
+    def load(self, path):
+        """
+        Loads a lattice saved with AddIntent.save.
+        Objects and attributes are registered in the transformer
+        before any new representation is read
+        """
+        self.lat, state = ConceptLattice.load(path, transformer=self.ctx.transformer)
+        self.n_objects = state['n_objects']
+        transformer = self.ctx.transformer
+        for label, index in sorted(state['objects'].items(), key=lambda s: s[1]):
+            transformer.objects[label] = index
+            transformer.object_index[index] = label
+        for label, index in sorted(state['attributes'].items(), key=lambda s: s[1]):
+            transformer.attributes[label] = index
+            transformer.attribute_index[index] = label
+
+        # THE INTENT OF THE INFIMUM IS THE TOP OF THE PATTERN, UPDATED WITH EACH NEW OBJECT
+        infimum = self.lat[self.lat.infimum]
+        infimum[self.lat.INTENT_MARK] = self.pattern.top(infimum.intent)
+
+    def add_object(self, concept, obj):
+        """
+        Adds an object to the extent of a formal concept in the lattice and to
+        the concepts of its entire super-lattice.
+        The super-lattice is traversed with an explicit stack
+        concept: concept to add the object to
+        object: object to add - integer
+        """
+        stack = [concept]
+        while bool(stack):
+            concept = stack.pop()
+            if self.lat.is_visited(concept):
+                continue
+            self.lat.visit(concept)
+            self.lat[concept].extent.append(obj)
+            stack.extend(self.lat.upper_neighbors(concept))
 
     def get_maximal_concept(self, intent, current_concept):
         """
@@ -108,49 +237,68 @@ class AddIntent(Algorithm):
         # the maximal concept in the lattice is the supremum
         if self.pattern.is_empty(intent):
             return self.lat.supremum
-        for super_concept in self.lat.upper_neighbors(current_concept):
-            # THE CONCEPT ALREADY EXISTS. RETURN THE NODE ID OF THAT CONCEPT
-            if self.pattern.is_equal(self.lat[super_concept].intent, intent):
-                return super_concept
-            # THE MOST COMMON CASE
-            elif self.pattern.leq(intent, self.lat[super_concept].intent):
-                return self.get_maximal_concept(intent, super_concept)
-        return current_concept
+        # THE INDEX GIVES THE CLOSURE OF THE INTENT WITHOUT WALKING THE LATTICE
+        if self.indexed:
+            return self.lat.maximal_concept(intent)
+        while True:
+            for super_concept in self.lat.upper_neighbors(current_concept):
+                # THE CONCEPT ALREADY EXISTS. RETURN THE NODE ID OF THAT CONCEPT
+                if self.pattern.is_equal(self.lat[super_concept].intent, intent):
+                    return super_concept
+                # THE MOST COMMON CASE
+                elif self.pattern.leq(intent, self.lat[super_concept].intent):
+                    current_concept = super_concept
+                    break
+            else:
+                return current_concept
 
-    def add_intent_iteration(self, intent, generator, depth=1):
+    def add_parent(self, new_parents, candidate):
         """
-        A single add_intent iteration
-        lat: ConceptLattice(DiGraph)
-        intent: intent to add
-        generator: current concept
-        depth: internal
+        Adds candidate to new_parents unless a parent has a larger intent,
+        parents whose intent is contained in the one of candidate are removed
+        When intents are indexed, a parent is compared to the candidate
+        only if the size of their intents allows it
         """
-        generator = self.get_maximal_concept(intent, self.lat.infimum)
+        candidate_intent = self.lat[candidate].intent
+        if self.indexed:
+            size = self.lat.intent_size
+            candidate_size = size[candidate]
+        for parent in list(new_parents):
+            if self.indexed:
+                parent_size = size[parent]
+                if parent_size >= candidate_size and self.pattern.leq(candidate_intent, self.lat[parent].intent):
+                    return
+                elif parent_size < candidate_size and self.pattern.leq(self.lat[parent].intent, candidate_intent):
+                    new_parents.remove(parent)
+            elif self.pattern.leq(candidate_intent, self.lat[parent].intent):
+                return
+            elif self.pattern.leq(self.lat[parent].intent, candidate_intent):
+                new_parents.remove(parent)
+        new_parents.append(candidate)
 
+    def open_iteration(self, intent):
+        """
+        Looks for the generator of intent
+        returns (concept, None) if the intent is already in the lattice
+        or (None, frame) where frame is [intent, generator, pending candidates, new parents]
+        """
+        generator = self.get_maximal_concept(intent, self.lat.infimum)
         if generator != self.lat.infimum and self.pattern.is_equal(self.lat[generator].intent, intent):
-            return generator
-        # print ('FOUND GEN',generator)
-        new_parents = []
-        for candidate in self.lat.upper_neighbors(generator):
-            if not self.pattern.leq(self.lat[candidate].intent, intent):
-                cand_inter = self.pattern.intersection(self.lat[candidate].intent, intent)
-                candidate = self.add_intent_iteration(cand_inter, candidate, depth+1)
-
-            add_parent = True
-            for parent in new_parents:
-                if self.pattern.leq(self.lat[candidate].intent, self.lat[parent].intent):
-                    add_parent = False
-                    break
-                elif self.pattern.leq(self.lat[parent].intent, self.lat[candidate].intent):
-                    del new_parents[new_parents.index(parent)]
-            if add_parent:
-                new_parents.append(candidate)
-
+            return generator, None
+        # CANDIDATES ARE POPPED FROM THE END
+        candidates = list(self.lat.upper_neighbors(generator))
+        candidates.reverse()
+        return None, [intent, generator, candidates, []]
 
+    def close_iteration(self, intent, generator, new_parents):
+        """
+        Adds the new concept between the generator and its new parents
+        returns the id of the new concept
+        """
         new_id = self.lat.new_formal_concept(copy.copy(self.lat[generator].extent), intent)
 
         for parent in new_parents:
-            if parent in self.lat[generator]:
+            if parent in self.lat.upper_neighbors(generator):
                 self.lat.remove_edge(generator, parent)
 
             self.lat.add_edge(new_id, parent)
@@ -159,3 +307,35 @@ class AddIntent(Algorithm):
         if self.lat.supremum == generator:
             self.lat.supremum = new_id
         return new_id
+
+    def add_intent_iteration(self, intent, generator=None):
+        """
+        A single add_intent iteration
+        Recursive calls of AddIntent are replaced by frames in an explicit stack,
+        so that the depth of the lattice is not bound by the recursion limit
+        intent: intent to add
+        generator: not used, the generator is always searched from the infimum
+        returns the id of the concept with the intent
+        """
+        concept, frame = self.open_iteration(intent)
+        if frame is None:
+            return concept
+        stack = [frame]
+        while bool(stack):
+            intent, generator, candidates, new_parents = stack[-1]
+            if not bool(candidates):
+                stack.pop()
+                concept = self.close_iteration(intent, generator, new_parents)
+                if bool(stack):
+                    self.add_parent(stack[-1][3], concept)
+                continue
+
+            candidate = candidates.pop()
+            if not self.pattern.leq(self.lat[candidate].intent, intent):
+                cand_inter = self.pattern.intersection(self.lat[candidate].intent, intent)
+                candidate, frame = self.open_iteration(cand_inter)
+                if frame is not None:
+                    stack.append(frame)
+                    continue
+            self.add_parent(new_parents, candidate)
+        return concept
@@ -49,6 +49,23 @@ class CanonicalBase(LecEnumClosures):
         return None, self.pattern.bottom()
 
 
+    def checkpoint_state(self):
+        """
+        The implications found so far are saved as well
+        """
+        state = super(CanonicalBase, self).checkpoint_state()
+        state['imp_base'] = self.preclos.imp_base
+        state['supports'] = self.preclos.supports
+        return state
+
+    def restore_state(self, state):
+        state = dict(state)
+        # IMPLICATIONS ARE REGISTERED AGAIN TO REBUILD THEIR INDEX
+        self.preclos = PreClosure()
+        for (ant, con), support in zip(state.pop('imp_base'), state.pop('supports')):
+            self.preclos.register_implication(ant, con, support)
+        super(CanonicalBase, self).restore_state(state)
+
     def run(self, *args, **kwargs):
         """
         LecEnumClosures takes a pre_closure, adds an attribute to it and then calculate this
@@ -60,6 +77,9 @@ class CanonicalBase(LecEnumClosures):
         When A'' != L(A), then L(A) is a pre_closure and also a pseudo-closure.
         """
         pattern = self.pattern.bottom()
+        # THE LAST PATTERN IN THE CHECKPOINT HAS ALREADY BEEN PROCESSED
+        if self.resume():
+            pattern = self.next_closure()
         while pattern is not None:
             extent = self.stack_extents[-1]
             c_pattern = self.derive_intent(extent, pattern)
@@ -81,7 +101,7 @@ class CanonicalBase(LecEnumClosures):
                 i = self.stack_enum[-2] + 1
                 j = min(c_pattern - pattern)
 
-                self.preclos.register_implication(pattern, c_pattern, len(extent))
+                self.preclos.register_implication(pattern, c_pattern, self.e_pattern.length(extent))
                 # ENHANCEMENT: Applying proposition 22 in Conceptual Exploration Chapter 3
                 try:
                     if self.pattern.is_empty(pattern) or i < j:
@@ -102,7 +122,10 @@ class CanonicalBase(LecEnumClosures):
                     print "DIFFERENCE:", c_pattern - pattern
                     print err
                     exit()
+            self.checkpoint()
             pattern = self.next_closure()
+        if self.checkpoint_path is not None:
+            self.save_checkpoint()
         print ''
 
     def get_implications(self):
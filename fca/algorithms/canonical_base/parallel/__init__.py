@@ -0,0 +1,184 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import sys
+import multiprocessing
+from fca.algorithms.canonical_base import CanonicalBase
+
+# Algorithm instance inherited by the workers of the pool
+_ALGORITHM = None
+# Managed list of the implications found after the pool was forked
+_FOUND = None
+# Number of implications of _FOUND registered by the worker
+_SYNCED = 0
+
+
+def _init_worker(algorithm, found):
+    """
+    Pool initializer, workers are forked and receive the algorithm
+    together with the implications found before the pool was created
+    """
+    global _ALGORITHM, _FOUND, _SYNCED
+    _ALGORITHM = algorithm
+    _FOUND = found
+    _SYNCED = 0
+
+
+def _explore(task):
+    """
+    Pool task, explores a chunk of candidates
+    task: (number of implications found after the pool was forked, candidates)
+    the implications the worker has not registered yet are fetched first
+    """
+    global _SYNCED
+    found, candidates = task
+    if _SYNCED < found:
+        for ant, con, support in _FOUND[_SYNCED:found]:
+            _ALGORITHM.preclos.register_implication(ant, con, support)
+        _SYNCED = found
+    return [_ALGORITHM.explore(candidate) for candidate in candidates]
+
+
+class ParallelCanonicalBase(CanonicalBase):
+    """
+    Calculates the Canonical Base by cardinality levels (NextClosures)
+    as described by Kriegel and Borchmann in
+    "NextClosures: Parallel Computation of the Canonical Base"
+
+    Candidates are processed in order of size. A candidate C of size k
+    is a pseudo-intent or an intent if it is closed under the implications
+    found so far, which all have an antecedent smaller than k. Then, C -> C''
+    is an implication if C != C'' and C'' + {m} is a new candidate for each
+    attribute m not in C''. Otherwise, its pre-closure is a new, larger candidate.
+
+    Candidates of the same level do not depend on each other,
+    so they are explored by a pool of processes. Workers are forked once,
+    at the first level with at least parallel_threshold candidates, and
+    fetch the implications found afterwards from a managed list.
+    Smaller levels are explored sequentially.
+
+    Intents and pseudo-intents are added to the poset, without edges
+    """
+    def __init__(self, ctx, **kwargs):
+        self.processes = kwargs.get('processes', multiprocessing.cpu_count())
+        self.parallel_threshold = kwargs.get('parallel_threshold', 64)
+        self.pool = None
+        self.manager = None
+        # implications found since the pool was forked, shared with the workers
+        self.found = None
+        super(ParallelCanonicalBase, self).__init__(ctx, **kwargs)
+
+    def explore(self, candidate):
+        """
+        Explores a candidate, executed by the workers
+        returns None if the extent of the candidate does not hold the conditions,
+        (pre-closure, None, None) if the candidate is not closed under the implications
+        or (candidate, extent, closure) otherwise
+        """
+        self.calls += 1
+        pattern = set(candidate)
+        self.preclos.preclose_pattern(pattern)
+        if len(pattern) != len(candidate):
+            return pattern, None, None
+        extent = self.derive_extent([self.all_objects] + [self.ctx.m_prime[m] for m in candidate])
+        if not self.evaluate_conditions(extent):
+            return None
+        return pattern, extent, self.derive_intent(extent, pattern)
+
+    def explore_level(self, level):
+        """
+        Explores the candidates of a level, in parallel if there are enough of them
+        returns the list of results of explore
+        """
+        if self.processes < 2 or len(level) < self.parallel_threshold:
+            return [self.explore(candidate) for candidate in level]
+        if self.pool is None:
+            # Forked workers should not flush buffers inherited from this process
+            sys.stdout.flush()
+            manager = multiprocessing.Manager()
+            found = manager.list()
+            self.pool = multiprocessing.Pool(self.processes, _init_worker, (self, found))
+            self.manager, self.found = manager, found
+        chunksize = max(1, len(level) // (4 * self.processes))
+        found = len(self.found)
+        tasks = [(found, level[i:i + chunksize]) for i in range(0, len(level), chunksize)]
+        return [result for chunk in self.pool.map(_explore, tasks, 1) for result in chunk]
+
+    def register_level(self, implications):
+        """
+        Registers the implications found in a level,
+        they are shared with the workers for the next levels
+        """
+        for ant, con, support in implications:
+            self.preclos.register_implication(ant, con, support)
+        if self.pool is not None:
+            self.found.extend(implications)
+
+    def close_pool(self):
+        """
+        Terminates the workers of the pool and the manager of the shared implications
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.manager.shutdown()
+            self.pool, self.manager, self.found = None, None, None
+
+    def run(self, *args, **kwargs):
+        """
+        Size-levelled sweep over the candidates
+        Implications found in a level are registered once the whole level is explored
+        """
+        try:
+            self.sweep()
+        finally:
+            self.close_pool()
+        print('')
+
+    def sweep(self):
+        """
+        Explores the levels of candidates in order of size
+        """
+        candidates = {0: set([frozenset([])])}
+        for size in range(self.ctx.n_attributes + 1):
+            level = sorted([tuple(sorted(c)) for c in candidates.pop(size, [])])
+            if not bool(level):
+                continue
+            print('\r -> EXPLORING LEVEL:{} CANDIDATES:{}'.format(size, len(level)), end='')
+            sys.stdout.flush()
+
+            implications = []
+            for result in self.explore_level(level):
+                if result is None:
+                    continue
+                pattern, extent, c_pattern = result
+                if extent is None:
+                    candidates.setdefault(len(pattern), set([])).add(frozenset(pattern))
+                    continue
+                # THE EMPTY PATTERN IS THE SUPREMUM
+                if bool(pattern):
+                    self.poset.new_formal_concept(extent, pattern)
+                if len(pattern) != len(c_pattern):
+                    implications.append((pattern, c_pattern, self.e_pattern.length(extent)))
+                for m in range(self.ctx.n_attributes):
+                    if m not in c_pattern:
+                        candidate = frozenset(c_pattern).union([m])
+                        candidates.setdefault(len(candidate), set([])).add(candidate)
+
+            self.register_level(implications)
@@ -18,7 +18,9 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # Kyori code.
 from __future__ import print_function
 from functools import reduce
-from fca.defs import OnDiskPOSET, POSET, SetPattern
+from fca.defs import OnDiskPOSET, ShardedOnDiskPOSET, POSET, ConceptLattice, SetPattern
+from fca.defs.caches import SetCache
+from fca.defs.compact import CompactPOSET
 from fca.io.input_models import FormalContextModel
 from fca.algorithms import Algorithm, lexo
 
@@ -31,31 +33,69 @@ class CbO(Algorithm):
     def __init__(self, ctx, **kwargs):
         self.ctx = ctx
         self.poset = None
-        # self.e_pattern = SetPattern
+        # Extents are handled as the context represents them, sets by default
+        self.e_pattern = getattr(ctx, 'extent_pattern', SetPattern)
         self.pattern = kwargs.get('pattern', SetPattern)
-        self.cache = kwargs.get('cache', [])
+        self.cache = kwargs.get('cache', SetCache())
         self.min_sup = kwargs.get('min_sup', 0)
         self.printer = kwargs.get('printer', lambda a, b, c: None)
         self.conditions = kwargs.get('conditions', [])
         self.ondisk = kwargs.get('ondisk', False)
         self.ondisk_kwargs = kwargs.get('ondisk_kwargs', {})
-        
+        # ON DISK, CONCEPTS ARE WRITTEN IN SHARDS (A DIRECTORY WITH A MANIFEST)
+        self.sharded = kwargs.get('sharded', False)
+        self.ondisk_class = ShardedOnDiskPOSET if self.sharded else OnDiskPOSET
+        self.compact = kwargs.get('compact', False)
+        # ATTRIBUTES WHOSE EXTENT IS BELOW THE MINIMUM SUPPORT
+        self.infrequent = set([])
+
         self.calls = 0
 
         self.config()
 
         super(CbO, self).__init__(**kwargs)
 
+    @property
+    def lattice(self):
+        """
+        Concept lattice of the concepts found, computed on each access.
+        The poset only keeps the edges of the enumeration tree,
+        the lattice has the covering relation instead
+        On disk, the covering relation is written with ondisk_kwargs covers=True
+        """
+        if self.ondisk:
+            raise ValueError('The lattice of concepts on disk is written with covers=True')
+        return ConceptLattice.from_poset(self.poset, self.lattice_context())
+
+    def lattice_context(self):
+        """
+        Formal context used to compute the covering relation of the concepts found
+        """
+        return self.ctx
+
+    def new_poset(self):
+        """
+        Creates the poset where concepts are stored
+        in memory, in memory with compact storage or on disk
+        """
+        if self.ondisk:
+            return self.ondisk_class(
+                transformer=self.ctx.transformer,
+                support=self.e_pattern.length,
+                context=self.ctx,
+                **self.ondisk_kwargs
+            )
+        if self.compact:
+            return CompactPOSET(transformer=self.ctx.transformer)
+        return POSET(transformer=self.ctx.transformer)
+
     def config(self):
         """
         Configure the internal parameters of the class
         """
-        if not self.ondisk:
-            self.poset = POSET(transformer=self.ctx.transformer)
-        else:
-            self.poset = OnDiskPOSET(transformer=self.ctx.transformer, **self.ondisk_kwargs)
+        self.poset = self.new_poset()
 
-        self.all_objects = set(self.ctx.g_prime.keys())
+        self.all_objects = self.e_pattern.fix_desc(set(self.ctx.g_prime.keys()))
 
         self.poset.new_formal_concept(
             self.all_objects,
@@ -63,10 +103,16 @@ class CbO(Algorithm):
             self.poset.supremum
         )
         self.pattern.top(set(self.ctx.m_prime.keys()))
+        threshold = self.min_sup * self.ctx.n_objects
         self.conditions.append(
-            lambda new_extent: len(
-                new_extent) >= self.min_sup * self.ctx.n_objects
+            lambda new_extent: self.e_pattern.length_at_least(new_extent, threshold)
         )
+        # THEIR INTERSECTIONS CANNOT REACH THE MINIMUM SUPPORT, THEY ARE NEVER COMPUTED
+        if threshold > 0:
+            self.infrequent = set([
+                j for j, column in self.ctx.m_prime.items()
+                if not self.e_pattern.length_at_least(column, threshold)
+            ])
 
     def evaluate_conditions(self, new_extent):
         """
@@ -85,20 +131,17 @@ class CbO(Algorithm):
         Applies canonical test to a description
         """
         current_element, pointer, description = args
-        mask = set(range(pointer + 1))
+        mask = self.pattern.mask(pointer)
         # return lexo(mask.desc, description.intersection(mask).desc)
         desc1 = self.pattern.intersection(current_element, mask)
         desc2 = self.pattern.intersection(description, mask)
-        return lexo(desc1, desc2)
+        return self.pattern.lexo(desc1, desc2)
 
     def derive_extent(self, descriptions):
         """
         Obtain next iteration extent
         """
-        return reduce(
-            lambda x, y: x.intersection(y),
-            descriptions
-        )
+        return reduce(self.e_pattern.intersection, descriptions)
 
     def derive_intent(self, *args):
         """
@@ -108,49 +151,77 @@ class CbO(Algorithm):
         # print self.ctx.g_prime
         new_extent = args[0]
 
-        if not bool(new_extent):
+        if self.e_pattern.is_empty(new_extent):
             return self.pattern.top()
         return reduce(
             self.pattern.intersection,
-            [self.ctx.g_prime[g] for g in new_extent]
+            [self.ctx.g_prime[g] for g in self.e_pattern.get_iterator(new_extent)]
         )
 
-    def cbo(self, concept_id=None, extent=None, intent=None, current_element=0, depth=0):
+    def children(self, extent, intent, current_element=0, depth=0):
         """
-        concept_id: int current concept id
-        current_element: int current element in the intent enumeration
-        depth: int depth in the recursion
-        BASIC CLOSE BY ONE ITERATION
+        Generator of the children of a concept in the enumeration tree,
+        as (attribute, extent, intent) triples passing the canonical test
+        Children are generated lazily, so that the subtree of a child
+        is explored before the canonical test of the next one
         """
-
-        if concept_id is None:
-            concept_id = self.poset.supremum
-            extent = set(self.ctx.g_prime.keys())# self.poset.concept[self.poset.supremum][POSET.EXTENT_MARK]
-            intent = self.pattern.bottom()#self.poset.concept[self.poset.supremum][POSET.INTENT_MARK]
-        # print (extent, intent)
         if self.pattern.length(intent) == self.ctx.n_attributes or current_element >= self.ctx.n_attributes:
             return
 
         self.printer(extent, intent, depth)
 
         for j in range(current_element, self.ctx.n_attributes):
-            if not self.pattern.contains(intent, j):
+            if not self.pattern.contains(intent, j) and j not in self.infrequent:
                 self.calls += 1
                 new_extent = self.derive_extent([extent, self.ctx.m_prime[j]])
                 if self.evaluate_conditions(new_extent):
                     new_intent = self.derive_intent(new_extent, intent)
                     # CANONICAL TEST
-                    if not self.canonical_test(intent, j, new_intent) or \
-                            self.pattern.hash(new_intent) in self.cache:
-                        pass
-                    else:
-                        self.cache.append(self.pattern.hash(new_intent))
-                        new_concept = self.poset.new_formal_concept(
-                            new_extent,
-                            new_intent
-                        )
-                        self.poset.add_edge(concept_id, new_concept)
-                        self.cbo(new_concept, new_extent, new_intent, j + 1, depth + 1)
+                    if not self.canonical_test(intent, j, new_intent):
+                        continue
+                    key = self.pattern.hash(new_intent)
+                    if key not in self.cache:
+                        self.cache.append(key)
+                        yield j, new_extent, new_intent
+
+    def cbo(self, concept_id=None, extent=None, intent=None, current_element=0, depth=0):
+        """
+        concept_id: int current concept id
+        current_element: int current element in the intent enumeration
+        depth: int depth in the recursion
+        BASIC CLOSE BY ONE ITERATION
+        """
+
+        if concept_id is None:
+            concept_id = self.poset.supremum
+            extent = self.all_objects# self.poset.concept[self.poset.supremum][POSET.EXTENT_MARK]
+            intent = self.pattern.bottom()#self.poset.concept[self.poset.supremum][POSET.INTENT_MARK]
+        # print (extent, intent)
+        for j, new_extent, new_intent in self.children(extent, intent, current_element, depth):
+            new_concept = self.poset.new_formal_concept(
+                new_extent,
+                new_intent
+            )
+            self.poset.add_edge(concept_id, new_concept)
+            self.cbo(new_concept, new_extent, new_intent, j + 1, depth + 1)
+
+    def iter_concepts(self):
+        """
+        Generator of the concepts (extent, intent) in the order run() adds them
+        to the poset, starting with the supremum. Concepts are not stored,
+        only the hashes of their intents are kept in the cache
+        The enumeration tree is traversed with a stack of children generators
+        """
+        extent, intent = self.all_objects, self.pattern.bottom()
+        yield extent, intent
+        stack = [self.children(extent, intent)]
+        while bool(stack):
+            for j, new_extent, new_intent in stack[-1]:
+                yield new_extent, new_intent
+                stack.append(self.children(new_extent, new_intent, j + 1, len(stack)))
+                break
+            else:
+                stack.pop()
 
     def run(self, *args, **kwargs):
         self.cbo(self.poset.supremum, self.all_objects, self.pattern.bottom())
@@ -162,30 +233,30 @@ class PSCbO(CbO):
     It is just a bottom-up enumeration and pattern structures
     are contained by extents, not intents
     """
-    def derive_extent(self, descriptions):
+    def derive_intent(self, *args):
         """
-        Obtain next iteration extent
+        Objects whose description is subsumed by the new extent,
+        tested in a single batch over the stacked descriptions
         """
-        return reduce(self.e_pattern.intersection, descriptions)
-
-    def derive_intent(self, *args):
-        
         new_extent = args[0]
+        subsumed = self.e_pattern.leq_all(new_extent, self.stacked)
         result = set(
-            [m for m, desc in self.ctx.m_prime.items() if m in args[1] or self.e_pattern.leq(new_extent, desc)]
+            [m for m, leq in zip(self.stacked_keys, subsumed) if leq or m in args[1]]
             )
         return result
 
+    def lattice_context(self):
+        """
+        Object descriptions are not a formal context,
+        the covering relation is computed from the intents alone
+        """
+        return None
+
     def config(self):
         self.e_pattern = self.pattern
         self.pattern = SetPattern
 
-        
-
-        if not self.ondisk:
-            self.poset = POSET(transformer=self.ctx.transformer)
-        else:
-            self.poset = OnDiskPOSET(transformer=self.ctx.transformer, **self.ondisk_kwargs)
+        self.poset = self.new_poset()
 
         map(self.e_pattern.top, self.ctx.g_prime.values())
         self.all_objects = self.e_pattern.top()
@@ -196,6 +267,8 @@ class PSCbO(CbO):
         )
         self.ctx.m_prime = {g: self.e_pattern.fix_desc(desc) for g, desc in self.ctx.g_prime.items()}
         self.ctx.n_attributes = len(self.ctx.g_prime)
+        self.stacked_keys = sorted(self.ctx.m_prime.keys())
+        self.stacked = self.e_pattern.stack([self.ctx.m_prime[m] for m in self.stacked_keys])
 
         # THE NOTION OF MINIMUM SUPPORT SHOULD NOT BE APPLIED
         # DIRECTLY TO PATTERN STRUCTURE EXTENTS, SINCE THEY APPLY
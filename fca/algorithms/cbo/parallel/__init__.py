@@ -0,0 +1,180 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import sys
+import multiprocessing
+from fca.defs import POSET, OnDiskPOSET
+from fca.defs.caches import SetCache
+from fca.algorithms.cbo import CbO, PSCbO
+
+# Algorithm instance inherited by the workers of the pool
+_ALGORITHM = None
+# Poset of the main process, kept alive in the workers
+_POSET = None
+
+
+def _init_worker(algorithm):
+    """
+    Pool initializer, workers are forked and receive the configured
+    algorithm without pickling the context
+    The poset of the main process is kept referenced, otherwise its
+    (compressed) output streams would be finalized by the workers
+    and written to the files shared with the main process
+    """
+    global _ALGORITHM, _POSET
+    _ALGORITHM = algorithm
+    _ALGORITHM.tasks = None
+    _POSET = algorithm.poset
+
+
+def _explore(task):
+    """
+    Pool task, explores a subtree
+    """
+    return _ALGORITHM.explore(*task)
+
+
+class ParallelCbO(CbO):
+    """
+    Close-by-One over a pool of processes
+    The enumeration tree is expanded sequentially down to split_depth,
+    each subtree below that depth is explored by a worker in its own POSET
+    (or OnDiskPOSET shard) and then merged in the main poset.
+    With sharded=True, each worker writes the shard of its subtree
+    in the ShardedOnDiskPOSET and only the manifest entry is sent back.
+
+    Subtrees are only independent if the canonical test does not rely on
+    concepts found in other subtrees, thus the strict CbO canonical test
+    is used instead of the lexical test plus the cache
+
+    Workers are forked, so the context does not need to be picklable
+    """
+    def __init__(self, ctx, **kwargs):
+        self.processes = kwargs.get('processes', multiprocessing.cpu_count())
+        self.split_depth = kwargs.get('split_depth', 1)
+        self.tasks = None
+        self.shard_kwargs = None
+        super(ParallelCbO, self).__init__(ctx, **kwargs)
+
+    def canonical_test(self, *args):
+        """
+        The new description should not contain new elements before pointer
+        """
+        current_element, pointer, description = args
+        mask = self.pattern.mask(pointer - 1)
+        desc1 = self.pattern.intersection(current_element, mask)
+        desc2 = self.pattern.intersection(description, mask)
+        return self.pattern.is_equal(desc1, desc2)
+
+    def cbo(self, concept_id=None, extent=None, intent=None, current_element=0, depth=0):
+        """
+        While splitting, subtrees at split_depth are kept as tasks instead of explored
+        """
+        if self.tasks is not None and depth == self.split_depth:
+            self.tasks.append((len(self.tasks), concept_id, extent, intent, current_element, depth))
+            return
+        super(ParallelCbO, self).cbo(concept_id, extent, intent, current_element, depth)
+
+    def explore(self, task_id, concept_id, extent, intent, current_element, depth):
+        """
+        Explores a subtree in a new poset, executed by the workers
+        The root of the subtree is not added to the new poset,
+        edges starting from it use poset.supremum as source
+        returns (calls, concepts or shard path or shard entry, edges)
+        """
+        self.calls = 0
+        self.cache = SetCache()
+        if self.ondisk and self.sharded:
+            # SHARD 0 IS THE ONE OF THE MAIN POSET
+            self.poset = _POSET.new_shard(task_id + 1, concept_id)
+            super(ParallelCbO, self).cbo(self.poset.supremum, extent, intent, current_element, depth)
+            return self.calls, _POSET.close_shard(self.poset), []
+        if not self.ondisk:
+            self.poset = POSET(transformer=self.ctx.transformer)
+        else:
+            kwargs = dict(self.shard_kwargs)
+            kwargs['output_fname'] = '{}.{}'.format(kwargs['output_fname'], task_id)
+            self.poset = OnDiskPOSET(transformer=self.ctx.transformer, **kwargs)
+        super(ParallelCbO, self).cbo(self.poset.supremum, extent, intent, current_element, depth)
+
+        edges = [
+            (source, target)
+            for source in self.poset.nodes()
+            for target in self.poset.successors(source)
+        ]
+        if self.ondisk:
+            return self.calls, self.poset.close(), edges
+        concepts = [
+            (cid, concept.extent, concept.intent)
+            for cid, concept in sorted(self.poset.concepts(), key=lambda s: s[0])
+        ]
+        return self.calls, concepts, edges
+
+    def merge(self, root_id, result):
+        """
+        Adds the concepts found by a worker to the poset
+        """
+        calls, concepts, edges = result
+        self.calls += calls
+        if self.ondisk and self.sharded:
+            self.poset.add_shard(concepts)
+            return
+        if self.ondisk:
+            mapping = self.poset.merge_shard(concepts, root_id)
+        else:
+            mapping = {}
+            for cid, extent, intent in concepts:
+                mapping[cid] = self.poset.new_formal_concept(extent, intent)
+        mapping[self.poset.supremum] = root_id
+        for source, target in edges:
+            self.poset.add_edge(mapping[source], mapping[target])
+
+    def run(self, *args, **kwargs):
+        self.tasks = []
+        self.cbo(self.poset.supremum, self.all_objects, self.pattern.bottom())
+        tasks, self.tasks = self.tasks, None
+
+        # Forked workers should not flush buffers inherited from this process
+        sys.stdout.flush()
+        if self.ondisk:
+            self.poset.flush()
+        if self.ondisk and not self.sharded:
+            self.shard_kwargs = dict(self.ondisk_kwargs)
+            self.shard_kwargs.update({
+                'output_path': self.poset.output_path,
+                'output_fname': self.poset.output_fname,
+                'write_headers': False,
+                'store': False,
+                'covers': False,
+                'support': self.poset.support
+            })
+
+        pool = multiprocessing.Pool(self.processes, _init_worker, (self,))
+        try:
+            for i, result in enumerate(pool.imap(_explore, tasks)):
+                self.merge(tasks[i][1], result)
+        finally:
+            pool.close()
+            pool.join()
+
+
+class PSParallelCbO(ParallelCbO, PSCbO):
+    """
+    ParallelCbO for pattern structures
+    """
+    pass
@@ -18,7 +18,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # Kyori code.
 from fca.algorithms import Algorithm, lexo
 from fca.algorithms.cbo import CbO
-from fca.defs import POSET, SSetPattern
+from fca.defs import POSET
 from fca.defs.patterns.enumerators import SetObjectEnumerator
 
 
@@ -48,7 +48,40 @@ class CbOPS(CbO):
         self.conditions.append(
             lambda new_extent: len(new_extent) > self.min_sup * self.ctx.n_objects
         )
+        # OBJECT DESCRIPTIONS STACKED FOR BATCHED INTERSECTIONS
+        self.stacked_index = {g: i for i, g in enumerate(sorted(self.ctx.g_prime.keys()))}
+        self.stacked = self.pattern.stack(
+            [self.pattern.fix_desc(self.ctx.g_prime[g]) for g in sorted(self.stacked_index)]
+        )
+
+
+    def children(self, extent, intent, current_element=0, depth=0):
+        """
+        Generator of the children of a concept in the enumeration tree,
+        as (ticket, extent, intent) triples passing the canonical test
+        """
+        self.calls += 1
+        self.printer(extent, intent, depth)
 
+        ticket = self.enumerator.new_ticket(current_element, depth)
+
+        j = self.enumerator.next(ticket, intent, depth, extent=extent)
+
+        while j is not None:
+            new_extent = self.enumerator.next_objects(ticket, j, extent, depth)
+            if self.evaluate_conditions(new_extent):
+                new_intent = self.pattern.intersection_all(
+                    self.stacked,
+                    [self.stacked_index[i] for i in new_extent]
+                )
+                key = None
+                if self.enumerator.canonical_test(ticket, intent, new_intent):
+                    key = self.pattern.hash(new_intent)
+                if key is not None and key not in self.cache:
+                    self.cache.append(key)
+                    yield ticket, new_extent, new_intent
+
+            j = self.enumerator.next(ticket, intent, depth, extent=extent)
 
     def run(self, concept_id=None, current_element=0, depth=0):
         """
@@ -59,35 +92,31 @@ class CbOPS(CbO):
 
         BASIC CLOSE BY ONE ITERATION
         """
-
-        self.calls += 1
         if concept_id is None:
             concept_id = self.poset.supremum
 
         intent = self.poset.concept[concept_id][POSET.INTENT_MARK]
         extent = self.poset.concept[concept_id][POSET.EXTENT_MARK]
-        
-        self.printer(extent, intent, depth)
 
-        ticket = self.enumerator.new_ticket(current_element, depth)
-        
-        j = self.enumerator.next(ticket, intent, depth, extent=extent)
+        for ticket, new_extent, new_intent in self.children(extent, intent, current_element, depth):
+            new_concept = self.poset.new_formal_concept(new_extent, new_intent)
+            # print '\n',new_extent
+            self.poset.add_edge(concept_id, new_concept)
+            self.run(new_concept, ticket, depth+1)
 
-        while j is not None:
-            new_extent = self.enumerator.next_objects(ticket, j, extent, depth)
-            if self.evaluate_conditions(new_extent):
-                new_intent = reduce(
-                    self.pattern.intersection,
-                    [self.pattern.fix_desc(self.ctx.g_prime[i]) for i in new_extent]
-                )
-                if not self.enumerator.canonical_test(ticket, intent, new_intent) or \
-                    self.pattern.hash(new_intent) in self.cache:
-                    pass
-                else:
-                    self.cache.append(self.pattern.hash(new_intent))
-                    new_concept = self.poset.new_formal_concept(new_extent, new_intent)
-                    # print '\n',new_extent
-                    self.poset.add_edge(concept_id, new_concept)
-                    self.run(new_concept, ticket, depth+1)
-                
-            j = self.enumerator.next(ticket, intent, depth, extent=extent)
+    def iter_concepts(self):
+        """
+        Generator of the concepts (extent, intent) in the order run() adds them
+        to the poset, starting with the supremum. Concepts are not stored
+        """
+        supremum = self.poset.concept[self.poset.supremum]
+        extent, intent = supremum[POSET.EXTENT_MARK], supremum[POSET.INTENT_MARK]
+        yield extent, intent
+        stack = [self.children(extent, intent)]
+        while bool(stack):
+            for ticket, new_extent, new_intent in stack[-1]:
+                yield new_extent, new_intent
+                stack.append(self.children(new_extent, new_intent, ticket, len(stack)))
+                break
+            else:
+                stack.pop()
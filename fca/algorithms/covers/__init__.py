@@ -0,0 +1,321 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import mmap
+import struct
+from numbers import Integral
+from fca.defs.patterns.bitsets import bits_from_indices, popcount
+from fca.io.file_models import ExternalSorter
+from fca.io.output_models import read_records
+
+#****************************************
+# Covering relation
+#****************************************
+# A concept (C, D) is a lower cover of (A, B) if C is a proper subset of A
+# and no extent lies in between, the Hasse diagram of the lattice.
+# Covers are written next to OUTPUT as two files of PAIR records:
+#   OUTPUT.up    (lower, upper) sorted by lower, the upper neighbors of each concept
+#   OUTPUT.down  (upper, lower) sorted by upper, the lower neighbors of each concept
+PAIR = struct.Struct('<qq')
+
+
+def intent_bits(intent):
+    """
+    Bitset of an intent given as a bitset or a collection of attributes
+    """
+    if isinstance(intent, Integral):
+        return intent
+    if isinstance(intent, (set, frozenset, list, tuple)):
+        return bits_from_indices(intent)
+    raise ValueError('Covers require set or bitset intents, not {}'.format(type(intent)))
+
+
+def ipred(intents):
+    """
+    Covering relation of a set of intents closed by intersection, iPred.
+    Intents are processed by increasing size, the border holds the intents
+    without a lower cover yet. The upper covers of an intent are among its
+    intersections with the border (faces); a face is a cover unless an intent
+    processed before already covered it with one of the new attributes,
+    recorded in delta. Only the border is traversed for each intent
+    intents: dict id -> bitset intent, ids of equal intents are not covered
+    returns list of (lower id, upper id)
+    """
+    order = sorted(intents, key=lambda concept_id: popcount(intents[concept_id]))
+    by_intent = {}
+    for concept_id in order:
+        by_intent.setdefault(intents[concept_id], concept_id)
+    delta = {}
+    border = set([])
+    covers = []
+    for concept_id in order:
+        intent = intents[concept_id]
+        if by_intent[intent] != concept_id:
+            continue
+        # THE BORDER HOLDS INTENTS, INTERSECTED WITHOUT A PYTHON LOOP
+        for face in set(map(intent.__and__, border)):
+            # FACES OUTSIDE THE SET, E.G. WITH CUSTOM CONDITIONS, ARE SKIPPED
+            upper = by_intent.get(face, None)
+            if upper is None or upper == concept_id:
+                continue
+            new_attributes = intent & ~face
+            if not delta.get(upper, 0) & new_attributes:
+                covers.append((concept_id, upper))
+                delta[upper] = delta.get(upper, 0) | new_attributes
+                border.discard(face)
+        border.add(intent)
+    return covers
+
+
+def lindig(intents, ctx):
+    """
+    Covering relation of the intents of the concepts of a formal context,
+    the lower covers of each concept are computed from the context with
+    lower_covers, thus the cost per concept depends on the number of attributes
+    and not on the width of the lattice.
+    Lower covers outside the set, e.g. below a minimum support, are dropped
+    intents: dict id -> bitset intent, ids of equal intents are not covered
+    returns list of (lower id, upper id)
+    """
+    all_objects, columns = context_columns(ctx)
+    by_intent = {}
+    for concept_id in sorted(intents):
+        by_intent.setdefault(intents[concept_id], concept_id)
+    covers = []
+    for intent, concept_id in by_intent.items():
+        extent = extent_of(intent, all_objects, columns)
+        for lower in lower_covers(extent, intent, columns):
+            lower_id = by_intent.get(lower, None)
+            if lower_id is not None:
+                covers.append((lower_id, concept_id))
+    return covers
+
+
+def covering_relation(poset, ctx=None):
+    """
+    Covers (lower id, upper id) of the concepts of an in-memory poset
+    with lindig if the formal context is given, otherwise with ipred
+    """
+    intents = {
+        concept_id: intent_bits(concept[poset.INTENT_MARK])
+        for concept_id, concept in poset.concepts()
+    }
+    if ctx is not None:
+        return lindig(intents, ctx)
+    return ipred(intents)
+
+
+def context_columns(ctx):
+    """
+    Objects of each attribute of a formal context as bitsets
+    m_prime may hold sets of objects or bitsets
+    returns (all objects, [(attribute bit, objects of the attribute)])
+    """
+    columns = []
+    for m in sorted(ctx.m_prime):
+        objects = ctx.m_prime[m]
+        if not isinstance(objects, Integral):
+            if not isinstance(objects, (set, frozenset, list, tuple)):
+                raise ValueError('Covers require a formal context, attribute {} is {}'.format(m, type(objects)))
+            objects = bits_from_indices(objects)
+        columns.append((1 << m, objects))
+    return bits_from_indices(ctx.g_prime.keys()), columns
+
+
+def extent_of(intent, all_objects, columns):
+    """
+    Objects holding all the attributes of a bitset intent
+    """
+    extent = all_objects
+    for bit, objects in columns:
+        if intent & bit:
+            extent &= objects
+    return extent
+
+
+def lower_covers(extent, intent, columns):
+    """
+    Intents of the lower covers of the concept (extent, intent), as bitsets
+    Lindig's neighbors over the attributes not in the intent: an attribute m
+    gives a lower cover unless its closure adds another attribute that is
+    still a minimal candidate, in which case m is no longer minimal itself.
+    Each lower cover is generated once
+    """
+    candidates = [(bit, objects) for bit, objects in columns if not intent & bit]
+    minimal = 0
+    for bit, _ in candidates:
+        minimal |= bit
+    covers = []
+    for bit, objects in candidates:
+        new_extent = extent & objects
+        new_intent = intent
+        for other, other_objects in candidates:
+            if (new_extent & other_objects) == new_extent:
+                new_intent |= other
+        if (minimal & new_intent & ~intent) == bit:
+            covers.append(new_intent)
+        else:
+            minimal &= ~bit
+    return covers
+
+
+def iter_intents(paths, compression=None):
+    """
+    (id, bitset intent) of the binary records in paths, intents are the last field
+    """
+    for path in paths:
+        for record in read_records(path, 'binary', compression):
+            yield record[0], bits_from_indices(record[-1])
+
+
+def join_covers(concepts, requests):
+    """
+    Merges (intent, id) pairs sorted by intent with (lower intent, upper id) pairs
+    sorted by lower intent, yielding the (lower id, upper id) covers.
+    Lower intents without a concept, e.g. below a minimum support, are dropped
+    """
+    concepts = iter(concepts)
+    current = next(concepts, None)
+    for intent, upper in requests:
+        while current is not None and current[0] < intent:
+            current = next(concepts, None)
+        if current is not None and current[0] == intent:
+            yield current[1], upper
+
+
+def write_pairs(pairs, path):
+    """
+    Writes sorted pairs of integers as PAIR records
+    """
+    with open(path, 'wb') as fout:
+        block = []
+        for pair in pairs:
+            block.append(PAIR.pack(*pair))
+            if len(block) == 65536:
+                fout.write(b''.join(block))
+                block = []
+        fout.write(b''.join(block))
+
+
+def write_covers(ctx, paths, output, compression=None, max_size=1000000, tmp_path=None):
+    """
+    Computes the covering relation of the concepts in binary record files,
+    as written by OnDiskPOSET with intents, in external memory.
+    Only the context is kept in memory: concepts are read once, the intents
+    of their lower covers are computed from the context, and they are mapped
+    to concept ids with a sort-merge join on intents. Items beyond max_size
+    are spilled to sorted runs in tmp_path
+    ctx: formal context the concepts were computed from
+    paths: record files, ids should be unique among them
+    output: prefix of the covers files, see PAIR
+    returns number of covers
+    """
+    all_objects, columns = context_columns(ctx)
+    sorters = [ExternalSorter(max_size, tmp_path) for _ in range(4)]
+    concepts, requests, ups, downs = sorters
+    try:
+        for concept_id, intent in iter_intents(paths, compression):
+            concepts.append((intent, concept_id))
+            extent = extent_of(intent, all_objects, columns)
+            for lower in lower_covers(extent, intent, columns):
+                requests.append((lower, concept_id))
+
+        for lower, upper in join_covers(concepts, requests):
+            ups.append((lower, upper))
+            downs.append((upper, lower))
+        concepts.close()
+        requests.close()
+        write_pairs(ups, output + '.up')
+        write_pairs(downs, output + '.down')
+        return len(ups)
+    finally:
+        for sorter in sorters:
+            sorter.close()
+
+
+class Covers(object):
+    """
+    Covering relation written by write_covers, memory mapped
+    Neighbors of a concept are found by binary search
+    """
+    def __init__(self, output):
+        self.output = output
+        self.files = {}
+        self.maps = {}
+        for key in ('up', 'down'):
+            self.files[key] = open('{}.{}'.format(output, key), 'rb')
+            size = os.fstat(self.files[key].fileno()).st_size
+            self.maps[key] = mmap.mmap(self.files[key].fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.length = size // PAIR.size
+
+    def __len__(self):
+        return self.length
+
+    def pair(self, key, i):
+        """
+        i-th pair of a file
+        """
+        return PAIR.unpack_from(self.maps[key], i * PAIR.size)
+
+    def neighbors(self, key, concept_id):
+        """
+        Second values of the pairs starting with concept_id
+        """
+        if self.maps[key] is None:
+            return []
+        low, high = 0, self.length
+        while low < high:
+            middle = (low + high) // 2
+            if self.pair(key, middle)[0] < concept_id:
+                low = middle + 1
+            else:
+                high = middle
+        neighbors = []
+        while low < self.length:
+            first, second = self.pair(key, low)
+            if first != concept_id:
+                break
+            neighbors.append(second)
+            low += 1
+        return neighbors
+
+    def upper_neighbors(self, concept_id):
+        """
+        Ids of the concepts covering concept_id
+        """
+        return self.neighbors('up', concept_id)
+
+    def lower_neighbors(self, concept_id):
+        """
+        Ids of the concepts covered by concept_id
+        """
+        return self.neighbors('down', concept_id)
+
+    def __iter__(self):
+        """
+        Covers (lower, upper) sorted by lower
+        """
+        for i in range(self.length):
+            yield self.pair('up', i)
+
+    def close(self):
+        for key in ('up', 'down'):
+            if self.maps[key] is not None:
+                self.maps[key].close()
+            self.files[key].close()
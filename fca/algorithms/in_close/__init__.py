@@ -0,0 +1,127 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from fca.algorithms.cbo import CbO, PSCbO
+
+
+class InClose(CbO):
+    """
+    Close-by-One with partial closures (In-Close2) and
+    inheritance of failed canonical tests (FCbO)
+
+    Given a concept (A, B) and an attribute j, the new extent C = A \\cap {j}'
+    is not closed right away. Instead, the canonical test looks for an attribute
+    k < j, not in B, held by all the objects in C. The first one found makes
+    the test fail and the rest of the closure is never computed.
+
+    Such an attribute k is kept as the witness of the failure of j
+    and it is inherited by the children of (A, B). A child (E, F) with k not in F
+    would fail the test for j as well, since the closure of E \\cap {j}' contains
+    the closure of C. Thus, j is skipped without computing any closure.
+    For this to work, children are explored only after all the attributes
+    of their parent have been tested.
+
+    Each concept is generated exactly once, no cache is required
+    """
+    TIMED = CbO.TIMED + ('partial_canonical_test', 'close_intent')
+    REJECTIONS = dict(CbO.REJECTIONS, partial_canonical_test=(
+        'canonical_test_failures', lambda witness: witness is not None
+    ))
+    COUNTERS = dict(CbO.COUNTERS, pruned='inherited_failures')
+
+    def __init__(self, ctx, **kwargs):
+        self.pruned = 0
+        super(InClose, self).__init__(ctx, **kwargs)
+
+    def has_attribute(self, extent, attribute):
+        """
+        Tests whether all the objects in the extent have the attribute
+        """
+        return self.e_pattern.leq(extent, self.ctx.m_prime[attribute])
+
+    def partial_canonical_test(self, intent, pointer, extent):
+        """
+        Looks for an attribute before pointer that is not in the intent
+        and that is held by all the objects in the extent
+        returns such an attribute or None if the test succeeds
+        """
+        for k in range(pointer):
+            if not self.pattern.contains(intent, k) and self.has_attribute(extent, k):
+                return k
+        return None
+
+    def close_intent(self, intent, pointer, extent):
+        """
+        Completes the intent of a canonical extent,
+        only attributes after pointer need to be tested
+        """
+        new_attributes = [pointer]
+        for k in range(pointer + 1, self.ctx.n_attributes):
+            if not self.pattern.contains(intent, k) and self.has_attribute(extent, k):
+                new_attributes.append(k)
+        return self.pattern.union(intent, self.pattern.fix_desc(new_attributes))
+
+    def in_close(self, concept_id, extent, intent, current_element=0, depth=0, failures=None):
+        """
+        concept_id: int current concept id
+        current_element: int current element in the intent enumeration
+        depth: int depth in the recursion
+        failures: dict attribute -> attribute that made it fail the canonical test
+        """
+        if self.pattern.length(intent) == self.ctx.n_attributes or current_element >= self.ctx.n_attributes:
+            return
+
+        self.printer(extent, intent, depth)
+
+        failures = dict(failures) if failures is not None else {}
+        children = []
+        for j in range(current_element, self.ctx.n_attributes):
+            if self.pattern.contains(intent, j) or j in self.infrequent:
+                continue
+            # INHERITED FAILURE
+            witness = failures.get(j, None)
+            if witness is not None and not self.pattern.contains(intent, witness):
+                self.pruned += 1
+                continue
+            self.calls += 1
+            new_extent = self.derive_extent([extent, self.ctx.m_prime[j]])
+            if not self.evaluate_conditions(new_extent):
+                continue
+            # CANONICAL TEST
+            witness = self.partial_canonical_test(intent, j, new_extent)
+            if witness is not None:
+                failures[j] = witness
+            else:
+                children.append((j, new_extent))
+
+        for j, new_extent in children:
+            new_intent = self.close_intent(intent, j, new_extent)
+            new_concept = self.poset.new_formal_concept(new_extent, new_intent)
+            self.poset.add_edge(concept_id, new_concept)
+            self.in_close(new_concept, new_extent, new_intent, j + 1, depth + 1, failures)
+
+    def run(self, *args, **kwargs):
+        self.in_close(self.poset.supremum, self.all_objects, self.pattern.bottom())
+
+
+class PSInClose(InClose, PSCbO):
+    """
+    InClose for pattern structures, extents are descriptions
+    and an attribute is an object description subsuming the extent
+    """
+    pass
@@ -16,7 +16,6 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 # Kyori code.
-import sys
 from fca.algorithms.lexenum_closures import LexEnumClosures
 from fca.algorithms.cbo import PSCbO
 from fca.algorithms import lexo
@@ -78,15 +77,19 @@ class LecEnumClosures(LexEnumClosures):
         # if not bool(current_element):
         #     return True
         # print '\n\t\t=>', min(description) , min(pointer, min(current_element) if bool(current_element) else 1000)
-        if min(description) < min(pointer, min(current_element) if bool(current_element) else sys.maxint):
+        bound = pointer
+        if not self.pattern.is_empty(current_element):
+            bound = min(pointer, self.pattern.minimum(current_element))
+        if self.pattern.minimum(description) < bound:
             return False
 
-        return pointer <= min(description.difference(current_element))
+        return pointer <= self.pattern.minimum(self.pattern.difference(description, current_element))
 
-    def next_closure(self):
+    def find_closure(self):
         """
-        Computes the next closure in the stack
-        Can be used externally or in a batch with self.run()
+        Computes the next closure in the stack without storing it in the poset
+        The caller should push the concept id of the closure in stack_cid
+        returns (extent, intent) or None when the enumeration is over
         """
         found_closure = False
 
@@ -96,7 +99,7 @@ class LecEnumClosures(LexEnumClosures):
                 if not bool(self.stack):
                     return None
                 j = self.stack_enum[-1]
-                while j in self.stack[-1]:
+                while self.pattern.contains(self.stack[-1], j):
                     j -= 1
                 if j <= self.stack_enum[-2]+1:
                     self.stack.pop()
@@ -108,8 +111,6 @@ class LecEnumClosures(LexEnumClosures):
 
             # CLOSURE
             self.calls += 1
-            print '\r', "{:30s}".format(str(self.stack_enum)),
-            sys.stdout.flush()
             auxiliar_pattern = set([j])
 
             new_extent, new_intent = self.meet_concepts(
@@ -119,9 +120,10 @@ class LecEnumClosures(LexEnumClosures):
                 self.stack[-1], #INTENT2
             )
 
-            if new_extent is None or \
-            not self.canonical_test(self.stack[-1], j, new_intent) \
-            or self.pattern.hash(new_intent) in self.cache:
+            key = None
+            if new_extent is not None and self.canonical_test(self.stack[-1], j, new_intent):
+                key = self.pattern.hash(new_intent)
+            if key is None or key in self.cache:
                 self.stack_enum[-1] = j-1
             else:
                 found_closure = True
@@ -130,14 +132,11 @@ class LecEnumClosures(LexEnumClosures):
 
         self.stack.append(new_intent)
         self.stack_enum.append(self.ctx.n_attributes-1)
-        cid = self.poset.new_formal_concept(new_extent, new_intent)
-        self.poset.add_edge(self.stack_cid[-1], cid)
-        self.stack_cid.append(cid)
         self.stack_extents.append(new_extent)
-        self.stack_supports.append(len(new_extent))
-        self.cache.append(self.pattern.hash(new_intent))
+        self.stack_supports.append(self.e_pattern.length(new_extent))
+        self.cache.append(key)
 
-        return new_intent
+        return new_extent, new_intent
 
 class PSLecEnumClosures(LecEnumClosures, PSCbO):
     """
@@ -16,7 +16,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 # Kyori code.
-
+import os
+import time
 from fca.defs import POSET
 from fca.algorithms import lexo
 from fca.algorithms.cbo import CbO, PSCbO
@@ -41,7 +42,12 @@ class LexEnumClosures(CbO):
     3
     34
     4
+
+    With metrics, find_closure is traced after each closure,
+    a tracer can follow the enumeration through algorithm.stack_enum
     """
+    TIMED = CbO.TIMED + ('find_closure', 'meet_concepts')
+
     def __init__(self, ctx, **kwargs):
         """
         Initialize stacks to maintain the trace of the execution
@@ -50,14 +56,47 @@ class LexEnumClosures(CbO):
 
         This class uses a close_pattern that is a method to close an intent
         It can be changed externally to support other closures
+
+        checkpoint_path: file where the state of the enumeration is periodically saved
+        checkpoint_interval: minimal number of seconds between two checkpoints
+        resume: if True and checkpoint_path exists, run() resumes from the checkpoint
         """
         self.stack = None # Stack of patterns
         self.stack_enum = None # Stack of enumerators
         self.stack_supports = None
         self.calls = 0
 
+        self.checkpoint_path = kwargs.get('checkpoint_path', None)
+        self.checkpoint_interval = kwargs.get('checkpoint_interval', 600)
+        self.last_checkpoint = time.time()
+        # STATE READ FROM THE CHECKPOINT, RESTORED BY run()
+        self.resume_state = None
+        self.resumed = False
+        if kwargs.get('resume', False) and self.checkpoint_path is not None \
+        and os.path.exists(self.checkpoint_path):
+            self.resume_state = POSET.read(self.checkpoint_path)
+
         super(LexEnumClosures, self).__init__(ctx, **kwargs)
 
+    def new_poset(self):
+        """
+        When resuming on disk, concepts are appended to the output file of the checkpoint
+        """
+        if self.resume_state is None or not self.ondisk:
+            return super(LexEnumClosures, self).new_poset()
+        kwargs = dict(self.ondisk_kwargs)
+        kwargs.update({
+            'output_path': self.resume_state['output_path'],
+            'output_fname': self.resume_state['output_fname'],
+            'append': True
+        })
+        return self.ondisk_class(
+            transformer=self.ctx.transformer,
+            support=self.e_pattern.length,
+            context=self.ctx,
+            **kwargs
+        )
+
     def config(self):
         """
         Configure the stacks
@@ -86,10 +125,11 @@ class LexEnumClosures(CbO):
         del new_extent
         return None, self.pattern.bottom()
 
-    def next_closure(self):
+    def find_closure(self):
         """
-        Computes the next closure in the stack
-        Can be used externally or in a batch with self.run()
+        Computes the next closure in the stack without storing it in the poset
+        The caller should push the concept id of the closure in stack_cid
+        returns (extent, intent) or None when the enumeration is over
         """
         found_closure = False
 
@@ -99,7 +139,7 @@ class LexEnumClosures(CbO):
                 if not bool(self.stack):
                     return None
                 j = self.stack_enum[-1]
-                while j in self.stack[-1]:
+                while self.pattern.contains(self.stack[-1], j):
                     j += 1
                 if j == self.ctx.n_attributes:
                     self.stack.pop()
@@ -109,8 +149,6 @@ class LexEnumClosures(CbO):
                 else:
                     make_j = False
             self.calls += 1
-            print '\r', "{:100s}".format(str(self.stack_enum)),
-
             auxiliar_pattern = set([j])
             # CLOSURE
             new_extent, new_intent = self.meet_concepts(
@@ -121,9 +159,10 @@ class LexEnumClosures(CbO):
             )
             # END CLOSURE
 
-            if new_extent is None or \
-            not self.canonical_test(self.stack[-1], j, new_intent) \
-            or self.pattern.hash(new_intent) in self.cache:
+            key = None
+            if new_extent is not None and self.canonical_test(self.stack[-1], j, new_intent):
+                key = self.pattern.hash(new_intent)
+            if key is None or key in self.cache:
                 self.stack_enum[-1] = j+1
             else:
                 found_closure = True
@@ -131,20 +170,100 @@ class LexEnumClosures(CbO):
         self.stack_enum[-1] = j+1
         self.stack.append(new_intent)
         self.stack_enum.append(j+1)
+        self.stack_extents.append(new_extent)
+        self.stack_supports.append(self.e_pattern.length(new_extent))
+        self.cache.append(key)
+        return new_extent, new_intent
+
+    def next_closure(self):
+        """
+        Computes the next closure in the stack
+        Can be used externally or in a batch with self.run()
+        """
+        closure = self.find_closure()
+        if closure is None:
+            return None
+        new_extent, new_intent = closure
         cid = self.poset.new_formal_concept(new_extent, new_intent)
         self.poset.add_edge(self.stack_cid[-1], cid)
         self.stack_cid.append(cid)
-        self.stack_extents.append(new_extent)
-        self.stack_supports.append(len(new_extent))
-        self.cache.append(self.pattern.hash(new_intent))
         return new_intent
 
+    def iter_concepts(self):
+        """
+        Generator of the concepts (extent, intent) in the order run() adds them
+        to the poset, starting with the supremum. Concepts are not stored,
+        only the hashes of their intents are kept in the cache
+        """
+        yield self.stack_extents[0], self.stack[0]
+        closure = self.find_closure()
+        while closure is not None:
+            self.stack_cid.append(None)
+            yield closure
+            closure = self.find_closure()
+
+    def checkpoint_state(self):
+        """
+        State of the enumeration saved together with the poset
+        The cache should be picklable (SetCache, DictCache)
+        """
+        return {
+            'stack': self.stack,
+            'stack_enum': self.stack_enum,
+            'stack_supports': self.stack_supports,
+            'stack_cid': self.stack_cid,
+            'stack_extents': self.stack_extents,
+            'cache': self.cache,
+            'calls': self.calls
+        }
+
+    def restore_state(self, state):
+        """
+        Restores the state saved by checkpoint_state
+        """
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def save_checkpoint(self):
+        """
+        Saves the poset and the state of the enumeration to checkpoint_path
+        """
+        self.poset.save(self.checkpoint_path, **self.checkpoint_state())
+        self.last_checkpoint = time.time()
+
+    def checkpoint(self):
+        """
+        Saves a checkpoint if checkpoint_interval seconds have passed since the last one
+        Should be called once the last closure has been completely processed
+        """
+        if self.checkpoint_path is not None and \
+        time.time() - self.last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+
+    def resume(self):
+        """
+        Restores the poset and the state of the enumeration read from the checkpoint
+        returns True if the enumeration was resumed
+        """
+        if self.resume_state is None:
+            return False
+        self.poset.load_data(self.resume_state)
+        self.restore_state(self.resume_state['state'])
+        self.resume_state = None
+        # THE RESTORED CACHE IS NOT METERED
+        self.instrument()
+        self.resumed = True
+        return True
+
     def run(self, *args, **kwargs):
         """
         Computes all the closures and store them in the poset
         """
+        self.resume()
         while self.next_closure() is not None:
-            continue
+            self.checkpoint()
+        if self.checkpoint_path is not None:
+            self.save_checkpoint()
         print ('')
 
 
@@ -0,0 +1,264 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import signal
+import contextlib
+from timeit import default_timer
+from fca.defs.caches import Cache
+
+
+def _unwrap(cache):
+    """
+    Unpickles a MeteredCache as the cache it wraps
+    """
+    return cache
+
+
+class MeteredCache(Cache):
+    """
+    Wraps a cache and counts the hits and misses of its lookups
+    Pickling the wrapper pickles the wrapped cache, so that checkpoints
+    do not depend on the metrics
+    """
+    def __init__(self, cache, counters):
+        self.cache = cache
+        self.counters = counters
+
+    def __contains__(self, key):
+        if key in self.cache:
+            self.counters['cache_hits'] = self.counters.get('cache_hits', 0) + 1
+            return True
+        self.counters['cache_misses'] = self.counters.get('cache_misses', 0) + 1
+        return False
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __reduce__(self):
+        return _unwrap, (self.cache,)
+
+    def append(self, key, value=True):
+        self.cache.append(key, value)
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def close(self):
+        self.cache.close()
+
+
+class SamplingProfiler(object):
+    """
+    Statistical profiler, the stack of the main thread is sampled
+    every interval seconds of CPU time through SIGPROF.
+    Only available on Unix, should be used from the main thread
+
+    with SamplingProfiler(0.005) as profiler:
+        ...
+    print profiler.report()
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.total = 0
+        # FUNCTION ON TOP OF THE STACK
+        self.own = {}
+        # FUNCTION ANYWHERE IN THE STACK
+        self.cumulative = {}
+        self.previous = None
+
+    @staticmethod
+    def label(frame):
+        """
+        file:line(function) of the code being executed in a frame
+        """
+        code = frame.f_code
+        return '{}:{}({})'.format(os.path.basename(code.co_filename), code.co_firstlineno, code.co_name)
+
+    def sample(self, signum, frame):
+        """
+        SIGPROF handler, records the current stack
+        """
+        self.total += 1
+        label = self.label(frame)
+        self.own[label] = self.own.get(label, 0) + 1
+        seen = set([])
+        while frame is not None:
+            label = self.label(frame)
+            if label not in seen:
+                seen.add(label)
+                self.cumulative[label] = self.cumulative.get(label, 0) + 1
+            frame = frame.f_back
+
+    def __enter__(self):
+        self.previous = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *args):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.previous)
+
+    def top(self, n=10, cumulative=False):
+        """
+        The n functions with more samples as (label, samples, fraction) triples
+        """
+        samples = self.cumulative if cumulative else self.own
+        ranking = sorted(samples.items(), key=lambda s: (-s[1], s[0]))[:n]
+        return [(label, count, float(count) / max(self.total, 1)) for label, count in ranking]
+
+    def report(self, n=10):
+        """
+        Text report of the functions with more samples
+        """
+        lines = ['{} samples every {}s'.format(self.total, self.interval)]
+        for title, cumulative in [('own', False), ('cumulative', True)]:
+            lines.append('  {}:'.format(title))
+            for label, count, fraction in self.top(n, cumulative):
+                lines.append('    {:6.1%} {:8d}  {}'.format(fraction, count, label))
+        return '\n'.join(lines)
+
+
+class Metrics(object):
+    """
+    Counters, timers and traces of an algorithm execution
+    Passed to an algorithm as metrics=Metrics(...) (or metrics=True),
+    the methods listed in the TIMED attribute of the algorithm are wrapped
+    in the instance when it is executed, without metrics nothing is wrapped
+    and the algorithm runs as it is
+
+    counters: name -> int
+        closures, canonical_test_failures, condition_rejections,
+        cache_hits, cache_misses and the ones listed in COUNTERS
+    timers: method name -> [calls, seconds], 'run' is the whole execution
+    tracer: function tracer(algorithm, event, args, result) called after
+        every timed method (event is the method name) and at 'start' and 'end'
+    sample_interval: if given, the execution is sampled by a SamplingProfiler
+
+    Metrics of forked workers (ParallelCbO) stay in the workers
+    """
+    def __init__(self, tracer=None, sample_interval=None):
+        self.tracer = tracer
+        self.sample_interval = sample_interval
+        self.counters = {}
+        self.timers = {}
+        self.profiler = None
+
+    def reset(self):
+        """
+        Clears the counters, timers and samples
+        """
+        self.counters.clear()
+        self.timers.clear()
+        self.profiler = None
+
+    def count(self, name, value=1):
+        """
+        Increments a counter
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def timed(self, algorithm, name, method, rejection=None):
+        """
+        Wraps a method so that its calls are timed and traced
+        rejection: (counter, test) the counter is incremented when test(result)
+        """
+        timer = self.timers.setdefault(name, [0, 0.0])
+        counters = self.counters
+        tracer = self.tracer
+        clock = default_timer
+        counter, rejected = rejection if rejection is not None else (None, None)
+
+        def wrapper(*args):
+            start = clock()
+            result = method(*args)
+            timer[1] += clock() - start
+            timer[0] += 1
+            if counter is not None and rejected(result):
+                counters[counter] = counters.get(counter, 0) + 1
+            if tracer is not None:
+                tracer(algorithm, name, args, result)
+            return result
+        wrapper.metered = True
+        return wrapper
+
+    def instrument(self, algorithm):
+        """
+        Wraps the timed methods and the cache of an algorithm,
+        methods already wrapped are left untouched
+        """
+        for name in algorithm.TIMED:
+            method = getattr(algorithm, name, None)
+            if method is None or getattr(method, 'metered', False):
+                continue
+            setattr(algorithm, name, self.timed(algorithm, name, method, algorithm.REJECTIONS.get(name, None)))
+        cache = getattr(algorithm, 'cache', None)
+        if isinstance(cache, Cache) and not isinstance(cache, MeteredCache):
+            algorithm.cache = MeteredCache(cache, self.counters)
+
+    @contextlib.contextmanager
+    def measure(self, algorithm):
+        """
+        Context of an execution, times it, samples it if required
+        and reads the counters of the algorithm at the end
+        """
+        if self.tracer is not None:
+            self.tracer(algorithm, 'start', (), None)
+        timer = self.timers.setdefault('run', [0, 0.0])
+        start = default_timer()
+        try:
+            if self.sample_interval is None:
+                yield self
+            else:
+                self.profiler = SamplingProfiler(self.sample_interval)
+                with self.profiler:
+                    yield self
+        finally:
+            timer[1] += default_timer() - start
+            timer[0] += 1
+            for attribute, name in algorithm.COUNTERS.items():
+                value = getattr(algorithm, attribute, None)
+                if value is not None:
+                    self.counters[name] = value
+            if self.tracer is not None:
+                self.tracer(algorithm, 'end', (), self.summary())
+
+    def summary(self):
+        """
+        Counters and timers as a dict
+        timers are given as name -> (calls, seconds)
+        """
+        return {
+            'counters': dict(self.counters),
+            'timers': dict([(name, tuple(timer)) for name, timer in self.timers.items()])
+        }
+
+    def report(self, n=10):
+        """
+        Text report of the counters, the timers and the samples if any
+        """
+        lines = ['counters:']
+        for name, value in sorted(self.counters.items()):
+            lines.append('  {:28s} {:12d}'.format(name, value))
+        lines.append('timers:')
+        for name, (calls, seconds) in sorted(self.timers.items(), key=lambda s: -s[1][1]):
+            mean = 1e6 * seconds / calls if calls > 0 else 0.0
+            lines.append('  {:28s} {:12d} calls {:10.3f}s {:10.2f}us/call'.format(name, calls, seconds, mean))
+        if self.profiler is not None:
+            lines.append(self.profiler.report(n))
+        return '\n'.join(lines)
@@ -16,11 +16,19 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 # Kyori code.
+from fca.defs.patterns.bitsets import bits_from_indices, indices_from_bits
 
 class PreClosure(object):
     """
     Calculates Pre-closure as explained in "Conceptual Exploration"
     Chapter 3. The canonical basis
+
+    Implications are indexed by attribute as in LinClosure (Beeri and Bernstein),
+    the implications with an attribute in their antecedent, or in their consequence,
+    are kept as a bitmask over the implications. An implication is blocked while
+    an attribute of its antecedent is missing from the pattern, the rest are applied
+    at once. The base is not scanned again each time the pattern grows, only the
+    attributes missing from the pattern are
     """
     def __init__(self):
         """
@@ -30,6 +38,14 @@ class PreClosure(object):
         self.imp_base = []
         self.supports = []
         self.translate = lambda s: s
+        # attribute -> bitmask of the implications with the attribute in their antecedent
+        self.premises = {}
+        # size -> bitmask of the implications with an antecedent of that size
+        self.premise_sizes = {}
+        # attribute -> bitmask of the implications with the attribute in their consequence
+        self.conclusions = {}
+        # bitmask of all the implications
+        self.registered = 0
 
     def register_implication(self, ant, con, support):
         """
@@ -37,9 +53,16 @@ class PreClosure(object):
         ant => con
         """
         # print "\t\tRegistering {}=>{}".format(self.translate(ant), self.translate(con))
+        bit = 1 << len(self.imp_base)
         self.imp_base.append((ant, con))
         self.supports.append(support)
-    
+        for attribute in ant:
+            self.premises[attribute] = self.premises.get(attribute, 0) | bit
+        self.premise_sizes[len(ant)] = self.premise_sizes.get(len(ant), 0) | bit
+        for attribute in con:
+            self.conclusions[attribute] = self.conclusions.get(attribute, 0) | bit
+        self.registered |= bit
+
     def get_implication_base(self):
         """
         Returns the base of implications
@@ -51,11 +74,30 @@ class PreClosure(object):
     def preclose_pattern(self, pattern):
         """
         Calculates pre-closure of pattern
+        An implication applies if its antecedent is a proper subset of the pattern,
+        this is, a subset with less attributes than the pattern
+        The pattern is updated in place and returned
         """
-        old_len = -1
-        while old_len != len(pattern):
-            old_len = len(pattern)
-            for ant, con in self.imp_base:
-                if ant <= pattern and len(ant) != len(pattern):
-                    pattern.update(con)
-        return pattern
\ No newline at end of file
+        bits = bits_from_indices(pattern)
+        size = len(pattern)
+        applied = 0
+        while True:
+            blocked = 0
+            for attribute, implications in self.premises.items():
+                if not (bits >> attribute) & 1:
+                    blocked |= implications
+            ready = self.registered & ~(blocked | applied | self.premise_sizes.get(size, 0))
+            if not ready:
+                break
+            applied |= ready
+            new_bits = 0
+            for attribute, implications in self.conclusions.items():
+                if ready & implications and not (bits >> attribute) & 1:
+                    new_bits |= 1 << attribute
+            # THE SIZE OF THE PATTERN CHANGES, IMPLICATIONS WITH AN ANTECEDENT
+            # EQUAL TO THE PATTERN MAY APPLY IN THE NEXT ROUND
+            if new_bits:
+                bits |= new_bits
+                size += bin(new_bits).count('1')
+        pattern.update(indices_from_bits(bits))
+        return pattern
@@ -0,0 +1,406 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from __future__ import print_function
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+try:
+    import resource
+except ImportError:
+    resource = None
+from fca.defs import SetPattern
+from fca.defs.patterns import IntervalPattern
+from fca.defs.patterns.bitsets import BitSetPattern
+from fca.defs.patterns.hypergraphs import PartitionPattern
+from fca.io import read_representations
+from fca.io.input_models import FormalContextModel, BitSetFormalContextModel, PatternStructureModel
+from fca.io.transformers import List2IntervalsTransformer, List2PartitionsTransformer
+from fca.bench.contexts import random_context, random_table, load_adult, load_diag, \
+    load_forestfires, load_forestfires_table, write_context, write_table
+
+#****************************************
+# Algorithms x patterns
+#****************************************
+def formal_context(path):
+    """
+    Formal context with sets
+    """
+    return FormalContextModel(filepath=path)
+
+
+def bitset_context(path):
+    """
+    Formal context with bitsets
+    """
+    return BitSetFormalContextModel(filepath=path)
+
+
+def interval_context(path):
+    """
+    Numerical table for interval pattern structures
+    """
+    return FormalContextModel(filepath=path, transformer=List2IntervalsTransformer(float))
+
+
+def partition_context(path):
+    """
+    Numerical table for partition pattern structures, columns are objects
+    """
+    return PatternStructureModel(
+        filepath=path,
+        transformer=List2PartitionsTransformer(True),
+        transposed=True,
+        file_manager_params={'style': 'tab'}
+    )
+
+
+def build_cbo(path, pattern):
+    from fca.algorithms.cbo import CbO
+    reader = bitset_context if pattern is BitSetPattern else formal_context
+    return CbO(reader(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_pscbo(path, pattern):
+    from fca.algorithms.cbo import PSCbO
+    return PSCbO(interval_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_cbops(path, pattern):
+    from fca.algorithms.cbo.pattern_structures import CbOPS
+    from fca.defs.patterns.enumerators import IntervalObjectEnumerator
+    return CbOPS(
+        interval_context(path),
+        pattern=pattern,
+        enumerator=IntervalObjectEnumerator,
+        lazy=False,
+        silent=True
+    )
+
+
+def build_lexenum(path, pattern):
+    from fca.algorithms.lexenum_closures import LexEnumClosures
+    return LexEnumClosures(formal_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_lecenum(path, pattern):
+    from fca.algorithms.lecenum_closures import LecEnumClosures
+    return LecEnumClosures(formal_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_pslecenum(path, pattern):
+    from fca.algorithms.lecenum_closures import PSLecEnumClosures
+    return PSLecEnumClosures(partition_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_addintent(path, pattern):
+    from fca.algorithms.addIntent import AddIntent
+    if pattern is IntervalPattern:
+        ctx = read_representations(path, transformer=List2IntervalsTransformer(float))
+    else:
+        ctx = read_representations(path)
+    return AddIntent(ctx, pattern=pattern, lazy=False, silent=True)
+
+
+def build_canonical_base(path, pattern):
+    from fca.algorithms.canonical_base import CanonicalBase
+    return CanonicalBase(formal_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+def build_enhanced_dg(path, pattern):
+    from fca.algorithms.canonical_base import EnhancedDG
+    return EnhancedDG(formal_context(path), pattern=pattern, lazy=False, silent=True)
+
+
+# (algorithm, pattern, input, builder)
+# input is 'context' for formal contexts and 'table' for numerical tables
+MATRIX = [
+    ('CbO', SetPattern, 'context', build_cbo),
+    ('CbO', BitSetPattern, 'context', build_cbo),
+    ('LexEnumClosures', SetPattern, 'context', build_lexenum),
+    ('LecEnumClosures', SetPattern, 'context', build_lecenum),
+    ('AddIntent', SetPattern, 'context', build_addintent),
+    ('CanonicalBase', SetPattern, 'context', build_canonical_base),
+    ('EnhancedDG', SetPattern, 'context', build_enhanced_dg),
+    ('PSCbO', IntervalPattern, 'table', build_pscbo),
+    ('CbOPS', IntervalPattern, 'table', build_cbops),
+    ('AddIntent', IntervalPattern, 'table', build_addintent),
+    ('PSLecEnumClosures', PartitionPattern, 'table', build_pslecenum),
+]
+
+#****************************************
+# Suites of contexts
+#****************************************
+# name -> (input, function returning the rows)
+SUITES = {
+    'quick': [
+        ('random-100x16', 'context', lambda: random_context(100, 16, 0.3, seed=1)),
+        ('correlated-150x18', 'context', lambda: random_context(150, 18, 0.3, 0.7, seed=2)),
+        ('diag', 'context', lambda: load_diag(bins=3)),
+        ('forestfires-60', 'context', lambda: load_forestfires(n_objects=60, bins=2)),
+        ('table-12x4', 'table', lambda: random_table(12, 4, 4, seed=3)),
+    ],
+    'full': [
+        ('random-200x20', 'context', lambda: random_context(200, 20, 0.3, seed=1)),
+        ('correlated-500x25', 'context', lambda: random_context(500, 25, 0.3, 0.7, seed=2)),
+        ('diag', 'context', lambda: load_diag(bins=4)),
+        ('forestfires-200', 'context', lambda: load_forestfires(n_objects=200, bins=2)),
+        ('adult-60', 'context', lambda: load_adult(n_objects=60, bins=2)),
+        ('table-30x5', 'table', lambda: random_table(30, 5, 5, seed=3)),
+        ('forestfires-table-10', 'table', lambda: load_forestfires_table(n_objects=10)),
+    ]
+}
+
+#****************************************
+# Measurements
+#****************************************
+# Case measured by the forked worker
+_CASE = None
+
+
+def peak_rss():
+    """
+    Peak resident set size of the process in KB, None if unknown
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # BYTES IN MAC OS
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def measure(builder, path, pattern):
+    """
+    Runs an algorithm and collects its figures
+    returns dict
+    """
+    pattern.reset()
+    start = time.time()
+    algorithm = builder(path, pattern)
+    elapsed = time.time() - start
+
+    poset = getattr(algorithm, 'poset', None)
+    if poset is None:
+        poset = algorithm.lattice
+    concepts = len(poset.nodes())
+    calls = getattr(algorithm, 'calls', None)
+    preclos = getattr(algorithm, 'preclos', None)
+    # CLOSURES COMPUTED, ALGORITHMS WITHOUT A COUNTER COMPUTE ONE PER CONCEPT
+    closures = calls if calls is not None else concepts
+    return {
+        'status': 'ok',
+        'time': elapsed,
+        'peak_rss_kb': peak_rss(),
+        'calls': calls,
+        'concepts': concepts,
+        'implications': len(preclos.imp_base) if preclos is not None else None,
+        'closures_per_sec': closures / elapsed if elapsed > 0 else None
+    }
+
+
+def _measure_case():
+    """
+    Pool task, output of the algorithms is discarded
+    """
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return measure(*_CASE)
+    except Exception as err: # pylint: disable=broad-except
+        return {'status': 'error: {}: {}'.format(type(err).__name__, err)}
+
+
+def run_case(builder, path, pattern, timeout=None):
+    """
+    Runs a case in a forked process, so that peak RSS is measured
+    for the case alone and the state of the patterns is not shared
+    returns dict
+    """
+    global _CASE
+    _CASE = (builder, path, pattern)
+    sys.stdout.flush()
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply_async(_measure_case).get(timeout)
+    except multiprocessing.TimeoutError:
+        return {'status': 'timeout'}
+    finally:
+        pool.terminate()
+        pool.join()
+        _CASE = None
+
+
+def case_key(algorithm, pattern, context):
+    """
+    Identifies a case in results and baselines
+    """
+    return '{}/{}/{}'.format(algorithm, pattern.__name__, context)
+
+
+def run_suite(suite='quick', algorithms=None, repeat=1, timeout=None, verbose=True):
+    """
+    Runs the matrix of algorithms x patterns over the contexts of a suite
+    Contexts are written to a temporary directory
+    When repeat > 1, the fastest run is kept
+    returns dict case key -> figures
+    """
+    results = {}
+    tmp_path = tempfile.mkdtemp(prefix='fca-bench-')
+    try:
+        for context, kind, rows in SUITES[suite]:
+            path = os.path.join(tmp_path, '{}.txt'.format(context))
+            if kind == 'context':
+                write_context(rows(), path)
+            else:
+                write_table(rows(), path)
+            for algorithm, pattern, required, builder in MATRIX:
+                if required != kind or (algorithms is not None and algorithm not in algorithms):
+                    continue
+                key = case_key(algorithm, pattern, context)
+                best = None
+                for _ in range(repeat):
+                    figures = run_case(builder, path, pattern, timeout)
+                    if best is None or figures.get('time', 0) < best.get('time', 0):
+                        best = figures
+                    if figures['status'] != 'ok':
+                        break
+                results[key] = best
+                if verbose:
+                    print(format_figures(key, best))
+                    sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmp_path)
+    return results
+
+#****************************************
+# Baselines
+#****************************************
+def format_figures(key, figures):
+    """
+    One line summary of the figures of a case
+    """
+    if figures['status'] != 'ok':
+        return '{:55s} {}'.format(key, figures['status'])
+    return '{:55s} {:9.3f}s {:>9} KB {:>8} concepts {:>8} calls {:>10.1f} closures/s'.format(
+        key,
+        figures['time'],
+        figures['peak_rss_kb'],
+        figures['concepts'],
+        figures['calls'],
+        figures['closures_per_sec'] or 0
+    )
+
+
+def save_results(results, path, suite=None):
+    """
+    Writes results as a JSON baseline
+    """
+    with open(path, 'w') as fout:
+        json.dump({'suite': suite, 'results': results}, fout, indent=1, sort_keys=True)
+
+
+def load_results(path):
+    """
+    Reads a JSON baseline
+    returns dict case key -> figures
+    """
+    with open(path, 'r') as fin:
+        return json.load(fin)['results']
+
+
+def compare(results, baseline, tolerance=0.5, noise=0.1):
+    """
+    Compares results against a baseline
+    Outputs (status, concepts, implications and calls) should be equal,
+    times may vary within tolerance (relative) or noise (seconds)
+    Cases that raised an error are reported as ERROR, even if the baseline has the same error
+    returns list of (case key, verdict, detail), verdicts are
+    OK, FASTER, SLOWER, CHANGED, ERROR, NEW and MISSING
+    """
+    report = []
+    for key in sorted(set(results).union(baseline)):
+        if key not in baseline:
+            report.append((key, 'NEW', ''))
+            continue
+        if key not in results:
+            report.append((key, 'MISSING', ''))
+            continue
+        new, old = results[key], baseline[key]
+        if new['status'].startswith('error'):
+            report.append((key, 'ERROR', new['status']))
+            continue
+        changed = [
+            '{} {} -> {}'.format(field, old.get(field), new.get(field))
+            for field in ('status', 'concepts', 'implications', 'calls')
+            if old.get(field) != new.get(field)
+        ]
+        if bool(changed):
+            report.append((key, 'CHANGED', ', '.join(changed)))
+            continue
+        if new['status'] != 'ok':
+            report.append((key, 'OK', new['status']))
+            continue
+        ratio = new['time'] / old['time'] if old['time'] > 0 else 1.0
+        detail = 'time x{:.2f} ({:.3f}s -> {:.3f}s)'.format(ratio, old['time'], new['time'])
+        if old.get('peak_rss_kb') and new.get('peak_rss_kb'):
+            detail += ', peak RSS x{:.2f}'.format(float(new['peak_rss_kb']) / old['peak_rss_kb'])
+        if abs(new['time'] - old['time']) <= noise:
+            report.append((key, 'OK', detail))
+        elif ratio > 1 + tolerance:
+            report.append((key, 'SLOWER', detail))
+        elif ratio < 1 - tolerance:
+            report.append((key, 'FASTER', detail))
+        else:
+            report.append((key, 'OK', detail))
+    return report
+
+
+def main(argv=None):
+    """
+    Command line interface
+    python -m fca.bench --suite quick --repeat 3 --baseline data/bench/quick.json
+    Exits with status 1 if a case is slower, raised an error or its output changed
+    """
+    parser = argparse.ArgumentParser(description='FCA benchmark suite')
+    parser.add_argument('-s', '--suite', choices=sorted(SUITES), default='quick', help='Contexts to run')
+    parser.add_argument('-a', '--algorithms', nargs='*', default=None, help='Algorithms to run, all by default')
+    parser.add_argument('-r', '--repeat', type=int, default=1, help='Runs per case, the fastest is kept')
+    parser.add_argument('-t', '--timeout', type=float, default=None, help='Seconds before a case is stopped')
+    parser.add_argument('-o', '--output', default=None, help='Save the results to a JSON file')
+    parser.add_argument('-b', '--baseline', default=None, help='JSON baseline to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Relative tolerance for times')
+    parser.add_argument('--noise', type=float, default=0.1, help='Time differences ignored, in seconds')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.suite, args.algorithms, args.repeat, args.timeout)
+    if args.output is not None:
+        save_results(results, args.output, args.suite)
+
+    if args.baseline is None:
+        return 0
+    regressions = 0
+    print('')
+    for key, verdict, detail in compare(results, load_results(args.baseline), args.tolerance, args.noise):
+        print('{:8s} {:55s} {}'.format(verdict, key, detail))
+        if verdict in ('SLOWER', 'CHANGED', 'ERROR'):
+            regressions += 1
+    return 1 if regressions > 0 else 0
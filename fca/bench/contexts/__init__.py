@@ -0,0 +1,201 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import random
+
+# DATA SHIPPED WITH THE REPOSITORY
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'data')
+
+#****************************************
+# Synthetic contexts
+#****************************************
+def random_context(n_objects, n_attributes, density=0.3, correlation=0.0, n_prototypes=4, seed=0):
+    """
+    Synthetic formal context
+    Each object follows one of n_prototypes random rows, an attribute is copied
+    from the prototype with probability correlation and otherwise it is held
+    with probability density. correlation=0 gives independent attributes
+    returns a list with the sorted attribute indices of each object
+    """
+    rnd = random.Random(seed)
+    prototypes = [
+        [rnd.random() < density for _ in range(n_attributes)]
+        for _ in range(max(1, n_prototypes))
+    ]
+    rows = []
+    for _ in range(n_objects):
+        prototype = prototypes[int(rnd.random() * len(prototypes))]
+        row = []
+        for j in range(n_attributes):
+            if rnd.random() < correlation:
+                held = prototype[j]
+            else:
+                held = rnd.random() < density
+            if held:
+                row.append(j)
+        rows.append(row)
+    return rows
+
+
+def random_table(n_objects, n_columns, n_values=5, correlation=0.0, n_prototypes=4, seed=0):
+    """
+    Synthetic numerical table with integer values in [0, n_values)
+    Values are copied from a prototype row with probability correlation
+    returns a list with the values of each object
+    """
+    rnd = random.Random(seed)
+    prototypes = [
+        [int(rnd.random() * n_values) for _ in range(n_columns)]
+        for _ in range(max(1, n_prototypes))
+    ]
+    rows = []
+    for _ in range(n_objects):
+        prototype = prototypes[int(rnd.random() * len(prototypes))]
+        rows.append([
+            prototype[j] if rnd.random() < correlation else int(rnd.random() * n_values)
+            for j in range(n_columns)
+        ])
+    return rows
+
+#****************************************
+# Scaling of real data
+#****************************************
+def read_table(path, delimiter=',', n_objects=None):
+    """
+    Reads a table of values, one object per line, empty lines are skipped
+    returns a list with the stripped values of each object
+    """
+    rows = []
+    with open(path, 'r') as fin:
+        for line in fin:
+            line = line.strip()
+            if line == '':
+                continue
+            rows.append([value.strip() for value in line.split(delimiter)])
+            if n_objects is not None and len(rows) == n_objects:
+                break
+    return rows
+
+
+def to_number(value):
+    """
+    Float value of a table entry, decimal commas are accepted
+    returns None if the entry is not a number
+    """
+    try:
+        return float(value.replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def numerical_columns(table):
+    """
+    Indices of the columns whose values are all numbers
+    """
+    if not bool(table):
+        return []
+    return [
+        j for j in range(len(table[0]))
+        if all(to_number(row[j]) is not None for row in table)
+    ]
+
+
+def scale(table, bins=4):
+    """
+    Converts a table into a formal context
+    Numerical columns are split into bins of (roughly) the same number of objects
+    and each bin is an attribute "column<=upper bound", any other column is
+    nominally scaled with an attribute "column=value" per value
+    returns a list with the attribute labels of each object
+    """
+    numerical = set(numerical_columns(table))
+    bounds = {}
+    for j in numerical:
+        values = sorted(to_number(row[j]) for row in table)
+        cuts = sorted(set(values[(len(values) * k) // bins] for k in range(1, bins)))
+        bounds[j] = cuts + [values[-1]]
+
+    rows = []
+    for row in table:
+        labels = []
+        for j, value in enumerate(row):
+            if j in numerical:
+                number = to_number(value)
+                upper = [b for b in bounds[j] if number <= b][0]
+                labels.append('{}<={}'.format(j, upper))
+            else:
+                labels.append('{}={}'.format(j, value.replace(' ', '_')))
+        rows.append(labels)
+    return rows
+
+
+def load_adult(path=None, n_objects=None, bins=4):
+    """
+    UCI Adult census data, data/adult.data.csv
+    """
+    path = path if path is not None else os.path.join(DATA_PATH, 'adult.data.csv')
+    return scale(read_table(path, ',', n_objects), bins)
+
+
+def load_forestfires(path=None, n_objects=None, bins=4):
+    """
+    UCI Forest Fires data, data/forestfires.csv
+    """
+    path = path if path is not None else os.path.join(DATA_PATH, 'forestfires.csv')
+    return scale(read_table(path, ',', n_objects), bins)
+
+
+def load_forestfires_table(path=None, n_objects=None):
+    """
+    Numerical columns of the Forest Fires data, for interval pattern structures
+    """
+    path = path if path is not None else os.path.join(DATA_PATH, 'forestfires.csv')
+    table = read_table(path, ',', n_objects)
+    columns = numerical_columns(table)
+    return [[to_number(row[j]) for j in columns] for row in table]
+
+
+def load_diag(path=None, n_objects=None, bins=4):
+    """
+    UCI Acute Inflammations data, data/diag.txt, tab separated
+    with the temperature written with a decimal comma
+    """
+    path = path if path is not None else os.path.join(DATA_PATH, 'diag.txt')
+    return scale(read_table(path, '\t', n_objects), bins)
+
+#****************************************
+# Files read by fca.io
+#****************************************
+def write_context(rows, path):
+    """
+    Writes a formal context with one object per line
+    and space separated attributes (oa style)
+    """
+    with open(path, 'w') as fout:
+        for row in rows:
+            fout.write(' '.join([str(i) for i in row]) + '\n')
+    return path
+
+
+def write_table(rows, path):
+    """
+    Writes a numerical table with one object per line
+    and space separated values (tab style)
+    """
+    return write_context(rows, path)
@@ -19,8 +19,69 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import hashlib
 import copy
 from enum import Enum
-import csv
+import os
 import uuid
+import json
+import struct
+from numbers import Integral
+from functools import reduce
+from itertools import chain
+from collections import OrderedDict
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+MASK64 = (1 << 64) - 1
+
+def mix64(value):
+    """
+    Spreads a Python hash over 64 bits (splitmix64 finalizer)
+    Used to obtain compact structural hashes for descriptions
+    """
+    value &= MASK64
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & MASK64
+    return value ^ (value >> 31)
+
+# MIXED WITH EACH WORD, mix64(0) == 0 WOULD LET ZERO WORDS VANISH
+WORD_SEED = 0x9e3779b97f4a7c15
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+def word64(value):
+    """
+    64-bit word standing for an element of a description
+    Equal numbers get the same word (1 == 1.0), integers in the signed
+    64-bit range get distinct words, other values their builtin hash
+    """
+    if isinstance(value, float):
+        if not value.is_integer():
+            return struct.unpack('<Q', struct.pack('<d', value))[0]
+        value = int(value)
+    if isinstance(value, Integral):
+        if INT64_MIN <= value <= INT64_MAX:
+            return value & MASK64
+        word = WORD_SEED
+        while value not in (0, -1):
+            word = mix64(word ^ (value & MASK64))
+            value >>= 64
+        return word ^ (value & 1)
+    return hash(value) & MASK64
+
+def hash_words(words):
+    """
+    64-bit hash of a sequence of 64-bit words
+    Each word is mixed with the state left by the previous ones, unlike
+    the builtin hash of sets and tuples no combination of words cancels out
+    Descriptions whose elements have no order should sort their words first
+    """
+    value = WORD_SEED
+    length = 0
+    for word in words:
+        value = mix64(value ^ word ^ WORD_SEED)
+        length += 1
+    return mix64(value ^ length)
 
 class DiGraph(object):
     """
@@ -34,7 +95,8 @@ class DiGraph(object):
         """
         Reimplementation of Networkx DiGraph's
         """
-        self.__nodes__ = []
+        # NODE IDS IN INSERTION ORDER, REMOVING ONE IS O(1)
+        self.__nodes__ = OrderedDict()
         self.node = {}
         #self.__edges__ = []
         self.__edges_data__ = {}
@@ -57,8 +119,7 @@ class DiGraph(object):
         graph = DiGraph()
         graph.add_node(1, {'name': 'Victor'})
         """
-        if node not in self.__nodes__:
-            self.__nodes__.append(node)
+        self.__nodes__.setdefault(node, None)
         if isinstance(params, dict):
             self.node[node] = params
 
@@ -76,7 +137,7 @@ class DiGraph(object):
         if data:
             return self.node.items()
         else:
-            return self.__nodes__
+            return list(self.__nodes__)
 
     def add_edge(self, source, target, params=False):
         """
@@ -108,6 +169,19 @@ class DiGraph(object):
         self.__successors__[source].remove(target)
         self.__predecessors__[target].remove(source)
 
+    def remove_node(self, node):
+        """
+        Removes a node and all the edges from and to it
+        """
+        for target in list(self.successors(node)):
+            self.remove_edge(node, target)
+        for source in list(self.predecessors(node)):
+            self.remove_edge(source, node)
+        self.__successors__.pop(node, None)
+        self.__predecessors__.pop(node, None)
+        self.__nodes__.pop(node, None)
+        self.node.pop(node, None)
+
     def edges(self, data=False):
         """
         Access the list of edges.
@@ -260,9 +334,100 @@ class POSET(DiGraph):
             concepts[concept[0]] = concept_data
         return concepts
 
+    def dump_data(self):
+        """
+        Returns the concepts and edges of the poset as picklable data
+        """
+        nodes = list(self.nodes())
+        return {
+            'nodes': nodes,
+            'concepts': [(cid, dict(concept)) for cid, concept in self.concepts()],
+            'edges': [(source, target) for source in nodes for target in self.successors(source)],
+            'infimum': self.infimum,
+            'supremum': self.supremum
+        }
+
+    def load_data(self, data):
+        """
+        Adds the concepts and edges obtained with dump_data
+        """
+        concepts = dict(data['concepts'])
+        for cid in data['nodes']:
+            self.new_concept(cid, concepts[cid])
+        for source, target in data['edges']:
+            self.add_edge(source, target)
+        self.infimum = data['infimum']
+        self.supremum = data['supremum']
+
+    def save(self, path, **state):
+        """
+        Pickles the poset to path
+        state: any other data required to resume the computation of the poset
+        The previous file is only replaced once the new one is completely written
+        The transformer is not saved
+        """
+        data = self.dump_data()
+        data['state'] = state
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'wb') as fout:
+            pickle.dump(data, fout, pickle.HIGHEST_PROTOCOL)
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+
+    @staticmethod
+    def read(path):
+        """
+        Reads the data pickled with save
+        """
+        with open(path, 'rb') as fin:
+            return pickle.load(fin)
+
+    @classmethod
+    def load(cls, path, transformer=None, **kwargs):
+        """
+        Loads a poset saved with save
+        kwargs: parameters of the poset constructor
+        returns (poset, state)
+        """
+        data = cls.read(path)
+        poset = cls(transformer=transformer, **kwargs)
+        poset.load_data(data)
+        return poset, data['state']
+
 class OnDiskPOSET(POSET):
+    """
+    POSET streaming its concepts to a file instead of keeping them
+    Only the number of concepts and the open writers are kept in memory,
+    concepts(), nodes() and the neighbors of a concept are empty
+
+    output_path, output_fname: output file, by default a random name in ./
+    fmt: 'tsv' (default) or 'binary', see fca.io.output_models
+        tsv rows are ID, SUPPORT, EXTENT, INTENT with objects and attributes
+        translated to their labels (unless indices=True)
+        binary records hold the same values as indices, length-prefixed and
+        varint-delta encoded
+    compression: None, 'gzip' or 'zstd' (requires the zstandard package)
+    block_size: bytes encoded in memory before they are written
+    write_edges: edges are streamed to output_fname.edges, otherwise they are dropped
+    write_support, write_extent, write_intent, write_headers: fields of the file
+    append: keep the concepts already written, e.g. when resuming from a checkpoint
+    first_id, max_concepts: concepts are numbered from first_id, at most max_concepts
+    store: builds a concept store while writing, opened with fca.io.concept_store.open_store,
+        requires binary uncompressed records with supports
+    covers: close() computes the covering relation of the concepts in external memory,
+        written to output_fname.covers, see fca.algorithms.covers.
+        Then upper_neighbors and lower_neighbors are read from it.
+        Requires binary records with intents and the formal context (context),
+        sort_size items are sorted in memory before they are spilled to disk
+    """
     def __init__(self, transformer=None, **kwargs):
         super(OnDiskPOSET, self).__init__(transformer)
+        # IMPORTED HERE, fca.io DEPENDS ON THIS MODULE
+        from fca.io.output_models import open_writer, COMPRESSIONS, WRITERS
+        self.fmt = kwargs.get('fmt', 'tsv')
+        self.compression = kwargs.get('compression', None)
+        self.block_size = kwargs.get('block_size', 1 << 20)
         self.output_path = kwargs.get('output_path', None)
 
         if self.output_path is None:
@@ -272,76 +437,428 @@ class OnDiskPOSET(POSET):
 
         self.output_fname = kwargs.get('output_fname', None)
         if self.output_fname is None:
-            self.output_fname = "{}.csv".format(str(uuid.uuid4()))
+            self.output_fname = "{}{}{}".format(
+                str(uuid.uuid4()),
+                WRITERS[self.fmt].EXTENSION,
+                COMPRESSIONS[self.compression]
+            )
         self.path = self.output_path+self.output_fname
-        self.fout = open(self.path, 'w')
+        self.append = kwargs.get('append', False)
+        self.n_concepts = 0
+        self.first_id = kwargs.get('first_id', 0)
+        self.max_concepts = kwargs.get('max_concepts', None)
 
-        self.writer = csv.writer(
-            self.fout,
-            delimiter='\t',
-            quotechar='|',
-            quoting=csv.QUOTE_MINIMAL
-        )
         self.write_support = kwargs.get('write_support', True)
+        # Counts the objects in an extent, extents may not be sets
+        self.support = kwargs.get('support', len)
         self.write_extent = kwargs.get('write_extent', True)
         self.write_intent = kwargs.get('write_intent', True)
 
-        # WRITE HEADERS
-        if kwargs.get('write_headers', True):
-            row = ['ID']
-            if self.write_support:
-                row.append("SUPPORT")
-            if self.write_extent:
-                row.append("EXTENT")
-            if self.write_intent:
-                row.append("INTENT")
-            self.writer.writerow(row)
-
-        if kwargs.get('indices', False) or self._transformer is None:
-            
+        header = ['ID']
+        kinds = ['int']
+        if self.write_support:
+            header.append("SUPPORT")
+            kinds.append('int')
+        if self.write_extent:
+            header.append("EXTENT")
+            kinds.append('set')
+        if self.write_intent:
+            header.append("INTENT")
+            kinds.append('set')
+        writer_kwargs = {
+            'append': self.append,
+            'compression': self.compression,
+            'block_size': self.block_size
+        }
+        self.writer = open_writer(
+            self.path,
+            self.fmt,
+            header=header if kwargs.get('write_headers', True) else None,
+            kinds=kinds,
+            **writer_kwargs
+        )
+        self.edge_writer = None
+        if kwargs.get('write_edges', False):
+            self.edge_writer = open_writer(
+                self.path + '.edges',
+                self.fmt,
+                kinds=['int', 'int'],
+                **writer_kwargs
+            )
+
+        self.store = None
+        if kwargs.get('store', False):
+            if self.fmt != 'binary' or self.compression is not None or not self.write_support:
+                raise ValueError('A concept store requires binary uncompressed records with supports')
+            from fca.io.concept_store import ConceptStoreBuilder
+            self.store = ConceptStoreBuilder(
+                self.path,
+                append=self.append,
+                labels=self._transformer.m_map() if self._transformer is not None else None
+            )
+
+        self.covers = kwargs.get('covers', False)
+        self.context = kwargs.get('context', None)
+        self.sort_size = kwargs.get('sort_size', 1000000)
+        self.covers_path = self.path + '.covers'
+        self.covers_reader = None
+        if self.covers and (self.fmt != 'binary' or not self.write_intent or self.context is None):
+            raise ValueError('Covers require binary records with intents and the context')
+
+        if kwargs.get('indices', False) or self._transformer is None or not self.writer.LABELS:
             self.object_translator = lambda x: x
             self.attribute_translator = lambda x: x
         else:
             self.object_translator = self._transformer.real_objects
             self.attribute_translator = self._transformer.real_attributes
-        
+
 
     def new_formal_concept(self, extent, intent, concept_id=None):
         """
-        Adds a new concept to the lattice
-        Wraps add_node
+        Writes a new concept
         """
         if concept_id is None:
-            concept_id = len(self.node)
+            if self.n_concepts == self.max_concepts:
+                raise OverflowError('{} is full, {} concepts'.format(self.path, self.n_concepts))
+            concept_id = self.first_id + self.n_concepts
+        self.n_concepts += 1
         row = [concept_id]
         if self.write_support:
-            row.append(len(extent))
+            row.append(self.support(extent))
         if self.write_extent:
             row.append(self.object_translator(extent))
         if self.write_intent:
             row.append(self.attribute_translator(intent))
-
-        self.writer.writerow(row)
-        # self.fout.flush()
-        self.add_node(concept_id, Concept({
-            self.EXTENT_MARK: len(extent),
-            self.INTENT_MARK: None
-        }))
+        if self.store is not None:
+            self.store.add(concept_id, self.writer.tell(), row[1], intent if self.write_intent else None)
+        self.writer.write(row)
         return concept_id
+
+    def add_edge(self, source, target, params=False):
+        """
+        Writes an edge if edges are written
+        """
+        if self.edge_writer is not None:
+            self.edge_writer.write([source, target])
+
+    def flush(self):
+        """
+        Writes the buffered concepts and edges
+        """
+        self.writer.flush()
+        if self.edge_writer is not None:
+            self.edge_writer.flush()
+
+    def merge_shard(self, path, root=None):
+        """
+        Appends the concepts written by another OnDiskPOSET with the same
+        parameters and without headers, renumbering them after the concepts
+        already written. The edges of the shard, if any, are renumbered as well,
+        root is the id of the concept its supremum stands for.
+        The shard is deleted afterwards
+        return dict mapping the shard ids to the new ids
+        """
+        from fca.io.output_models import read_records
+        mapping = {}
+        for row in read_records(path, self.fmt, self.compression):
+            concept_id = self.n_concepts
+            self.n_concepts += 1
+            mapping[int(row[0])] = concept_id
+            row[0] = concept_id
+            if self.store is not None:
+                self.store.add(concept_id, self.writer.tell(), row[1], row[-1] if self.write_intent else None)
+            self.writer.write(row)
+        os.remove(path)
+        edges_path = path + '.edges'
+        if os.path.exists(edges_path):
+            mapping[self.supremum] = root
+            for source, target in read_records(edges_path, self.fmt, self.compression):
+                self.add_edge(mapping[int(source)], mapping[int(target)])
+            del mapping[self.supremum]
+            os.remove(edges_path)
+        return mapping
+
+    def cover_paths(self):
+        """
+        Record files whose concepts are covered
+        """
+        return [self.path]
+
+    def open_covers(self):
+        """
+        Covering relation written by close() when covers=True
+        """
+        if self.covers_reader is None:
+            if not self.covers:
+                raise ValueError(
+                    'Neighbors of concepts in {} are not stored, '
+                    'create the OnDiskPOSET with covers=True'.format(self.path)
+                )
+            if not os.path.exists(self.covers_path + '.up'):
+                raise RuntimeError(
+                    'The covering relation of {} is written by close(), '
+                    'neighbors are available once the poset is closed'.format(self.path)
+                )
+            from fca.algorithms.covers import Covers
+            self.covers_reader = Covers(self.covers_path)
+        return self.covers_reader
+
     def upper_neighbors(self, concept_id):
-        raise NotImplementedError
+        return self.open_covers().upper_neighbors(concept_id)
     def lower_neighbors(self, concept_id):
-        raise NotImplementedError
+        return self.open_covers().lower_neighbors(concept_id)
     def as_dict(self, indices=False):
-        raise NotImplementedError
+        """
+        Concepts are written to disk instead of being kept in memory,
+        they are read from the output file with fca.io.output_models.read_records
+        """
+        raise RuntimeError(
+            'Concepts of an OnDiskPOSET are stored in {}, '
+            'read them with read_records(path, fmt={!r}, compression={!r})'.format(
+                self.path, self.fmt, self.compression
+            )
+        )
+
+    def dump_data(self):
+        """
+        Records the output file, the number of concepts and the size written so far
+        """
+        data = super(OnDiskPOSET, self).dump_data()
+        data['output_path'] = self.output_path
+        data['output_fname'] = self.output_fname
+        data['n_concepts'] = self.n_concepts
+        data['offset'] = self.writer.sync()
+        if self.edge_writer is not None:
+            data['edges_offset'] = self.edge_writer.sync()
+        if self.store is not None:
+            self.store.flush()
+            data['store_rows'] = self.store.rows
+        return data
+
+    def load_data(self, data):
+        """
+        Concepts and edges written after dump_data are removed from the output files
+        """
+        self.writer.truncate(data['offset'])
+        if self.edge_writer is not None:
+            self.edge_writer.truncate(data.get('edges_offset', 0))
+        if self.store is not None:
+            from fca.io.output_models import read_records
+            self.store.truncate(data['store_rows'], (
+                record[-1] if self.write_intent else None
+                for record in read_records(self.path, self.fmt)
+            ))
+        self.n_concepts = data['n_concepts']
+        super(OnDiskPOSET, self).load_data(data)
+
+    @classmethod
+    def load(cls, path, transformer=None, **kwargs):
+        """
+        Reopens the output file of the poset saved to path
+        """
+        data = cls.read(path)
+        kwargs.update({
+            'output_path': data['output_path'],
+            'output_fname': data['output_fname'],
+            'append': True
+        })
+        poset = cls(transformer=transformer, **kwargs)
+        poset.load_data(data)
+        return poset, data['state']
+
     def close(self):
         """
-        Close output file and returns the path
+        Close output files, builds the store and the covers if any and returns the path
         return str output_path
         """
-        self.fout.close()
+        self.writer.close()
+        if self.edge_writer is not None:
+            self.edge_writer.close()
+        if self.store is not None:
+            self.store.close()
+        if self.covers:
+            from fca.algorithms.covers import write_covers
+            write_covers(self.context, self.cover_paths(), self.covers_path, self.compression, self.sort_size)
         return self.path
-    
+
+
+
+class ShardedOnDiskPOSET(OnDiskPOSET):
+    """
+    OnDiskPOSET split in shards written independently, e.g. by the workers of a pool
+    The output is the directory output_path/output_fname with a file per shard
+    and a manifest listing them, written by close().
+    Shard k numbers its concepts in [k * shard_range, (k + 1) * shard_range),
+    so concepts of different shards never collide and are never renumbered.
+    The poset itself writes shard 0, other shards are created by new_shard
+    and registered in the manifest with add_shard once closed.
+    Concepts are read back lazily, shard after shard, with read_concepts
+    """
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, transformer=None, **kwargs):
+        # IMPORTED HERE, fca.io DEPENDS ON THIS MODULE
+        from fca.io.output_models import COMPRESSIONS, WRITERS
+        kwargs = dict(kwargs)
+        self.shard_range = kwargs.pop('shard_range', 1 << 32)
+        output_path = kwargs.get('output_path', None)
+        if output_path is None:
+            output_path = "./"
+        elif not output_path.endswith('/'):
+            output_path += "/"
+        output_fname = kwargs.get('output_fname', None)
+        if output_fname is None:
+            output_fname = str(uuid.uuid4())
+        self.sharded_path = output_path
+        self.sharded_fname = output_fname
+        self.directory = output_path + output_fname + '/'
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.extension = WRITERS[kwargs.get('fmt', 'tsv')].EXTENSION + \
+            COMPRESSIONS[kwargs.get('compression', None)]
+        # SHARD INDEX -> MANIFEST ENTRY, FOR SHARDS ALREADY CLOSED
+        self.shards = {}
+
+        self.shard_kwargs = dict(kwargs)
+        self.shard_kwargs.pop('append', None)
+        self.shard_kwargs['output_path'] = self.directory
+        # SHARDS ARE COVERED TOGETHER WHEN THE POSET IS CLOSED
+        self.shard_kwargs['covers'] = False
+        kwargs.update(self.shard_parameters(0))
+        super(ShardedOnDiskPOSET, self).__init__(transformer, **kwargs)
+        self.covers_path = self.directory + 'covers'
+
+    def shard_parameters(self, index):
+        """
+        File name and ids of shard index
+        """
+        return {
+            'output_path': self.directory,
+            'output_fname': 'shard-{:05d}{}'.format(index, self.extension),
+            'first_id': index * self.shard_range,
+            'max_concepts': self.shard_range
+        }
+
+    def new_shard(self, index, supremum=None):
+        """
+        Opens shard index, a new OnDiskPOSET in the directory of the poset
+        supremum: id of the concept, in another shard, the supremum of the shard stands for,
+        edges starting from the shard supremum are written with this id
+        """
+        kwargs = dict(self.shard_kwargs)
+        kwargs.update(self.shard_parameters(index))
+        shard = OnDiskPOSET(transformer=self._transformer, **kwargs)
+        shard.shard_index = index
+        if supremum is not None:
+            shard.supremum = supremum
+        return shard
+
+    @staticmethod
+    def close_shard(shard):
+        """
+        Closes a shard created with new_shard
+        returns its manifest entry, to be registered with add_shard
+        """
+        OnDiskPOSET.close(shard)
+        return {
+            'index': shard.shard_index,
+            'file': shard.output_fname,
+            'edges': shard.output_fname + '.edges' if shard.edge_writer is not None else None,
+            'first_id': shard.first_id,
+            'n_concepts': shard.n_concepts
+        }
+
+    def cover_paths(self):
+        """
+        Files of shard 0 and of the shards registered
+        """
+        return [self.path] + [
+            self.directory + self.shards[index]['file']
+            for index in sorted(self.shards) if index != 0
+        ]
+
+    def add_shard(self, entry):
+        """
+        Registers a closed shard in the manifest
+        """
+        self.shards[entry['index']] = entry
+
+    def manifest(self):
+        """
+        Description of the shards and of their format
+        """
+        return {
+            'fmt': self.fmt,
+            'compression': self.compression,
+            'headers': self.shard_kwargs.get('write_headers', True),
+            'shard_range': self.shard_range,
+            'covers': 'covers' if self.covers else None,
+            'shards': [self.shards[index] for index in sorted(self.shards)]
+        }
+
+    def write_manifest(self):
+        """
+        Writes the manifest, replacing the previous one once completely written
+        """
+        path = self.directory + self.MANIFEST
+        with open(path + '.tmp', 'w') as fout:
+            json.dump(self.manifest(), fout, indent=1)
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(path + '.tmp', path)
+
+    @classmethod
+    def read_manifest(cls, path):
+        """
+        Reads the manifest of the sharded poset in directory path
+        """
+        with open(os.path.join(path, cls.MANIFEST), 'r') as fin:
+            return json.load(fin)
+
+    @classmethod
+    def read_concepts(cls, path, edges=False):
+        """
+        Lazily iterates the concepts (or edges) of the sharded poset in directory path,
+        shards are opened one at a time in the order of their ids
+        """
+        from fca.io.output_models import read_records
+        manifest = cls.read_manifest(path)
+        key = 'edges' if edges else 'file'
+        return chain.from_iterable(
+            read_records(
+                os.path.join(path, shard[key]),
+                manifest['fmt'],
+                manifest['compression'],
+                header=manifest['headers'] and not edges
+            )
+            for shard in sorted(manifest['shards'], key=lambda s: s['first_id'])
+            if shard[key] is not None
+        )
+
+    def dump_data(self):
+        """
+        Also records the shards already closed, the output is the directory
+        """
+        data = super(ShardedOnDiskPOSET, self).dump_data()
+        data['output_path'] = self.sharded_path
+        data['output_fname'] = self.sharded_fname
+        data['shards'] = dict(self.shards)
+        return data
+
+    def load_data(self, data):
+        super(ShardedOnDiskPOSET, self).load_data(data)
+        self.shards = dict(data['shards'])
+
+    def close(self):
+        """
+        Closes shard 0, covers all the shards if required and writes the manifest
+        return str directory of the shards
+        """
+        self.shard_index = 0
+        self.add_shard(self.close_shard(self))
+        self.write_manifest()
+        return self.directory
+
 
 
 class ConceptLattice(POSET):
@@ -352,44 +869,213 @@ class ConceptLattice(POSET):
     to a generic direcgted graph.
     """
 
+    def __init__(self, transformer=None):
+        super(ConceptLattice, self).__init__(transformer)
+        # CONCEPTS MAY BE REMOVED, IDS ARE NOT TAKEN FROM THE NUMBER OF NODES
+        self.next_id = 0
+        # A CONCEPT IS VISITED IF ITS STAMP IS THE CURRENT PARCOUR
+        self.parcour = 0
+        self.visits = {}
+        # INTENT INDICES, SEE index_intents
+        # attribute -> set of concept ids
+        # intent size -> {intent: concept id}
+        self.pattern = None
+        self.attribute_index = {}
+        self.size_index = {}
+        self.intent_size = {}
+
     def new_concept(self, concept_id, concept_data):
         """
         Adds a new concept to the lattice
         Wraps add_node
         """
         super(ConceptLattice, self).new_concept(concept_id, concept_data)
-        self.concept[concept_id]['not_visited'] = True
+        self.next_id = max(self.next_id, concept_id + 1)
 
     def new_formal_concept(self, extent, intent, concept_id=None):
         """
         Adds a new concept to the lattice
         Wraps add_node
         """
+        if concept_id is None:
+            concept_id = self.next_id
         cid = super(ConceptLattice, self).new_formal_concept(
             extent, intent, concept_id)
-        self.concept[cid]['not_visited'] = True
+        self.next_id = max(self.next_id, cid + 1)
+        if self.pattern is not None:
+            self.index_concept(cid)
         return cid
 
+    def remove_concept(self, concept_id):
+        """
+        Removes a concept and its edges from the lattice
+        Wraps remove_node
+        """
+        if self.pattern is not None:
+            self.unindex_concept(concept_id)
+        self.visits.pop(concept_id, None)
+        self.remove_node(concept_id)
+
+    @classmethod
+    def from_poset(cls, poset, ctx=None, transformer=None):
+        """
+        Concept lattice of the concepts of a poset, e.g. the generation tree
+        built by CbO or LexEnumClosures. Concepts keep their ids and edges are
+        the covering relation instead of the edges of the poset, computed from
+        set or bitset intents with fca.algorithms.covers:
+        lindig when the formal context ctx is given, ipred otherwise
+        """
+        # IMPORTED HERE, fca.algorithms DEPENDS ON THIS MODULE
+        from fca.algorithms.covers import covering_relation
+        lattice = cls(transformer=transformer if transformer is not None else poset._transformer)
+        for concept_id, concept in poset.concepts():
+            lattice.new_concept(concept_id, dict(concept))
+        for lower, upper in covering_relation(poset, ctx):
+            lattice.add_edge(lower, upper)
+        # THE SUPREMUM HAS NO UPPER NEIGHBORS, THE INFIMUM NO LOWER NEIGHBORS,
+        # BELOW A MINIMUM SUPPORT THERE MAY BE SEVERAL MINIMAL CONCEPTS INSTEAD
+        maximal = [cid for cid in lattice.nodes() if not bool(lattice.upper_neighbors(cid))]
+        minimal = [cid for cid in lattice.nodes() if not bool(lattice.lower_neighbors(cid))]
+        if len(maximal) == 1:
+            lattice.supremum = maximal[0]
+        if len(minimal) == 1:
+            lattice.infimum = minimal[0]
+        return lattice
+
+    def index_intents(self, pattern):
+        """
+        Indexes the intents of the concepts in the lattice and those added later on
+        pattern: Intent class whose descriptions are sets of elements
+        (SetPattern, BitSetPattern), this is,
+        desc1 <= desc2 iff the elements of desc1 are in desc2
+        The infimum is not indexed, its intent is the top of the pattern
+        and changes while the lattice is built
+        """
+        self.pattern = pattern
+        self.attribute_index = {}
+        self.size_index = {}
+        self.intent_size = {}
+        for concept_id in self.nodes():
+            self.index_concept(concept_id)
+
+    def index_concept(self, concept_id):
+        """
+        Registers the intent of a concept in the attribute and size indices
+        """
+        if concept_id == self.infimum:
+            return
+        intent = self.concept[concept_id].intent
+        size = 0
+        for attribute in self.pattern.get_iterator(intent):
+            self.attribute_index.setdefault(attribute, set([])).add(concept_id)
+            size += 1
+        self.size_index.setdefault(size, {})[self.intent_key(intent)] = concept_id
+        self.intent_size[concept_id] = size
+
+    def unindex_concept(self, concept_id):
+        """
+        Removes a concept from the attribute and size indices
+        """
+        if concept_id not in self.intent_size:
+            return
+        intent = self.concept[concept_id].intent
+        for attribute in self.pattern.get_iterator(intent):
+            self.attribute_index[attribute].discard(concept_id)
+        del self.size_index[self.intent_size.pop(concept_id)][self.intent_key(intent)]
+
+    @staticmethod
+    def intent_key(intent):
+        """
+        Hashable version of an indexed intent
+        """
+        if isinstance(intent, set):
+            return frozenset(intent)
+        return intent
+
+    def concepts_with(self, intent):
+        """
+        Returns the set of ids of the indexed concepts whose intent contains intent
+        Posting lists are intersected from the shortest one
+        """
+        attributes = list(self.pattern.get_iterator(intent))
+        if not bool(attributes):
+            return set(self.intent_size)
+        postings = sorted(
+            [self.attribute_index.get(attribute, set([])) for attribute in attributes],
+            key=len
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not bool(candidates):
+                break
+            candidates.intersection_update(posting)
+        return candidates
+
+    def concepts_of_size(self, size):
+        """
+        Returns the ids of the indexed concepts whose intent has size elements
+        """
+        return self.size_index.get(size, {}).values()
+
+    def find_intent(self, intent, size=None):
+        """
+        Returns the id of the indexed concept whose intent is intent, or None
+        size: number of elements in intent, if known
+        """
+        if size is None:
+            size = sum(1 for _ in self.pattern.get_iterator(intent))
+        return self.size_index.get(size, {}).get(self.intent_key(intent), None)
+
+    def maximal_concept(self, intent):
+        """
+        Returns the concept whose intent is the closure of intent, this is,
+        the concept with the smallest intent containing intent,
+        or the infimum when there is none
+        """
+        # MOST OF THE TIME THE INTENT IS ALREADY CLOSED
+        concept_id = self.find_intent(intent, self.pattern.length(intent))
+        if concept_id is not None:
+            return concept_id
+        candidates = self.concepts_with(intent)
+        if not bool(candidates):
+            return self.infimum
+        # INTENTS CONTAINING THE CLOSURE ARE LARGER
+        return min(candidates, key=self.intent_size.__getitem__)
+
+    def dump_data(self):
+        """
+        Also records the next concept id
+        """
+        data = super(ConceptLattice, self).dump_data()
+        data['next_id'] = self.next_id
+        return data
+
+    def load_data(self, data):
+        """
+        Also restores the next concept id
+        """
+        super(ConceptLattice, self).load_data(data)
+        self.next_id = data['next_id']
+
     def reset_parcour(self):
         """
-        Resets the visited flags from the graph
+        Starts a new parcour, visits of previous ones are ignored
         """
-        for concept in self.concept:
-            self.concept[concept]['not_visited'] = True
+        self.parcour += 1
 
     def visit(self, concept_id):
         """
         Mark the concept as visited for future references
         concept_id: index of the concept to mark as visited
         """
-        self.concept[concept_id]['not_visited'] = False
+        self.visits[concept_id] = self.parcour
 
     def is_visited(self, concept_id):
         """
         Check if the concept has been already visited in the current parcour
         concept_id: index of the concept to check
         """
-        return not self.concept[concept_id]['not_visited']
+        return self.visits.get(concept_id, -1) == self.parcour
 
 ################
 """
@@ -423,12 +1109,14 @@ class Intent(object):
     def hash(cls, desc):
         """
         Hash pattern to index them
+        Returns an unsigned 64-bit integer, patterns should overwrite
+        it with a structural hash that does not depend on str(desc)
         """
         if desc == cls._bottom:
             return id(cls._bottom)
         if desc == cls._top:
             return id(cls._top)
-        return hashlib.sha224(str(desc).encode('utf8')).hexdigest()
+        return int(hashlib.sha224(str(desc).encode('utf8')).hexdigest()[:16], 16)
 
     @classmethod
     def copy(cls, desc):
@@ -546,6 +1234,14 @@ class Intent(object):
         """
         raise NotImplementedError
 
+    @classmethod
+    def length_at_least(cls, desc, threshold):
+        """
+        Tests length(desc) >= threshold
+        Representations may stop counting as soon as the answer is known
+        """
+        return cls.length(desc) >= threshold
+
     @classmethod
     def contains(cls, desc, key):
         """
@@ -553,6 +1249,33 @@ class Intent(object):
         """
         raise NotImplementedError
 
+    # BATCHED OPERATIONS: BY DEFAULT THEY APPLY THE PAIRWISE ONES
+    # COLUMNAR REPRESENTATIONS SHOULD OVERWRITE THEM WITH VECTORIZED VERSIONS
+    @classmethod
+    def stack(cls, descs):
+        """
+        Packs a list of descriptions for batched operations
+        """
+        return list(descs)
+
+    @classmethod
+    def intersection_all(cls, stacked, indices=None):
+        """
+        Intersects the stacked descriptions at indices,
+        all of them if indices is None
+        """
+        if indices is not None:
+            stacked = [stacked[i] for i in indices]
+        return reduce(cls.intersection, stacked)
+
+    @classmethod
+    def leq_all(cls, desc, stacked):
+        """
+        Implements the < operator between desc and each stacked description
+        Returns a list of booleans
+        """
+        return [cls.leq(desc, other) for other in stacked]
+
 
 class SetPattern(Intent):
     """
@@ -579,6 +1302,10 @@ class SetPattern(Intent):
     @classmethod
     def to_string(cls, desc):
         return str(sorted(desc))
+
+    @classmethod
+    def hash(cls, desc):
+        return hash_words(sorted([word64(element) for element in desc]))
     # IMPLEMENTATIONS
 
     @classmethod
@@ -618,6 +1345,31 @@ class SetPattern(Intent):
     def contains(cls, desc, key):
         return key in desc
 
+    @classmethod
+    def difference(cls, desc1, desc2):
+        return desc1.difference(desc2)
+
+    @classmethod
+    def minimum(cls, desc):
+        """
+        Smallest element in the description
+        """
+        return min(desc)
+
+    @classmethod
+    def mask(cls, pointer):
+        """
+        Description with all the elements up to pointer, used by canonical tests
+        """
+        return set(range(pointer + 1))
+
+    @classmethod
+    def lexo(cls, desc1, desc2):
+        """
+        Lexical comparison between two descriptions
+        """
+        return tuple(sorted(desc1)) <= tuple(sorted(desc2))
+
     @classmethod
     def get_iterator(cls, desc):
         for i in sorted(desc):
@@ -0,0 +1,147 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+from importlib import import_module
+
+# PURE PYTHON IMPLEMENTATIONS, AS DEFINED BY EACH Intent SUBCLASS
+PYTHON = 'python'
+
+# MODULES REGISTERING THE BUILT-IN BACKENDS WHEN IMPORTED
+BACKEND_MODULES = {
+    'numpy': 'fca.defs.backends.vectorized'
+}
+
+
+class Backend(object):
+    """
+    Set of alternative implementations of Intent classmethods,
+    e.g. vectorized or compiled versions of intersection
+    Implementations receive the pattern class as first argument
+    and should return exactly what the pure Python methods return
+    """
+    def __init__(self, name, available=True):
+        """
+        name: name used to select the backend
+        available: False if its requirements are not installed
+        """
+        self.name = name
+        self.available = available
+        self.implementations = {}
+
+    def register(self, pattern, **methods):
+        """
+        Registers implementations for the methods of a pattern class
+        backend.register(StrippedPartitions, intersection=function)
+        """
+        self.implementations.setdefault(pattern, {}).update(methods)
+
+
+# name -> Backend
+_BACKENDS = {}
+# (pattern, method) -> original attribute in the class dict, or None if inherited
+_ORIGINALS = {}
+# (pattern, method) -> name of the installed backend
+_INSTALLED = {}
+
+
+def register_backend(backend):
+    """
+    Makes a backend available to use_backend,
+    backends may be registered by other packages (e.g. compiled extensions)
+    """
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name):
+    """
+    Returns the backend registered with name, built-in backends are
+    imported on demand. Returns None if there is no such backend
+    """
+    if name not in _BACKENDS and name in BACKEND_MODULES:
+        import_module(BACKEND_MODULES[name])
+    return _BACKENDS.get(name, None)
+
+
+def available_backends():
+    """
+    Names of the built-in and registered backends whose requirements are installed
+    """
+    names = set(BACKEND_MODULES).union(_BACKENDS)
+    return sorted([name for name in names if getattr(get_backend(name), 'available', False)])
+
+
+def restore_python():
+    """
+    Reinstalls the pure Python implementations
+    """
+    for (pattern, method), original in _ORIGINALS.items():
+        if original is None:
+            delattr(pattern, method)
+        else:
+            setattr(pattern, method, original)
+    _ORIGINALS.clear()
+    _INSTALLED.clear()
+
+
+def use_backend(*names):
+    """
+    Installs the implementations of the backends in names, in order of preference
+    Each method of each pattern class is taken from the first available backend
+    implementing it, methods not implemented by any of them remain in pure Python.
+    Unknown or unavailable backends are ignored
+    'python' stops the search, use_backend('python') restores pure Python everywhere
+    returns dict (pattern, method) -> name of the backend in use
+    """
+    restore_python()
+    for name in names:
+        if name == PYTHON:
+            break
+        backend = get_backend(name)
+        if backend is None or not backend.available:
+            continue
+        for pattern, methods in backend.implementations.items():
+            for method, function in methods.items():
+                if (pattern, method) in _INSTALLED:
+                    continue
+                _ORIGINALS[(pattern, method)] = pattern.__dict__.get(method, None)
+                setattr(pattern, method, classmethod(function))
+                _INSTALLED[(pattern, method)] = name
+    return dict(_INSTALLED)
+
+
+def installed_backends():
+    """
+    Returns dict (pattern, method) -> name of the backend in use
+    """
+    return dict(_INSTALLED)
+
+
+def configure():
+    """
+    Installs the backends listed in the FCA_BACKEND environment variable,
+    comma separated in order of preference, e.g. FCA_BACKEND=numpy
+    By default every available built-in backend is used
+    """
+    names = os.environ.get('FCA_BACKEND', None)
+    if names is None:
+        names = sorted(BACKEND_MODULES)
+    else:
+        names = [name.strip() for name in names.split(',') if name.strip() != '']
+    return use_backend(*names)
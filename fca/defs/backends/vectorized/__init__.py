@@ -0,0 +1,134 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from itertools import chain
+from fca.defs.backends import Backend, register_backend
+from fca.defs.patterns.hypergraphs import PartitionPattern, TrimmedPartitionPattern, StrippedPartitions
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# BELOW THESE SIZES THE PURE PYTHON METHODS ARE FASTER, SEE fca.bench
+# PARTITION PRODUCTS COMPARE EVERY PAIR OF CLASSES IN PURE PYTHON
+MIN_PAIRS = 256
+# STRIPPED PRODUCTS ARE LINEAR IN THE NUMBER OF ELEMENTS IN PURE PYTHON
+MIN_ELEMENTS = 128
+
+# PURE PYTHON METHODS, THIS MODULE IS IMPORTED BEFORE THE BACKEND IS INSTALLED
+python_partition_intersection = PartitionPattern.__dict__['intersection'].__func__
+python_trimmed_partition_intersection = TrimmedPartitionPattern.__dict__['intersection'].__func__
+python_stripped_product = StrippedPartitions.__dict__['intersection'].__func__
+
+
+def class_labels(desc):
+    """
+    Flattens a partition given as a list of sets
+    returns (members, labels) where labels[i] is the index of the class of members[i]
+    """
+    sizes = [len(k) for k in desc]
+    members = np.fromiter(chain.from_iterable(desc), dtype=np.int64, count=sum(sizes))
+    labels = np.repeat(np.arange(len(desc), dtype=np.int64), sizes)
+    return members, labels
+
+
+def use_python(desc1, desc2, min_pairs=0, min_elements=0):
+    """
+    True if the pure Python methods should compute the intersection of desc1 and desc2
+    Small partitions are faster in pure Python and empty classes (e.g. the [set()] top)
+    are kept by the pure Python products while partition_product drops them
+    """
+    if len(desc1) * len(desc2) < min_pairs:
+        return True
+    if sum([len(k) for k in desc1]) + sum([len(k) for k in desc2]) < min_elements:
+        return True
+    return not all(desc1) or not all(desc2)
+
+
+def partition_product(desc1, desc2, min_size=1):
+    """
+    Non-empty intersections between the classes of desc1 and desc2
+    with at least min_size elements.
+    Elements of desc2 are labeled with their class in desc1 through a probe table
+    and grouped by the pair of labels with a stable sort.
+    Classes are listed in the order STRIPPED_PRODUCT finds them,
+    by class of desc2 and then by first element found
+    """
+    members1, labels1 = class_labels(desc1)
+    members2, labels2 = class_labels(desc2)
+    if len(members1) == 0 or len(members2) == 0:
+        return []
+    probe = np.full(max(members1.max(), members2.max()) + 1, -1, dtype=np.int64)
+    probe[members1] = labels1
+    first = probe[members2]
+    inner = first >= 0
+    members2 = members2[inner]
+    keys = labels2[inner] * len(desc1) + first[inner]
+
+    order = np.argsort(keys, kind='mergesort')
+    keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.append(starts[1:], len(keys))
+    selected = (ends - starts) >= min_size
+    starts, ends = starts[selected], ends[selected]
+    # THE STABLE SORT KEEPS THE FIRST ELEMENT FOUND AT THE START OF EACH GROUP
+    found = np.argsort(order[starts], kind='mergesort')
+
+    members = members2[order].tolist()
+    return [set(members[i:j]) for i, j in zip(starts[found].tolist(), ends[found].tolist())]
+
+
+def partition_intersection(cls, desc1, desc2):
+    """
+    PartitionPattern.intersection
+    """
+    if desc2 == cls._top:
+        return desc1
+    if use_python(desc1, desc2, min_pairs=MIN_PAIRS):
+        return python_partition_intersection(cls, desc1, desc2)
+    new_desc = partition_product(desc1, desc2)
+    if len(new_desc) == sum([len(i) for i in new_desc]):
+        return PartitionPattern.bottom(new_desc)
+    return cls.fix_desc(new_desc)
+
+
+def trimmed_partition_intersection(cls, desc1, desc2):
+    """
+    TrimmedPartitionPattern.intersection
+    """
+    if use_python(desc1, desc2, min_pairs=MIN_PAIRS):
+        return python_trimmed_partition_intersection(cls, desc1, desc2)
+    new_desc = partition_product(desc1, desc2, 2)
+    if not bool(new_desc):
+        return cls.bottom()
+    return cls.fix_desc(new_desc)
+
+
+def stripped_product(cls, desc1, desc2):
+    """
+    StrippedPartitions.intersection
+    """
+    if use_python(desc1, desc2, min_elements=MIN_ELEMENTS):
+        return python_stripped_product(cls, desc1, desc2)
+    return partition_product(desc1, desc2, 2)
+
+
+BACKEND = register_backend(Backend('numpy', available=np is not None))
+BACKEND.register(PartitionPattern, intersection=partition_intersection)
+BACKEND.register(TrimmedPartitionPattern, intersection=trimmed_partition_intersection)
+BACKEND.register(StrippedPartitions, intersection=stripped_product)
@@ -0,0 +1,232 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import mmap
+import heapq
+import struct
+import bisect
+import tempfile
+
+#****************************************
+# Caches of descriptions already found
+#****************************************
+class Cache(object):
+    """
+    Abstract class for the canonicity stores used by enumeration algorithms
+    Algorithms only test membership of a description hash and register it,
+    so caches mimic the part of the list API they used to rely on:
+        key in cache
+        cache.append(key)
+    """
+    def __contains__(self, key):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def append(self, key, value=True):
+        """
+        Registers a key in the cache
+        """
+        raise NotImplementedError
+
+    def get(self, key, default=None):
+        """
+        Returns the value associated to key
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the resources held by the cache
+        """
+        pass
+
+
+class SetCache(Cache):
+    """
+    Keys are kept in a hashed set, O(1) lookups
+    """
+    def __init__(self):
+        self.keys = set([])
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def append(self, key, value=True):
+        self.keys.add(key)
+
+    def get(self, key, default=None):
+        return True if key in self.keys else default
+
+
+class DictCache(Cache):
+    """
+    Keys are kept in a dict together with a value,
+    e.g. the id of the concept that holds the description
+    """
+    def __init__(self):
+        self.values = {}
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, key, value=True):
+        self.values[key] = value
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class SortedRun(object):
+    """
+    Sorted sequence of unsigned 64-bit keys stored in a memory-mapped file
+    A sparse index with one key every STEP keys is kept in memory
+    so that lookups only touch one block of the file
+    """
+    FMT = '<Q'
+    SIZE = struct.calcsize(FMT)
+    STEP = 1024
+
+    def __init__(self, path, keys):
+        """
+        path: file to write the run to
+        keys: iterable of sorted keys
+        """
+        self.path = path
+        self.fences = []
+        self.length = 0
+        buff = []
+        with open(path, 'wb') as fout:
+            for key in keys:
+                if self.length % self.STEP == 0:
+                    self.fences.append(key)
+                buff.append(key)
+                self.length += 1
+                if len(buff) == self.STEP:
+                    fout.write(struct.pack('<{}Q'.format(len(buff)), *buff))
+                    buff = []
+            if bool(buff):
+                fout.write(struct.pack('<{}Q'.format(len(buff)), *buff))
+        self.fin = open(path, 'rb')
+        self.mem = None
+        if self.length > 0:
+            self.mem = mmap.mmap(self.fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.length
+
+    def key(self, i):
+        """
+        Returns the i-th key in the run
+        """
+        return struct.unpack_from(self.FMT, self.mem, i * self.SIZE)[0]
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.key(i)
+
+    def __contains__(self, key):
+        block = bisect.bisect_right(self.fences, key) - 1
+        if block < 0:
+            return False
+        low = block * self.STEP
+        high = min(low + self.STEP, self.length)
+        while low < high:
+            mid = (low + high) // 2
+            if self.key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low < self.length and self.key(low) == key
+
+    def close(self):
+        """
+        Unmaps and deletes the run
+        """
+        if self.mem is not None:
+            self.mem.close()
+        self.fin.close()
+        os.remove(self.path)
+
+
+class DiskCache(Cache):
+    """
+    Keeps up to max_size keys in memory, beyond that keys are spilled
+    to disk as sorted runs searched by bisection over memory maps.
+    When more than max_runs are on disk, they are merged into a single one.
+    Keys should be unsigned 64-bit integers, as given by Intent.hash
+    """
+    def __init__(self, max_size=1000000, max_runs=8, path=None):
+        self.max_size = max_size
+        self.max_runs = max_runs
+        self.path = path if path is not None else tempfile.gettempdir()
+        self.memory = set([])
+        self.runs = []
+
+    def __contains__(self, key):
+        if key in self.memory:
+            return True
+        for run in self.runs:
+            if key in run:
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.memory) + sum([len(run) for run in self.runs])
+
+    def append(self, key, value=True):
+        self.memory.add(key)
+        if len(self.memory) >= self.max_size:
+            self.spill()
+
+    def get(self, key, default=None):
+        return True if key in self else default
+
+    def new_run(self, keys):
+        """
+        Writes a new sorted run in the cache directory
+        """
+        fd, path = tempfile.mkstemp(suffix='.cache', dir=self.path)
+        os.close(fd)
+        return SortedRun(path, keys)
+
+    def spill(self):
+        """
+        Moves the keys in memory to a new run on disk
+        """
+        self.runs.append(self.new_run(sorted(self.memory)))
+        self.memory = set([])
+        if len(self.runs) > self.max_runs:
+            merged = self.new_run(heapq.merge(*self.runs))
+            for run in self.runs:
+                run.close()
+            self.runs = [merged]
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.memory = set([])
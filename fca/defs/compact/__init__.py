@@ -0,0 +1,387 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import binascii
+from array import array
+from numbers import Integral
+try:
+    from itertools import izip as zip
+except ImportError:
+    pass
+from fca.defs import POSET, Concept
+from fca.defs.patterns.bitsets import popcount
+
+#****************************************
+# Compact storage for posets of concepts
+#****************************************
+class DescriptionPool(object):
+    """
+    Stores descriptions one after the other in shared arrays
+    Sets and lists of integers are stored as their elements in an array of integers,
+    integer bitmasks are packed as big-endian bytes in a bytearray,
+    any other description is kept as it is.
+    Descriptions are rebuilt when requested, so that modifying them
+    does not modify the pool
+    """
+    SET = 0
+    LIST = 1
+    BITS = 2
+    OTHER = 3
+
+    def __init__(self):
+        self.kinds = bytearray()
+        self.offsets = array('L', [0])
+        self.values = array('i')
+        self.packed_offsets = array('L', [0])
+        self.packed = bytearray()
+        self.others = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, desc):
+        """
+        Stores desc and returns its index in the pool
+        """
+        index = len(self.kinds)
+        kind = self.OTHER
+        values = None
+        try:
+            if isinstance(desc, (set, frozenset)):
+                kind, values = self.SET, array('i', sorted(desc))
+            elif isinstance(desc, list):
+                kind, values = self.LIST, array('i', desc)
+            elif isinstance(desc, Integral) and not isinstance(desc, bool) and desc >= 0:
+                kind = self.BITS
+        except (TypeError, OverflowError):
+            kind, values = self.OTHER, None
+        if kind == self.OTHER:
+            self.others[index] = desc
+        elif kind == self.BITS:
+            self.packed.extend(self.pack(desc))
+        else:
+            self.values.extend(values)
+        self.kinds.append(kind)
+        self.offsets.append(len(self.values))
+        self.packed_offsets.append(len(self.packed))
+        return index
+
+    @staticmethod
+    def pack(bits):
+        """
+        Big-endian bytes of a bitmask, 0 is packed as no bytes
+        0x10203 -> [0x01, 0x02, 0x03]
+        """
+        if bits == 0:
+            return bytearray()
+        digits = '%x' % bits
+        if len(digits) % 2 == 1:
+            digits = '0' + digits
+        return bytearray(binascii.unhexlify(digits))
+
+    def get(self, index):
+        """
+        Rebuilds the description stored at index
+        """
+        kind = self.kinds[index]
+        if kind == self.OTHER:
+            return self.others[index]
+        if kind == self.BITS:
+            packed = self.packed[self.packed_offsets[index]:self.packed_offsets[index + 1]]
+            if not bool(packed):
+                return 0
+            return int(binascii.hexlify(bytes(packed)), 16)
+        values = self.values[self.offsets[index]:self.offsets[index + 1]]
+        if kind == self.SET:
+            return set(values)
+        if kind == self.LIST:
+            return values.tolist()
+        return bits_from_indices(values)
+
+    def length(self, index):
+        """
+        Number of elements of the description stored at index
+        """
+        if self.kinds[index] == self.BITS:
+            return popcount(self.get(index))
+        return self.offsets[index + 1] - self.offsets[index]
+
+
+class ConceptRecord(object):
+    """
+    Read-only view of a concept stored in a CompactPOSET
+    Behaves as the Concept dict used by POSET
+    """
+    __slots__ = ('store', 'cid')
+
+    def __init__(self, store, cid):
+        self.store = store
+        self.cid = cid
+
+    def __getitem__(self, key):
+        return self.store.concept_data(self.cid, key)
+
+    def __setitem__(self, key, value):
+        self.store.set_concept_data(self.cid, key, value)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        """
+        dict.get
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        """
+        dict.keys
+        """
+        return [Concept.EMARK, Concept.IMARK] + list(self.store.extra.get(self.cid, {}).keys())
+
+    def items(self):
+        """
+        dict.items
+        """
+        return [(key, self[key]) for key in self.keys()]
+
+    @property
+    def extent(self):
+        """
+        access extent
+        """
+        return self[Concept.EMARK]
+
+    @property
+    def intent(self):
+        """
+        access intent
+        """
+        return self[Concept.IMARK]
+
+
+class ConceptRecords(object):
+    """
+    Mapping from concept ids to ConceptRecord, used as POSET.node
+    """
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store.ids)
+
+    def __contains__(self, cid):
+        return self.store.record_index(cid) is not None
+
+    def __getitem__(self, cid):
+        if cid not in self:
+            raise KeyError(cid)
+        return ConceptRecord(self.store, cid)
+
+    def __iter__(self):
+        return iter(self.store.ids)
+
+    def keys(self):
+        """
+        dict.keys
+        """
+        return list(self.store.ids)
+
+    def values(self):
+        """
+        dict.values
+        """
+        return [ConceptRecord(self.store, cid) for cid in self.store.ids]
+
+    def items(self):
+        """
+        dict.items
+        """
+        return [(cid, ConceptRecord(self.store, cid)) for cid in self.store.ids]
+
+
+class CompactPOSET(POSET):
+    """
+    POSET with array-backed storage
+    Extents and intents are kept in two DescriptionPool,
+    concepts are views over them created on access (ConceptRecord).
+    Concept ids are integers larger or equal to the supremum (-1),
+    each one is mapped to its position in the pools through an array.
+    Edges are appended to two arrays and organized in CSR structures
+    (sorted targets per source and sorted sources per target)
+    the first time neighbors are requested after a modification.
+
+    Descriptions are copies, suitable for algorithms that do not
+    modify concepts once they are created (CbO and its variants)
+    """
+    def __init__(self, transformer=None):
+        super(CompactPOSET, self).__init__(transformer)
+        self.extents = DescriptionPool()
+        self.intents = DescriptionPool()
+        self.ids = array('l')
+        self.slots = array('l')
+        self.extra = {}
+        self.sources = array('l')
+        self.targets = array('l')
+        self.removed = set([])
+        self.edges_data = {}
+        self.csr = None
+        self.node = ConceptRecords(self)
+        self.concept = self.node
+
+    def record_index(self, cid):
+        """
+        Position of concept cid in the pools, None if it does not exist
+        """
+        slot = cid - self.supremum
+        if slot < 0 or slot >= len(self.slots) or self.slots[slot] < 0:
+            return None
+        return self.slots[slot]
+
+    def concept_data(self, cid, key):
+        """
+        Returns the value of key for concept cid
+        """
+        index = self.record_index(cid)
+        if key == self.EXTENT_MARK:
+            return self.extents.get(index)
+        if key == self.INTENT_MARK:
+            return self.intents.get(index)
+        return self.extra[cid][key]
+
+    def set_concept_data(self, cid, key, value):
+        """
+        Sets the value of key for concept cid,
+        new extents and intents are appended to the pools
+        """
+        index = self.record_index(cid)
+        if key == self.EXTENT_MARK:
+            self.extents.others[index] = value
+            self.extents.kinds[index] = DescriptionPool.OTHER
+        elif key == self.INTENT_MARK:
+            self.intents.others[index] = value
+            self.intents.kinds[index] = DescriptionPool.OTHER
+        else:
+            self.extra.setdefault(cid, {})[key] = value
+
+    def add_node(self, node, params=False):
+        """
+        Adds a concept, adding an existing concept replaces its data as in DiGraph
+        The replaced descriptions are left unused in the pools
+        """
+        if not isinstance(params, dict):
+            return
+        index = len(self.extents)
+        self.extents.append(params.get(self.EXTENT_MARK, None))
+        self.intents.append(params.get(self.INTENT_MARK, None))
+        if self.record_index(node) is None:
+            self.ids.append(node)
+        slot = node - self.supremum
+        if slot >= len(self.slots):
+            self.slots.extend([-1] * (slot + 1 - len(self.slots)))
+        self.slots[slot] = index
+        self.extra.pop(node, None)
+        extra = {k: v for k, v in params.items() if k not in (self.EXTENT_MARK, self.INTENT_MARK)}
+        if bool(extra):
+            self.extra[node] = extra
+
+    def new_formal_concept(self, extent, intent, concept_id=None):
+        if concept_id is None:
+            concept_id = len(self.ids)
+        self.add_node(concept_id, {self.EXTENT_MARK: extent, self.INTENT_MARK: intent})
+        return concept_id
+
+    def nodes(self, data=False):
+        if data:
+            return self.node.items()
+        return list(self.ids)
+
+    def add_edge(self, source, target, params=False):
+        self.sources.append(source)
+        self.targets.append(target)
+        self.removed.discard((source, target))
+        if isinstance(params, dict):
+            self.edges_data[(source, target)] = params
+        self.csr = None
+
+    def remove_edge(self, source, target):
+        self.removed.add((source, target))
+        self.edges_data.pop((source, target), None)
+        self.csr = None
+
+    def build_csr(self):
+        """
+        Drops removed edges and organizes the edges by source and by target
+        with two counting sorts
+        """
+        if bool(self.removed):
+            kept = [
+                (source, target) for source, target in zip(self.sources, self.targets)
+                if (source, target) not in self.removed
+            ]
+            self.sources = array('l', [source for source, _ in kept])
+            self.targets = array('l', [target for _, target in kept])
+            self.removed = set([])
+        self.csr = self.counting_sort(self.sources, self.targets) + \
+            self.counting_sort(self.targets, self.sources)
+
+    def counting_sort(self, keys, values):
+        """
+        Groups values by key
+        returns (indptr, indices) where the values of node n are
+        indices[indptr[n - supremum]:indptr[n - supremum + 1]]
+        """
+        n_slots = max(len(self.slots), max(keys) - self.supremum + 1 if bool(keys) else 0)
+        indptr = array('l', [0] * (n_slots + 1))
+        for key in keys:
+            indptr[key - self.supremum + 1] += 1
+        for i in range(n_slots):
+            indptr[i + 1] += indptr[i]
+        cursors = array('l', indptr)
+        indices = array('l', [0] * len(values))
+        for key, value in zip(keys, values):
+            slot = key - self.supremum
+            indices[cursors[slot]] = value
+            cursors[slot] += 1
+        return indptr, indices
+
+    def _neighbors(self, indptr, indices, node):
+        slot = node - self.supremum
+        if slot < 0 or slot + 1 >= len(indptr):
+            return set([])
+        return set(indices[indptr[slot]:indptr[slot + 1]])
+
+    def successors(self, node):
+        if self.csr is None:
+            self.build_csr()
+        return self._neighbors(self.csr[0], self.csr[1], node)
+
+    def predecessors(self, node):
+        if self.csr is None:
+            self.build_csr()
+        return self._neighbors(self.csr[2], self.csr[3], node)
+
+    def edges(self, data=False):
+        if data:
+            return self.edges_data.items()
+        if self.csr is None:
+            self.build_csr()
+        return list(zip(self.sources, self.targets))
@@ -17,7 +17,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 # Kyori code.
 import sys
-from fca.defs import Intent
+from fca.defs import Intent, hash_words, word64
 from fca.defs import SetPattern
 
 class IcebergSetPattern(SetPattern):
@@ -61,6 +61,10 @@ class IntervalPattern(Intent):
                     cls._bottom.append(i)
         return cls._bottom
 
+    @classmethod
+    def hash(cls, desc):
+        return hash_words([word64(value) for interval in desc for value in interval])
+
     @classmethod
     def meet(cls, desc1, desc2):
         for i, (j, k) in enumerate(zip(desc1, desc2)):
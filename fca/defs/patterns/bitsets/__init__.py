@@ -0,0 +1,261 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import binascii
+from numbers import Integral
+from fca.defs import Intent, mix64, MASK64, WORD_SEED
+
+
+def bits_from_indices(indices):
+    """
+    Builds an arbitrary-precision integer bitmask from an iterable of indices
+    Bits are set in a bytearray and converted in a single pass, which avoids
+    allocating a new big integer per index
+    [0, 2, 5] -> 0b100101
+    """
+    indices = list(indices)
+    if not bool(indices):
+        return 0
+    buff = bytearray((max(indices) >> 3) + 1)
+    for i in indices:
+        buff[i >> 3] |= 1 << (i & 7)
+    buff.reverse()
+    return int(binascii.hexlify(bytes(buff)), 16)
+
+
+def indices_from_bits(bits):
+    """
+    Iterates the indices of the bits set in bits in ascending order
+    0b100101 -> 0, 2, 5
+    """
+    binary = bin(bits)[:1:-1]
+    i = binary.find('1')
+    while i != -1:
+        yield i
+        i = binary.find('1', i + 1)
+
+
+if hasattr(int, 'bit_count'):
+    def popcount(bits):
+        """
+        Number of bits set in bits
+        """
+        return bits.bit_count()
+else:
+    def popcount(bits):
+        """
+        Number of bits set in bits
+        """
+        return bin(bits).count('1')
+
+
+def popcount_at_least(bits, threshold, block=4096):
+    """
+    Tests popcount(bits) >= threshold
+    Bits are counted block by block from the highest one, (bits >> start) & mask,
+    counting stops as soon as the threshold is reached or when the positions
+    left cannot reach it. Blocks double in size so that the shifts add up
+    to a couple of passes over bits when counting does not stop early
+    """
+    if threshold <= 0:
+        return True
+    end = bits.bit_length()
+    # NOT EVEN ALL THE POSITIONS WOULD BE ENOUGH
+    if end < threshold:
+        return False
+    count = 0
+    while end > 0:
+        start = max(0, end - block)
+        count += popcount((bits >> start) & ((1 << (end - start)) - 1))
+        if count >= threshold:
+            return True
+        if count + start < threshold:
+            return False
+        end = start
+        block <<= 1
+    return False
+
+
+class BitSetPattern(Intent):
+    """
+    Implements the shell set intent representation over
+    arbitrary-precision integers, this is, standard FCA where
+    element i belongs to the description iff bit i is set.
+    Intersection and union are word-wise AND/OR done by the
+    interpreter, which makes closures much cheaper than
+    with Python sets on large contexts.
+
+    Descriptions are plain integers and thus are immutable,
+    join and meet cannot be applied in place.
+    """
+    _bottom = None
+    _top = None
+
+    @classmethod
+    def fix_desc(cls, desc):
+        """
+        Descriptions can be provided as a bitmask or as an
+        iterable of indices
+        """
+        if isinstance(desc, Integral):
+            return desc
+        return bits_from_indices(desc)
+
+    @classmethod
+    def bottom(cls, bot_rep=None):
+        if cls._bottom is None:
+            cls._bottom = 0
+        return cls._bottom
+
+    @classmethod
+    def top(cls, top_rep=None):
+        if cls._top is None:
+            cls._top = 0
+        if top_rep is not None:
+            cls._top |= cls.fix_desc(top_rep)
+        return cls._top
+
+    @classmethod
+    def to_string(cls, desc):
+        return str(list(indices_from_bits(desc)))
+
+    @classmethod
+    def hash(cls, desc):
+        """
+        Mixes every 64-bit word of the bitmask, the builtin hash of an int
+        is reduced modulo a Mersenne prime and collides for wide intents
+        The constant keeps zero words from vanishing, mix64(0) == 0
+        """
+        value = mix64((desc & MASK64) ^ WORD_SEED)
+        desc >>= 64
+        while desc:
+            value = mix64(value ^ (desc & MASK64) ^ WORD_SEED)
+            desc >>= 64
+        return value
+
+    @classmethod
+    def copy(cls, desc):
+        return desc
+
+    # IMPLEMENTATIONS
+
+    @classmethod
+    def union(cls, desc1, desc2):
+        return desc1 | desc2
+
+    @classmethod
+    def intersection(cls, desc1, desc2):
+        return desc1 & desc2
+
+    @classmethod
+    def difference(cls, desc1, desc2):
+        return desc1 & ~desc2
+
+    @classmethod
+    def leq(cls, desc1, desc2):
+        return desc1 & desc2 == desc1
+
+    @classmethod
+    def meet(cls, desc1, desc2):
+        raise NotImplementedError
+
+    @classmethod
+    def join(cls, desc1, desc2):
+        raise NotImplementedError
+
+    @classmethod
+    def is_empty(cls, desc):
+        return desc == 0
+
+    @classmethod
+    def is_equal(cls, desc1, desc2):
+        return desc1 == desc2
+
+    @classmethod
+    def length(cls, desc):
+        return popcount(desc)
+
+    @classmethod
+    def length_at_least(cls, desc, threshold):
+        return popcount_at_least(desc, threshold)
+
+    @classmethod
+    def contains(cls, desc, key):
+        return key >= 0 and (desc >> key) & 1 == 1
+
+    @classmethod
+    def minimum(cls, desc):
+        return (desc & -desc).bit_length() - 1
+
+    @classmethod
+    def mask(cls, pointer):
+        return (1 << (pointer + 1)) - 1
+
+    @classmethod
+    def lexo(cls, desc1, desc2):
+        """
+        Same as comparing the sorted tuples of both sets of indices
+        but decided by the first index in which both descriptions differ
+        """
+        diff = desc1 ^ desc2
+        if diff == 0:
+            return True
+        first = (diff & -diff).bit_length() - 1
+        if (desc1 >> first) & 1:
+            return (desc2 >> first) != 0
+        return (desc1 >> first) == 0
+
+    @classmethod
+    def get_iterator(cls, desc):
+        return indices_from_bits(desc)
+
+
+class IcebergBitSetPattern(BitSetPattern):
+    """
+    IcebergSetPattern over bitsets, descriptions with less than MIN_SUP
+    elements are replaced by the bottom (0)
+    The intersection is skipped when the operands do not span MIN_SUP positions,
+    otherwise the popcount of the result stops as soon as MIN_SUP is reached
+    or cannot be reached anymore
+    """
+    MIN_SUP = 0
+    _bottom = None
+    _top = None
+
+    @classmethod
+    def top(cls, top_rep=None):
+        # THE TOP IS NOT SUBJECT TO THE MINIMUM SUPPORT
+        if cls._top is None:
+            cls._top = 0
+        if top_rep is not None:
+            cls._top |= BitSetPattern.fix_desc(top_rep)
+        return cls._top
+
+    @classmethod
+    def fix_desc(cls, desc):
+        desc = super(IcebergBitSetPattern, cls).fix_desc(desc)
+        if not popcount_at_least(desc, cls.MIN_SUP):
+            return cls.bottom()
+        return desc
+
+    @classmethod
+    def intersection(cls, desc1, desc2):
+        assert cls.MIN_SUP >= 0, 'MIN_SUP value should be a positive number'
+        if min(desc1.bit_length(), desc2.bit_length()) < cls.MIN_SUP:
+            return cls.bottom()
+        return cls.fix_desc(desc1 & desc2)
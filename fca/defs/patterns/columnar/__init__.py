@@ -0,0 +1,177 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+from fca.defs import mix64
+from fca.defs.patterns import IntervalPattern
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def columns_from_intervals(intervals):
+    """
+    Builds a columnar description from a list of intervals
+    [(1, 2), (3, 3)] -> (array([1, 3]), array([2, 3]))
+    """
+    if np is None:
+        raise ImportError('Columnar interval patterns require numpy')
+    intervals = np.asarray(list(intervals))
+    if intervals.size == 0:
+        return np.empty(0), np.empty(0)
+    return intervals[:, 0].copy(), intervals[:, 1].copy()
+
+
+def intervals_from_columns(desc):
+    """
+    Lists the intervals of a columnar description
+    (array([1, 3]), array([2, 3])) -> [(1, 2), (3, 3)]
+    """
+    return list(zip(desc[0].tolist(), desc[1].tolist()))
+
+
+def is_columnar(desc):
+    """
+    Tests whether desc is a columnar description
+    """
+    return (
+        np is not None and
+        isinstance(desc, tuple) and
+        len(desc) == 2 and
+        isinstance(desc[0], np.ndarray)
+    )
+
+
+class ColumnarIntervalPattern(IntervalPattern):
+    """
+    IntervalPattern where a description is a pair of NumPy arrays
+    (lows, highs) instead of a list of tuples.
+    Pairwise operations are elementwise array operations and
+    stacked descriptions are two n x k matrices, so that
+    the convex hull of many objects or their subsumption
+    by a description are computed in a single pass.
+
+    Top is a sentinel of length zero and it is tested by identity
+    """
+
+    @classmethod
+    def fix_desc(cls, desc):
+        if is_columnar(desc):
+            return desc
+        return columns_from_intervals(desc)
+
+    @classmethod
+    def top(cls, top_rep=None):
+        if cls._top is None:
+            cls._top = columns_from_intervals([])
+        return cls._top
+
+    @classmethod
+    def bottom(cls, bot_rep=None):
+        if bot_rep is not None:
+            bot_rep = cls.fix_desc(bot_rep)
+            if cls._bottom is None:
+                cls._bottom = cls.copy(bot_rep)
+            else:
+                cls.meet(cls._bottom, bot_rep)
+        return cls._bottom
+
+    @classmethod
+    def to_string(cls, desc):
+        return str(intervals_from_columns(desc))
+
+    @classmethod
+    def hash(cls, desc):
+        return mix64(hash((desc[0].tobytes(), desc[1].tobytes())))
+
+    @classmethod
+    def copy(cls, desc):
+        return desc[0].copy(), desc[1].copy()
+
+    @classmethod
+    def meet(cls, desc1, desc2):
+        np.minimum(desc1[0], desc2[0], out=desc1[0])
+        np.maximum(desc1[1], desc2[1], out=desc1[1])
+
+    @classmethod
+    def intersection(cls, desc1, desc2):
+        if desc1 is cls._top:
+            return desc2
+        if desc2 is cls._top:
+            return desc1
+        return np.minimum(desc1[0], desc2[0]), np.maximum(desc1[1], desc2[1])
+
+    @classmethod
+    def leq(cls, desc1, desc2):
+        if desc2 is cls._top:
+            return True
+        if desc1 is cls._top:
+            return False
+        return bool((desc1[0] <= desc2[0]).all() and (desc1[1] >= desc2[1]).all())
+
+    @classmethod
+    def is_equal(cls, desc1, desc2):
+        if desc1 is cls._top or desc2 is cls._top:
+            return desc1 is desc2
+        return np.array_equal(desc1[0], desc2[0]) and np.array_equal(desc1[1], desc2[1])
+
+    @classmethod
+    def contains(cls, desc, key):
+        return bool(((desc[0] == key[0]) & (desc[1] == key[1])).any())
+
+    @classmethod
+    def length(cls, desc):
+        return len(desc[0])
+
+    @classmethod
+    def get_iterator(cls, desc):
+        for interval in intervals_from_columns(desc):
+            yield interval
+
+    # BATCHED OPERATIONS
+
+    @classmethod
+    def stack(cls, descs):
+        """
+        Stacks the lows and highs of the descriptions in two n x k matrices
+        """
+        descs = list(descs)
+        return np.vstack([d[0] for d in descs]), np.vstack([d[1] for d in descs])
+
+    @classmethod
+    def intersection_all(cls, stacked, indices=None):
+        """
+        Convex hull of the stacked descriptions at indices
+        """
+        lows, highs = stacked
+        if indices is not None:
+            indices = list(indices)
+            lows, highs = lows[indices], highs[indices]
+        if len(lows) == 0:
+            return cls.top()
+        return lows.min(axis=0), highs.max(axis=0)
+
+    @classmethod
+    def leq_all(cls, desc, stacked):
+        """
+        Boolean array, True for each stacked description subsumed by desc
+        """
+        lows, highs = stacked
+        if desc is cls._top:
+            return np.zeros(len(lows), dtype=bool)
+        return (lows >= desc[0]).all(axis=1) & (highs <= desc[1]).all(axis=1)
@@ -49,12 +49,13 @@ class PatternEnumerator(object):
         self.tally.pop()
         self._ticket_number -= 1
 
-    def next(self, ticket, current_description, depth=0):
+    def next(self, ticket, current_description, depth=0, extent=None):
         """
         Obtain the next element in the enumeration for the given ticket
         @param ticket: int ticket number for the current recursion
         @param current_description: ? current element in the enumeration
         @param depth: int depth in the recursion, used for debugging
+        @param extent: objects of the current recursion, used by some enumerators
         """
         raise NotImplementedError
     def next_objects(self, ticket, current_description, current_objects, depth=0):
@@ -110,7 +111,7 @@ class SetObjectEnumerator(PatternEnumerator):
         return super(SetObjectEnumerator, self).new_ticket(old_ticket, depth)
 
 
-    def next(self, ticket, current_description, depth=0):
+    def next(self, ticket, current_description, depth=0, extent=None):
         """
         Gets the new element in the enumeration
         We return an element that is already tested that it does not appear in
@@ -298,7 +299,7 @@ class IntervalObjectEnumerator(PatternEnumerator):
         self.tally.append((not branch, old_dim - int(branch), 0))
         return super(IntervalObjectEnumerator, self).new_ticket(old_ticket, depth)
 
-    def next(self, ticket, current_description, depth=0):
+    def next(self, ticket, current_description, depth=0, extent=None):
         """
         Next element in the enumeration follows the logic described
         in the doc of the class __init__
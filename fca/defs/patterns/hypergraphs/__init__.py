@@ -18,7 +18,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # Kyori code.
 import sys
 from itertools import product, chain
-from fca.defs import Intent
+from fca.defs import Intent, mix64, hash_words, word64
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class PartitionPattern(Intent):
     """
@@ -34,6 +38,12 @@ class PartitionPattern(Intent):
     def fix_desc(cls, desc):
         return cls.sort_description(desc)
 
+    @classmethod
+    def hash(cls, desc):
+        return hash_words(sorted([
+            hash_words(sorted([word64(element) for element in part])) for part in desc
+        ]))
+
     @classmethod
     def intersection(cls, desc1, desc2):
         if desc2 == cls._top:
@@ -231,4 +241,245 @@ class StrippedPartitions(TrimmedPartitionPattern):
                     if len(S[T[t]]) > 1:
                         new_desc.append(S[T[t]])
                     S[T[t]] = set([])
-        return new_desc
\ No newline at end of file
+        return new_desc
+
+def encode_partition(classes, n_elements=0):
+    """
+    Encodes a list of sets as a stripped partition over arrays
+    (members, offsets, probe)
+    members: elements of classes with at least two elements, class after class
+    offsets: class k holds members[offsets[k]:offsets[k+1]]
+    probe: label of the class of each element, -1 if stripped, or None
+    Classes are sorted by their smallest element and their elements in ascending order,
+    so that equal partitions have equal encodings
+    [set([0, 2]), set([1]), set([3, 4])] -> ([0, 2, 3, 4], [0, 2, 4], [0, -1, 0, 1, 1])
+    """
+    if np is None:
+        raise ImportError('Array encoded partitions require numpy')
+    classes = sorted([sorted(i) for i in classes if len(i) > 1])
+    members = np.array([i for k in classes for i in k], dtype=np.int64)
+    offsets = np.zeros(len(classes) + 1, dtype=np.int64)
+    np.cumsum([len(k) for k in classes], out=offsets[1:])
+    desc = (members, offsets, None)
+    if n_elements > 0:
+        desc = (members, offsets, build_probe(desc, n_elements))
+    return desc
+
+
+def build_probe(desc, n_elements):
+    """
+    Probe table of an array encoded partition
+    Maps each element to the index of its class, -1 for stripped elements
+    """
+    members, offsets = desc[0], desc[1]
+    probe = np.full(n_elements, -1, dtype=np.int32)
+    probe[members] = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return probe
+
+
+def partition_classes(desc):
+    """
+    Lists the classes of an array encoded partition
+    """
+    members, offsets = desc[0].tolist(), desc[1].tolist()
+    return [set(members[i:j]) for i, j in zip(offsets[:-1], offsets[1:])]
+
+
+def is_array_partition(desc):
+    """
+    Tests whether desc is an array encoded partition
+    """
+    return (
+        np is not None and
+        isinstance(desc, tuple) and
+        len(desc) == 3 and
+        isinstance(desc[0], np.ndarray)
+    )
+
+
+class ArrayStrippedPartitions(StrippedPartitions):
+    '''
+    StrippedPartitions where a description is encoded over NumPy arrays
+    (members, offsets, probe), see encode_partition.
+
+    STRIPPED_PRODUCT [1] is computed without dicts: elements of the
+    classes of desc2 are labeled with their class in desc1 using the
+    probe table of desc1, and grouped by the pair of labels with a stable sort.
+
+    Object descriptions keep their probe table, which is reused in each product
+    in which they participate. Products of two derived partitions build
+    a temporary one. Stacked probe tables allow testing the subsumption
+    of a partition by all object descriptions at once.
+
+    Top is tested by identity
+    '''
+    _top = None
+    _bottom = None
+
+    n_elements = 0
+
+    @classmethod
+    def reset(cls):
+        super(ArrayStrippedPartitions, cls).reset()
+        cls.n_elements = 0
+
+    @classmethod
+    def count_elements(cls, desc):
+        """
+        Updates the number of elements with a list of sets
+        """
+        n_elements = max([max(i) + 1 for i in desc if bool(i)] or [0])
+        if cls.n_elements < n_elements:
+            cls.n_elements = n_elements
+
+    @classmethod
+    def fix_desc(cls, desc):
+        if is_array_partition(desc):
+            return desc
+        cls.count_elements(desc)
+        return encode_partition(desc, cls.n_elements)
+
+    @classmethod
+    def probe(cls, desc):
+        """
+        Returns the probe table of desc, building it if required
+        """
+        if desc[2] is not None and len(desc[2]) >= cls.n_elements:
+            return desc[2]
+        return build_probe(desc, cls.n_elements)
+
+    @classmethod
+    def top(cls, top_rep=None):
+        if top_rep is not None:
+            cls.count_elements(top_rep)
+        if cls._top is None or len(cls._top[0]) != cls.n_elements:
+            cls._top = encode_partition([range(cls.n_elements)], cls.n_elements)
+        return cls._top
+
+    @classmethod
+    def bottom(cls, bot_rep=None):
+        if cls._bottom is None:
+            cls._bottom = encode_partition([])
+        return cls._bottom
+
+    @classmethod
+    def to_string(cls, desc):
+        return str(partition_classes(desc))
+
+    @classmethod
+    def hash(cls, desc):
+        return mix64(hash((desc[0].tobytes(), desc[1].tobytes())))
+
+    @classmethod
+    def copy(cls, desc):
+        return desc
+
+    @classmethod
+    def intersection(cls, desc1, desc2):
+        '''
+        Procedure STRIPPED_PRODUCT defined in [1]
+        '''
+        if desc1 is cls._top:
+            return desc2
+        if desc2 is cls._top:
+            return desc1
+        if desc1[2] is None and desc2[2] is not None:
+            desc1, desc2 = desc2, desc1
+        members, offsets = desc2[0], desc2[1]
+        if len(members) == 0:
+            return cls.bottom()
+
+        # LABEL EACH ELEMENT WITH ITS CLASS IN desc1 AND desc2
+        labels1 = cls.probe(desc1)[members]
+        labels2 = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        kept = labels1 >= 0
+        members = members[kept]
+        keys = labels1[kept].astype(np.int64) * (len(offsets) - 1) + labels2[kept]
+
+        # GROUP ELEMENTS BY PAIR OF LABELS, ELEMENTS REMAIN SORTED WITHIN GROUPS
+        order = np.argsort(keys, kind='mergesort')
+        members, keys = members[order], keys[order]
+        new_class = np.ones(len(keys), dtype=bool)
+        new_class[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(new_class)
+        sizes = np.diff(np.append(starts, len(keys)))
+
+        # STRIP SINGLETONS AND SORT CLASSES BY THEIR SMALLEST ELEMENT
+        starts, sizes = starts[sizes > 1], sizes[sizes > 1]
+        if len(starts) == 0:
+            return cls.bottom()
+        class_order = np.argsort(members[starts], kind='mergesort')
+        starts, sizes = starts[class_order], sizes[class_order]
+        new_offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=new_offsets[1:])
+        positions = np.repeat(starts - new_offsets[:-1], sizes) + np.arange(new_offsets[-1])
+        return members[positions], new_offsets, None
+
+    @classmethod
+    def leq(cls, desc1, desc2):
+        """
+        Each class of desc1 is contained in a class of desc2
+        """
+        if desc2 is cls._top:
+            return True
+        labels = cls.probe(desc2)[desc1[0]]
+        split = (labels[1:] != labels[:-1]) & cls.inner_mask(desc1)[1:]
+        return bool((labels >= 0).all() and not split.any())
+
+    @classmethod
+    def inner_mask(cls, desc):
+        """
+        Marks the positions in members that do not start a class,
+        their element shares the class of the previous one
+        """
+        inner = np.ones(len(desc[0]), dtype=bool)
+        inner[desc[1][:-1]] = False
+        return inner
+
+    @classmethod
+    def is_equal(cls, desc1, desc2):
+        return np.array_equal(desc1[0], desc2[0]) and np.array_equal(desc1[1], desc2[1])
+
+    @classmethod
+    def contains(cls, desc, key):
+        return set(key) in partition_classes(desc)
+
+    @classmethod
+    def join(cls, desc1, desc2):
+        raise NotImplementedError
+
+    @classmethod
+    def meet(cls, desc1, desc2):
+        raise NotImplementedError
+
+    @classmethod
+    def length(cls, desc):
+        return len(desc[1]) - 1
+
+    @classmethod
+    def is_empty(cls, desc):
+        return len(desc[1]) == 1
+
+    @classmethod
+    def get_iterator(cls, desc):
+        for i in partition_classes(desc):
+            yield i
+
+    # BATCHED OPERATIONS
+
+    @classmethod
+    def stack(cls, descs):
+        """
+        Stacks the probe tables of the descriptions in a matrix
+        """
+        return np.vstack([cls.probe(desc) for desc in descs])
+
+    @classmethod
+    def leq_all(cls, desc, stacked):
+        """
+        Boolean array, True for each stacked description having
+        each class of desc contained in one of its classes
+        """
+        labels = stacked[:, desc[0]]
+        split = (labels[:, 1:] != labels[:, :-1]) & cls.inner_mask(desc)[1:]
+        return (labels >= 0).all(axis=1) & ~split.any(axis=1)
@@ -0,0 +1,420 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import json
+import mmap
+import heapq
+import struct
+from numbers import Integral
+from fca.defs.patterns.bitsets import indices_from_bits
+from fca.io.file_models import ColumnBuffer
+from fca.io.output_models import read_records, read_binary_header, decode_record, decode_varint
+
+#****************************************
+# Concept stores
+#****************************************
+# A store is built next to a binary (uncompressed) record file PATH:
+#   PATH.idx      one ROW per record in writing order: id, offset in PATH, support
+#   PATH.support  positions of the records by decreasing support (and position)
+#   PATH.postings positions of the records holding each attribute, by decreasing support
+#   PATH.store    json with the number of records, the postings directory and the labels
+# Positions are 64-bit unsigned integers
+ROW = struct.Struct('<qQQ')
+POSITION = struct.Struct('<Q')
+
+
+def _pack_positions(positions, fout, chunk=65536):
+    """
+    Writes positions as little-endian 64-bit unsigned integers
+    """
+    for i in range(0, len(positions), chunk):
+        values = positions[i:i + chunk]
+        fout.write(struct.pack('<{}Q'.format(len(values)), *values))
+
+
+def _map(path):
+    """
+    Read-only memory map of a file, None if the file is empty
+    """
+    with open(path, 'rb') as fin:
+        if os.fstat(fin.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ConceptStoreBuilder(object):
+    """
+    Builds the store of a binary record file while the records are written
+    Rows are written as records arrive, postings are gathered in a ColumnBuffer
+    (spilled to disk beyond max_postings) and the support index is counting sorted,
+    only the number of records per support is kept in memory.
+    The postings and support files are written by close()
+    """
+    def __init__(self, path, append=False, max_postings=1000000, labels=None):
+        self.path = path
+        self.max_postings = max_postings
+        self.labels = labels
+        self.fout = open(path + '.idx', 'ab' if append else 'wb')
+        self.rows = 0
+        self.block = []
+        self.postings = ColumnBuffer(max_postings)
+        self.supports = {}
+        self.last_id = None
+        self.sorted_ids = True
+
+    def add(self, concept_id, offset, support, intent):
+        """
+        Registers a record
+        intent: set of attribute indices (or bitset), None if not indexed
+        """
+        self.block.append(ROW.pack(concept_id, offset, support))
+        if len(self.block) >= 4096:
+            self.flush()
+        if self.last_id is not None and concept_id <= self.last_id:
+            self.sorted_ids = False
+        self.last_id = concept_id
+        self.supports[support] = self.supports.get(support, 0) + 1
+        if intent is not None:
+            if isinstance(intent, Integral):
+                intent = indices_from_bits(intent)
+            for attribute in intent:
+                self.postings.append(attribute, self.rows)
+        self.rows += 1
+
+    def flush(self):
+        """
+        Writes the pending rows
+        """
+        self.fout.write(''.join(self.block))
+        self.fout.flush()
+        self.block = []
+
+    def truncate(self, rows, records):
+        """
+        Keeps the first rows only, e.g. when resuming from a checkpoint
+        The postings and supports are rebuilt from the records kept
+        records: iterable of the intents of the rows kept
+        """
+        self.flush()
+        self.fout.truncate(rows * ROW.size)
+        self.fout.seek(0, os.SEEK_END)
+        self.postings.close()
+        self.postings = ColumnBuffer(self.max_postings)
+        self.supports = {}
+        self.last_id = None
+        self.sorted_ids = True
+        self.rows = 0
+        records = iter(records)
+        with open(self.path + '.idx', 'rb') as fin:
+            for _ in range(rows):
+                intent = next(records)
+                concept_id, _, support = ROW.unpack(fin.read(ROW.size))
+                if self.last_id is not None and concept_id <= self.last_id:
+                    self.sorted_ids = False
+                self.last_id = concept_id
+                self.supports[support] = self.supports.get(support, 0) + 1
+                for attribute in intent if intent is not None else []:
+                    self.postings.append(attribute, self.rows)
+                self.rows += 1
+
+    def close(self):
+        """
+        Writes the support index, the postings and the description of the store
+        """
+        self.flush()
+        self.fout.close()
+        rows = _map(self.path + '.idx')
+
+        # COUNTING SORT BY DECREASING SUPPORT, STABLE ON POSITIONS
+        start = {}
+        total = 0
+        for support in sorted(self.supports, reverse=True):
+            start[support] = total
+            total += self.supports[support]
+        with open(self.path + '.support', 'wb') as fout:
+            fout.truncate(self.rows * POSITION.size)
+        if self.rows > 0:
+            with open(self.path + '.support', 'r+b') as fout:
+                order = mmap.mmap(fout.fileno(), 0)
+                for position in range(self.rows):
+                    support = ROW.unpack_from(rows, position * ROW.size)[2]
+                    POSITION.pack_into(order, start[support] * POSITION.size, position)
+                    start[support] += 1
+                order.close()
+
+        support = lambda position: ROW.unpack_from(rows, position * ROW.size)[2]
+        directory = []
+        offset = 0
+        with open(self.path + '.postings', 'wb') as fout:
+            for attribute in sorted(self.postings.keys()):
+                positions = sorted(self.postings.column(attribute), key=lambda p: (-support(p), p))
+                _pack_positions(positions, fout)
+                directory.append([attribute, offset, len(positions)])
+                offset += len(positions)
+        self.postings.close()
+        if rows is not None:
+            rows.close()
+
+        with open(self.path + '.store', 'w') as fout:
+            json.dump({
+                'rows': self.rows,
+                'sorted_ids': self.sorted_ids,
+                'postings': directory,
+                'labels': sorted(self.labels.items()) if self.labels is not None else None
+            }, fout)
+
+
+class ConceptStore(object):
+    """
+    Read-only access to a binary record file written with a store
+    (OnDiskPOSET with fmt='binary' and store=True)
+    Files are memory mapped, only the postings directory is loaded.
+    Concepts are [id, support, extent, intent] records, as written
+
+    store = ConceptStore(path)
+    store[concept_id]
+    store.query(['attribute'], min_support=10)
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path + '.store', 'r') as fin:
+            meta = json.load(fin)
+        self.rows = meta['rows']
+        self.sorted_ids = meta['sorted_ids']
+        self.directory = dict([(attribute, (start, length)) for attribute, start, length in meta['postings']])
+        self.attributes = {}
+        if meta['labels'] is not None:
+            self.attributes = dict([(label, attribute) for attribute, label in meta['labels']])
+        with open(path, 'rb') as fin:
+            self.kinds = read_binary_header(fin, path)
+        self.data = _map(path)
+        self.index = _map(path + '.idx')
+        self.order = _map(path + '.support')
+        self.postings_map = _map(path + '.postings')
+        # ID -> POSITION, ONLY BUILT IF IDS WERE NOT WRITTEN IN INCREASING ORDER
+        self.positions = None
+
+    def __len__(self):
+        return self.rows
+
+    def row(self, position):
+        """
+        (id, offset, support) of the record at position
+        """
+        return ROW.unpack_from(self.index, position * ROW.size)
+
+    def position(self, concept_id):
+        """
+        Position of a concept id, None if it is not in the store
+        """
+        if not self.sorted_ids:
+            if self.positions is None:
+                self.positions = dict([(self.row(i)[0], i) for i in range(self.rows)])
+            return self.positions.get(concept_id, None)
+        low, high = 0, self.rows
+        while low < high:
+            mid = (low + high) // 2
+            if self.row(mid)[0] < concept_id:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.rows and self.row(low)[0] == concept_id:
+            return low
+        return None
+
+    def __contains__(self, concept_id):
+        return self.position(concept_id) is not None
+
+    def record(self, position):
+        """
+        Decodes the record at position
+        """
+        offset = self.row(position)[1]
+        length, start = decode_varint(bytearray(self.data[offset:offset + 10]), 0)
+        start += offset
+        return decode_record(bytearray(self.data[start:start + length]), 0, self.kinds)[0]
+
+    def __getitem__(self, concept_id):
+        position = self.position(concept_id)
+        if position is None:
+            raise KeyError(concept_id)
+        return self.record(position)
+
+    def support(self, concept_id):
+        """
+        Support of a concept
+        """
+        position = self.position(concept_id)
+        if position is None:
+            raise KeyError(concept_id)
+        return self.row(position)[2]
+
+    def _prefix(self, mem, start, length, min_support):
+        """
+        Number of positions in mem[start:start + length], sorted by decreasing support,
+        with support at least min_support
+        """
+        low, high = 0, length
+        while low < high:
+            mid = (low + high) // 2
+            position = POSITION.unpack_from(mem, (start + mid) * POSITION.size)[0]
+            if self.row(position)[2] >= min_support:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _positions(self, mem, start, length, min_support):
+        """
+        Positions in mem[start:start + length] with support at least min_support
+        """
+        size = self._prefix(mem, start, length, min_support)
+        if size == 0:
+            return ()
+        return struct.unpack_from('<{}Q'.format(size), mem, start * POSITION.size)
+
+    def by_support(self, min_support=0):
+        """
+        Concept ids with support at least min_support, by decreasing support
+        """
+        for position in self._positions(self.order, 0, self.rows, min_support):
+            yield self.row(position)[0]
+
+    def attribute_index(self, attribute):
+        """
+        Index of an attribute given by its label or its index
+        """
+        return self.attributes.get(attribute, attribute)
+
+    def postings(self, attribute, min_support=0):
+        """
+        Positions of the concepts holding attribute with support at least min_support,
+        by decreasing support
+        """
+        start, length = self.directory.get(self.attribute_index(attribute), (0, 0))
+        return self._positions(self.postings_map, start, length, min_support)
+
+    def query(self, attributes=(), min_support=0):
+        """
+        Concept ids holding every attribute with support at least min_support,
+        by decreasing support
+        attributes: labels or indices
+        """
+        if not bool(attributes):
+            return list(self.by_support(min_support))
+        lists = sorted([self.postings(attribute, min_support) for attribute in attributes], key=len)
+        others = [set(positions) for positions in lists[1:]]
+        return [
+            self.row(position)[0] for position in lists[0]
+            if all(position in other for other in others)
+        ]
+
+    def close(self):
+        """
+        Unmaps the files
+        """
+        for mem in [self.data, self.index, self.order, self.postings_map]:
+            if mem is not None:
+                mem.close()
+
+
+class ShardedConceptStore(object):
+    """
+    Concept stores of the shards of a ShardedOnDiskPOSET written with store=True
+    Queries are answered by every shard and merged by decreasing support
+    """
+    def __init__(self, path):
+        from fca.defs import ShardedOnDiskPOSET
+        manifest = ShardedOnDiskPOSET.read_manifest(path)
+        self.shard_range = manifest['shard_range']
+        shards = sorted(manifest['shards'], key=lambda s: s['first_id'])
+        self.first_ids = [shard['first_id'] for shard in shards]
+        self.stores = [ConceptStore(os.path.join(path, shard['file'])) for shard in shards]
+
+    def __len__(self):
+        return sum([len(store) for store in self.stores])
+
+    def store(self, concept_id):
+        """
+        Store of the shard holding concept_id
+        """
+        for first_id, store in zip(self.first_ids, self.stores):
+            if first_id <= concept_id < first_id + self.shard_range:
+                return store
+        # THE SUPREMUM (-1) IS WRITTEN IN SHARD 0
+        return self.stores[0] if bool(self.stores) and concept_id < 0 else None
+
+    def __contains__(self, concept_id):
+        store = self.store(concept_id)
+        return store is not None and concept_id in store
+
+    def __getitem__(self, concept_id):
+        store = self.store(concept_id)
+        if store is None:
+            raise KeyError(concept_id)
+        return store[concept_id]
+
+    def support(self, concept_id):
+        """
+        Support of a concept
+        """
+        store = self.store(concept_id)
+        if store is None:
+            raise KeyError(concept_id)
+        return store.support(concept_id)
+
+    def _merge(self, results):
+        """
+        Merges lists of ids by decreasing support
+        """
+        return [
+            cid for _, cid in heapq.merge(*[
+                [(-store.support(cid), cid) for cid in ids]
+                for store, ids in zip(self.stores, results)
+            ])
+        ]
+
+    def by_support(self, min_support=0):
+        """
+        Concept ids with support at least min_support, by decreasing support
+        """
+        return self._merge([list(store.by_support(min_support)) for store in self.stores])
+
+    def query(self, attributes=(), min_support=0):
+        """
+        Concept ids holding every attribute with support at least min_support,
+        by decreasing support
+        """
+        return self._merge([store.query(attributes, min_support) for store in self.stores])
+
+    def close(self):
+        """
+        Unmaps the files of every shard
+        """
+        for store in self.stores:
+            store.close()
+
+
+def open_store(path):
+    """
+    Opens the concept store of an OnDiskPOSET file or of a ShardedOnDiskPOSET directory
+    """
+    if os.path.isdir(path):
+        return ShardedConceptStore(path)
+    return ConceptStore(path)
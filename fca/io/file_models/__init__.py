@@ -17,6 +17,164 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 # Kyori code.
 import os
+import mmap
+import heapq
+import array
+import struct
+import marshal
+import binascii
+import tempfile
+from itertools import islice
+
+#****************************************
+# Column buffers
+#****************************************
+class ColumnBuffer(object):
+    """
+    Builds columns from values appended one at a time,
+    used to transpose files in a single pass.
+    At most max_size values are kept in memory, beyond that
+    the buffers of all columns are spilled to a temporary file,
+    one marshaled segment per column.
+    Only the segments offsets are kept in memory, so reading
+    a column requires one seek per spill.
+    """
+    def __init__(self, max_size=1000000, path=None):
+        self.max_size = max_size
+        self.path = path if path is not None else tempfile.gettempdir()
+        self.buffers = {}
+        self.segments = {}
+        self.size = 0
+        self.fout = None
+
+    def append(self, key, value):
+        """
+        Appends value to column key
+        """
+        self.buffers.setdefault(key, []).append(value)
+        self.size += 1
+        if self.size >= self.max_size:
+            self.spill()
+
+    def spill(self):
+        """
+        Writes the buffers to the temporary file and empties them
+        """
+        if self.fout is None:
+            self.fout = tempfile.TemporaryFile(dir=self.path)
+        self.fout.seek(0, os.SEEK_END)
+        for key, values in self.buffers.items():
+            data = marshal.dumps(values)
+            self.segments.setdefault(key, []).append((self.fout.tell(), len(data)))
+            self.fout.write(data)
+        self.buffers = {}
+        self.size = 0
+
+    def keys(self):
+        """
+        Returns the keys of the columns
+        """
+        return set(self.buffers.keys()).union(self.segments.keys())
+
+    def column(self, key):
+        """
+        Returns the list of values of column key
+        """
+        values = []
+        for offset, length in self.segments.get(key, []):
+            self.fout.seek(offset)
+            values.extend(marshal.loads(self.fout.read(length)))
+        values.extend(self.buffers.get(key, []))
+        return values
+
+    def close(self):
+        """
+        Deletes the temporary file
+        """
+        if self.fout is not None:
+            self.fout.close()
+            self.fout = None
+        self.buffers = {}
+        self.segments = {}
+        self.size = 0
+
+#****************************************
+# External sorting
+#****************************************
+class ExternalSorter(object):
+    """
+    Sorts more items than fit in memory.
+    At most max_size items are kept in memory, beyond that they are sorted
+    and spilled to a temporary file as a run of marshaled blocks.
+    Iterating the sorter merges the runs lazily, one block per run in memory.
+    Items should be marshalable and comparable, e.g. tuples of integers
+    """
+    BLOCK = 4096
+
+    def __init__(self, max_size=1000000, path=None):
+        self.max_size = max_size
+        self.path = path if path is not None else tempfile.gettempdir()
+        self.buffer = []
+        # RUNS AS (OFFSET, NUMBER OF BLOCKS)
+        self.runs = []
+        self.length = 0
+        self.fout = None
+
+    def __len__(self):
+        return self.length
+
+    def append(self, item):
+        """
+        Adds an item
+        """
+        self.buffer.append(item)
+        self.length += 1
+        if len(self.buffer) >= self.max_size:
+            self.spill()
+
+    def spill(self):
+        """
+        Writes the sorted buffer to the temporary file as a new run
+        """
+        if self.fout is None:
+            self.fout = tempfile.TemporaryFile(dir=self.path)
+        self.buffer.sort()
+        self.fout.seek(0, os.SEEK_END)
+        offset = self.fout.tell()
+        blocks = 0
+        for i in range(0, len(self.buffer), self.BLOCK):
+            marshal.dump(self.buffer[i:i + self.BLOCK], self.fout)
+            blocks += 1
+        self.runs.append((offset, blocks))
+        self.buffer = []
+
+    def read_run(self, offset, blocks):
+        """
+        Iterates the items of a run, runs share the file so each block is sought
+        """
+        for _ in range(blocks):
+            self.fout.seek(offset)
+            block = marshal.load(self.fout)
+            offset = self.fout.tell()
+            for item in block:
+                yield item
+
+    def __iter__(self):
+        self.buffer.sort()
+        if not bool(self.runs):
+            return iter(self.buffer)
+        return heapq.merge(*([self.read_run(*run) for run in self.runs] + [iter(self.buffer)]))
+
+    def close(self):
+        """
+        Deletes the temporary file
+        """
+        if self.fout is not None:
+            self.fout.close()
+            self.fout = None
+        self.buffer = []
+        self.runs = []
+        self.length = 0
 
 #****************************************
 # File Syntax Models
@@ -71,6 +229,10 @@ class FileModel(object):
         assert filepath != '', "You must include a valid filepath for the input file"
         assert os.path.isfile(filepath), 'Input file: {} does not exist'.format(filepath)
         self.filepath = filepath
+        # STREAMING: VALUES KEPT IN MEMORY WHILE TRANSPOSING AND SIZE OF BATCHES
+        self.buffer_size = params.get('buffer_size', 1000000)
+        self.buffer_path = params.get('buffer_path', None)
+        self.batch_size = params.get('batch_size', 1000)
 
     @classmethod
     def configurations(cls):
@@ -97,6 +259,22 @@ class FileModel(object):
         """
         raise NotImplementedError()
 
+    def batches(self, batch_size=None, transposed=False):
+        """
+        Iterates lists of at most batch_size entries
+        """
+        batch_size = batch_size if batch_size is not None else self.batch_size
+        entries = self.entries() if not transposed else self.entries_transposed()
+        batch = list(islice(entries, batch_size))
+        while bool(batch):
+            yield batch
+            batch = list(islice(entries, batch_size))
+
+    def column_buffer(self):
+        """
+        Returns a new ColumnBuffer configured for this file
+        """
+        return ColumnBuffer(self.buffer_size, self.buffer_path)
 
 
 class ParseableModel(FileModel):
@@ -129,14 +307,17 @@ class ParseableModel(FileModel):
         """
         Returns an array or iterator of strings with space separated values
         transposing the original formal context
+        The file is read once, columns are spilled to disk past buffer_size values
         """
-        new_representation = {}
-        reps = list(self.entries())
-        for obj, representation in reps:
-            for attribute in representation:
-                new_representation.setdefault(attribute, []).append(obj)
-        for i, j in sorted(new_representation.items(), key=lambda s: s[0]):
-            yield (i, j)
+        columns = self.column_buffer()
+        try:
+            for obj, representation in self.entries():
+                for attribute in representation:
+                    columns.append(attribute, obj)
+            for i in sorted(columns.keys()):
+                yield (i, columns.column(i))
+        finally:
+            columns.close()
 
 
 class CXTModel(ParseableModel):
@@ -146,13 +327,14 @@ class CXTModel(ParseableModel):
     """
     _cfgs = [('oa','cxt')]
     def __init__(self, filepath, **params):
-        super(CXTModel, self).__init__(filepath)
+        params.pop('extension', None)
+        super(CXTModel, self).__init__(filepath, **params)
 
     def entries(self):
         """
         READS A CXT FILE
-        NOT THOUGHT FOR STREAMING
-        READ THE FILE ENTIRELY AND THEN PROCESS IT
+        OBJECT AND ATTRIBUTE NAMES ARE KEPT IN MEMORY,
+        ROWS ARE STREAMED AS THEY ARE READ
         """
         with open(self.filepath, 'r') as fin:
             cxt_type = None
@@ -160,7 +342,7 @@ class CXTModel(ParseableModel):
             attributes = []
             n_objects = -1
             n_attributes = -1
-            representations = []
+            n_rows = 0
             for line in fin:
                 line = line.replace('\n', '')
                 if not line.startswith('#') and line != '':
@@ -179,8 +361,8 @@ class CXTModel(ParseableModel):
                         for i, j in enumerate(line.strip()):
                             if j.lower() == 'x':
                                 out.append(attributes[i])
-                        representations.append((objects[len(representations)], out))
-        return representations
+                        yield (objects[n_rows], out)
+                        n_rows += 1
 
 
 
@@ -204,13 +386,118 @@ class TableModel(ParseableModel):
     def entries_transposed(self):
         """
         Transposition occurs like matrix transposition
+        The file is read once, columns are spilled to disk past buffer_size values
         """
-        new_representation = []
-        reps = [i[1] for i in self.entries()]
-        for coli in range(len(reps[0])):
-            new_representation.append([i[coli] for i in reps])
-        for i, j in enumerate(new_representation):
-            yield (i, j)
+        columns = self.column_buffer()
+        try:
+            for _, representation in self.entries():
+                for coli, value in enumerate(representation):
+                    columns.append(coli, value)
+            for i in range(len(columns.keys())):
+                yield (i, columns.column(i))
+        finally:
+            columns.close()
+
+class BinaryContextModel(FileModel):
+    """
+    Compiled formal context, see compile_context
+    The file is memory-mapped, only the label tables are loaded,
+    rows and columns are read from the map when requested.
+
+    Layout, little-endian, sections aligned to 8 bytes:
+    HEADER: magic, n_objects, n_attributes, n_entries, flags
+            and the offset of each section
+    LABELS: marshaled (object labels, attribute labels)
+    CSR by objects: indptr (n_objects + 1 uint64), indices (n_entries uint32)
+    CSR by attributes: indptr (n_attributes + 1 uint64), indices (n_entries uint32)
+    BITSETS (optional): one packed row per object and one per attribute
+
+    Attributes are numbered in the order of their sorted labels,
+    rows keep the order of the attributes in the source file
+    """
+    _cfgs = [('oa', 'bcx')]
+    MAGIC = b'FCABCX01'
+    HEADER = struct.Struct('<8s12Q')
+    HAS_BITSETS = 1
+
+    def __init__(self, filepath, **params):
+        super(BinaryContextModel, self).__init__(filepath, **params)
+        self.fin = open(filepath, 'rb')
+        self.mem = mmap.mmap(self.fin.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.HEADER.unpack_from(self.mem, 0)
+        assert header[0] == self.MAGIC, 'Input file: {} is not a compiled context'.format(filepath)
+        (
+            self.n_objects, self.n_attributes, self.n_entries, self.flags,
+            labels_offset, labels_length,
+            self.obj_indptr, self.obj_indices, self.att_indptr, self.att_indices,
+            self.obj_bits, self.att_bits
+        ) = header[1:]
+        self.object_labels, self.attribute_labels = marshal.loads(
+            self.mem[labels_offset:labels_offset + labels_length]
+        )
+
+    def has_bitsets(self):
+        """
+        Tests whether the packed bitsets were compiled
+        """
+        return bool(self.flags & self.HAS_BITSETS)
+
+    def _csr(self, indptr, indices, i):
+        start, end = struct.unpack_from('<2Q', self.mem, indptr + 8 * i)
+        return struct.unpack_from('<{}I'.format(end - start), self.mem, indices + 4 * start)
+
+    def _bits(self, offset, width, i):
+        packed = self.mem[offset + width * i:offset + width * (i + 1)]
+        return int(binascii.hexlify(packed[::-1]), 16) if width > 0 else 0
+
+    def row(self, i):
+        """
+        Attribute indices of the i-th object
+        """
+        return self._csr(self.obj_indptr, self.obj_indices, i)
+
+    def column(self, j):
+        """
+        Object indices of the j-th attribute
+        """
+        return self._csr(self.att_indptr, self.att_indices, j)
+
+    def row_bits(self, i):
+        """
+        Attributes of the i-th object as an integer bitmask
+        """
+        assert self.has_bitsets(), 'Bitsets were not compiled'
+        return self._bits(self.obj_bits, (self.n_attributes + 7) // 8, i)
+
+    def column_bits(self, j):
+        """
+        Objects of the j-th attribute as an integer bitmask
+        """
+        assert self.has_bitsets(), 'Bitsets were not compiled'
+        return self._bits(self.att_bits, (self.n_objects + 7) // 8, j)
+
+    def entries(self):
+        """
+        Returns an iterator of (object, attributes) as read from the source file
+        """
+        labels = self.attribute_labels
+        for i in range(self.n_objects):
+            yield (self.object_labels[i], [labels[j] for j in self.row(i)])
+
+    def entries_transposed(self):
+        """
+        Returns an iterator of (attribute, objects) sorted by attribute
+        """
+        labels = self.object_labels
+        for j in range(self.n_attributes):
+            yield (self.attribute_labels[j], [labels[i] for i in self.column(j)])
+
+    def close(self):
+        """
+        Unmaps the file
+        """
+        self.mem.close()
+        self.fin.close()
 
 class FileModelFactory(object):
     """
@@ -254,3 +541,104 @@ class FileModelFactory(object):
         Builds the file manager configured at creation
         """
         return self._extensions[(self._style, self._extension)](self.filename, **self.kwargs)
+
+
+def compile_context(filepath, output_path=None, bitsets=True, **params):
+    """
+    Compiles a formal context into the format read by BinaryContextModel
+    The source is read twice with the FileModel configured by params,
+    the first pass collects labels and counts, the second one fills
+    the sections directly in a memory-mapped output file.
+    Memory holds the labels and one counter per object and attribute.
+    filepath: str path to the source context
+    output_path: str path to the compiled context, by default filepath with extension bcx
+    bitsets: bool whether to include packed bitsets
+    returns str output_path
+    """
+    if output_path is None:
+        output_path = os.path.splitext(filepath)[0] + '.bcx'
+    file_manager = FileModelFactory(filepath, **params).file_manager
+    align = lambda offset: (offset + 7) // 8 * 8
+
+    def unique(representation):
+        """
+        Removes repeated values keeping the order
+        """
+        seen = set([])
+        return [m for m in representation if not (m in seen or seen.add(m))]
+
+    # FIRST PASS: LABELS AND COUNTS
+    object_labels = []
+    row_lengths = array.array('L')
+    counts = {}
+    for obj, representation in file_manager.entries():
+        representation = unique(representation)
+        object_labels.append(obj)
+        row_lengths.append(len(representation))
+        for attribute in representation:
+            counts[attribute] = counts.get(attribute, 0) + 1
+    attribute_labels = sorted(counts)
+    attribute_index = {m: j for j, m in enumerate(attribute_labels)}
+    n_objects, n_attributes = len(object_labels), len(attribute_labels)
+    n_entries = sum(row_lengths)
+
+    # LAYOUT
+    header = BinaryContextModel.HEADER
+    labels = marshal.dumps((object_labels, attribute_labels))
+    labels_offset = align(header.size)
+    obj_indptr = align(labels_offset + len(labels))
+    obj_indices = align(obj_indptr + 8 * (n_objects + 1))
+    att_indptr = align(obj_indices + 4 * n_entries)
+    att_indices = align(att_indptr + 8 * (n_attributes + 1))
+    obj_bits = att_bits = size = align(att_indices + 4 * n_entries)
+    row_width, column_width = (n_attributes + 7) // 8, (n_objects + 7) // 8
+    if bitsets:
+        att_bits = align(obj_bits + row_width * n_objects)
+        size = align(att_bits + column_width * n_attributes)
+
+    with open(output_path, 'wb') as fout:
+        fout.truncate(max(size, 1))
+    with open(output_path, 'r+b') as fout:
+        mem = mmap.mmap(fout.fileno(), 0)
+        header.pack_into(
+            mem, 0, BinaryContextModel.MAGIC,
+            n_objects, n_attributes, n_entries,
+            BinaryContextModel.HAS_BITSETS if bitsets else 0,
+            labels_offset, len(labels),
+            obj_indptr, obj_indices, att_indptr, att_indices,
+            obj_bits, att_bits
+        )
+        mem[labels_offset:labels_offset + len(labels)] = labels
+        position = 0
+        for i, length in enumerate(row_lengths):
+            struct.pack_into('<Q', mem, obj_indptr + 8 * i, position)
+            position += length
+        struct.pack_into('<Q', mem, obj_indptr + 8 * n_objects, position)
+        cursors = array.array('L')
+        position = 0
+        for j, attribute in enumerate(attribute_labels):
+            struct.pack_into('<Q', mem, att_indptr + 8 * j, position)
+            cursors.append(position)
+            position += counts[attribute]
+        struct.pack_into('<Q', mem, att_indptr + 8 * n_attributes, position)
+        del counts
+
+        # SECOND PASS: INDICES AND BITSETS
+        position = 0
+        for i, (_, representation) in enumerate(file_manager.entries()):
+            row = [attribute_index[m] for m in unique(representation)]
+            struct.pack_into('<{}I'.format(len(row)), mem, obj_indices + 4 * position, *row)
+            position += len(row)
+            for j in row:
+                struct.pack_into('<I', mem, att_indices + 4 * cursors[j], i)
+                cursors[j] += 1
+            if bitsets:
+                packed = bytearray(row_width)
+                for j in row:
+                    packed[j >> 3] |= 1 << (j & 7)
+                    byte = att_bits + column_width * j + (i >> 3)
+                    struct.pack_into('<B', mem, byte, struct.unpack_from('<B', mem, byte)[0] | 1 << (i & 7))
+                mem[obj_bits + row_width * i:obj_bits + row_width * (i + 1)] = bytes(packed)
+        mem.flush()
+        mem.close()
+    return output_path
@@ -1,5 +1,7 @@
-from fca.io.transformers import List2SetTransformer
-from fca.io.file_models import FileModelFactory
+from fca.defs import SetPattern
+from fca.defs.patterns.bitsets import BitSetPattern, bits_from_indices, indices_from_bits
+from fca.io.transformers import List2SetTransformer, List2BitSetTransformer
+from fca.io.file_models import FileModelFactory, BinaryContextModel
 
 #****************************************
 # Input Models
@@ -16,12 +18,20 @@ class InputModel(object):
         file_manager_params = file_manager_params if file_manager_params is not None else {}
 
         self.__fmgr = FileModelFactory(filepath, **file_manager_params).file_manager
+        self.transposed = transposed
 
         if not transposed:
             self._representations = self.__fmgr.entries()
         else:
             self._representations = self.__fmgr.entries_transposed()
 
+    @property
+    def file_manager(self):
+        """
+        Returns the file manager reading the context
+        """
+        return self.__fmgr
+
     @property
     def representations(self):
         """
@@ -43,13 +53,20 @@ class PatternStructureModel(InputModel):
         super(PatternStructureModel, self).__init__(**params)
         self.sorter = params.get('sorter', None)
         # Calculate g prime
-        self.g_prime = {i[0]:self.transformer.transform(i) for i in self._representations}
+        self.g_prime = self.calculate_g_prime()
 
         if self.sorter is not None:
             self.g_prime = self.sorter.sort(self.g_prime)
         # OBJ COUNTER
         self.n_objects = len(self.g_prime)
 
+    def calculate_g_prime(self):
+        '''
+        Transforms the representation of each object
+        returns dict
+        '''
+        return {i[0]:self.transformer.transform(i) for i in self._representations}
+
     @property
     def objects(self):
         '''
@@ -77,21 +94,32 @@ class FormalContextModel(PatternStructureModel):
     CONTEXT MANAGER
     Extends PatternStructure by indexing attribute representations as well
     """
+    # Pattern used by algorithms to manipulate extents
+    extent_pattern = SetPattern
+
     def __init__(self, **params):
         super(FormalContextModel, self).__init__(**params)
 
-        self.m_prime = {}
         # Calculate m_prime
+        self.m_prime = self.calculate_m_prime()
+        # ATT COUNTER
+        self.n_attributes = len(self.m_prime)
+
+    def calculate_m_prime(self):
+        '''
+        Indexes the objects having each attribute
+        returns dict
+        '''
+        m_prime = {}
         for object_id, attributes in self.g_prime.items():
             for att in attributes:
-                self.m_prime.setdefault(
+                m_prime.setdefault(
                     att,
                     set([])
                 ).add(
                     object_id
                 )
-        # ATT COUNTER
-        self.n_attributes = len(self.m_prime)
+        return m_prime
 
     @property
     def attributes(self):
@@ -108,4 +136,84 @@ class FormalContextModel(PatternStructureModel):
         if not bool(intent):
             return self.g_prime.keys()
         return reduce(lambda x, y: x.intersection(y),
-                      [self.m_prime[m] for m in intent])
\ No newline at end of file
+                      [self.m_prime[m] for m in intent])
+
+
+#****************************************
+# BitSet Formal Context Model
+#****************************************
+class BitSetFormalContextModel(FormalContextModel):
+    """
+    CONTEXT MANAGER
+    Object rows and attribute columns are stored as integer bitmasks
+    so that extents and intents are derived through word-wise AND
+    Extents are bitmasks over objects and should be handled by BitSetPattern
+    """
+    extent_pattern = BitSetPattern
+
+    def __init__(self, **params):
+        if params.get('transformer', None) is None:
+            params['transformer'] = List2BitSetTransformer()
+        super(BitSetFormalContextModel, self).__init__(**params)
+
+    def compiled(self):
+        '''
+        Tests whether rows and columns can be read from the bitsets
+        of a compiled context instead of parsing its entries
+        '''
+        return (
+            not self.transposed and
+            isinstance(self.file_manager, BinaryContextModel) and
+            self.file_manager.has_bitsets() and
+            isinstance(self.transformer, List2BitSetTransformer)
+        )
+
+    def calculate_g_prime(self):
+        '''
+        Compiled contexts are loaded from their bitsets,
+        attributes are registered in the order of the compiled file
+        returns dict
+        '''
+        if not self.compiled():
+            return super(BitSetFormalContextModel, self).calculate_g_prime()
+        fmgr = self.file_manager
+        for att in fmgr.attribute_labels:
+            self.transformer.register_attribute(att)
+        return {
+            self.transformer.register_object(obj): fmgr.row_bits(i)
+            for i, obj in enumerate(fmgr.object_labels)
+        }
+
+    def calculate_m_prime(self):
+        '''
+        Objects are re-indexed by the transformer so that they can be used as bits
+        returns dict
+        '''
+        if self.compiled():
+            fmgr = self.file_manager
+            return {j: fmgr.column_bits(j) for j in range(fmgr.n_attributes)}
+        objects = self.transformer.objects
+        self.g_prime = {objects.get(g, g): desc for g, desc in self.g_prime.items()}
+        columns = {}
+        for object_id, attributes in self.g_prime.items():
+            for att in indices_from_bits(attributes):
+                columns.setdefault(att, []).append(object_id)
+        return {att: bits_from_indices(column) for att, column in columns.items()}
+
+    def extent_prime(self, extent):
+        '''
+        Implements A' given A subseteq G as a bitmask
+        '''
+        if extent == 0:
+            return reduce(lambda x, y: x | y, self.g_prime.values(), 0)
+        return reduce(lambda x, y: x & y,
+                      [self.g_prime[g] for g in indices_from_bits(extent)])
+
+    def intent_prime(self, intent):
+        '''
+        Implements B' given B subseteq M as a bitmask
+        '''
+        if intent == 0:
+            return bits_from_indices(self.g_prime.keys())
+        return reduce(lambda x, y: x & y,
+                      [self.m_prime[m] for m in indices_from_bits(intent)])
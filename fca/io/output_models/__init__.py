@@ -0,0 +1,431 @@
+"""
+FCA - Python libraries to support FCA tasks
+Copyright (C) 2017  Victor Codocedo
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+# Kyori code.
+import os
+import csv
+import gzip
+import operator
+from numbers import Integral
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+from fca.defs.patterns.bitsets import indices_from_bits
+
+#****************************************
+# Compressed streams
+#****************************************
+# compression -> file extension
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def open_stream(path, mode='r', compression=None):
+    """
+    Opens a binary stream, compressed if required
+    mode: 'r', 'w' or 'a'
+    Appending to a compressed file starts a new gzip member or zstd frame,
+    concatenated members and frames are read as a single stream
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError('Unknown compression {}'.format(compression))
+    if compression == 'gzip':
+        return gzip.open(path, mode + 'b')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstd compression requires the zstandard package')
+        fobj = open(path, mode + 'b')
+        if mode == 'r':
+            return zstandard.ZstdDecompressor().stream_reader(fobj, read_across_frames=True)
+        return zstandard.ZstdCompressor().stream_writer(fobj)
+    return open(path, mode + 'b')
+
+
+def iter_blocks(stream, block_size=1 << 20):
+    """
+    Reads a stream in blocks
+    """
+    block = stream.read(block_size)
+    while bool(block):
+        yield block
+        block = stream.read(block_size)
+
+
+def iter_lines(stream, block_size=1 << 20):
+    """
+    Lines of a stream, read in blocks since not every stream is iterable
+    """
+    pending = ''
+    for block in iter_blocks(stream, block_size):
+        lines = (pending + block).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if bool(pending):
+        yield pending
+
+#****************************************
+# Varints
+#****************************************
+def zigzag(value):
+    """
+    Maps signed integers to unsigned ones, 0, -1, 1, -2... -> 0, 1, 2, 3...
+    """
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def unzigzag(value):
+    """
+    Inverse of zigzag
+    """
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode_varint(value, out):
+    """
+    Appends an unsigned integer to a bytearray, 7 bits per byte
+    """
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buff, pos):
+    """
+    Reads an unsigned integer from a bytearray
+    returns (value, position after the value)
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buff[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def encode_set(values, out):
+    """
+    Appends a set of non negative integers as its size followed by
+    the first value and the differences between consecutive sorted values
+    Bitsets (integers) are decoded first
+    """
+    # INTEGRAL IS AN ABSTRACT CLASS, SLOW TO TEST
+    if isinstance(values, (set, frozenset, list, tuple)):
+        values = sorted(values)
+    elif isinstance(values, Integral):
+        values = list(indices_from_bits(values))
+    else:
+        values = sorted(values)
+    encode_varint(len(values), out)
+    if not bool(values):
+        return
+    gaps = [values[0]]
+    gaps.extend(map(operator.sub, values[1:], values[:-1]))
+    if values[0] < 0:
+        raise TypeError('Sets should contain non negative integers')
+    # THE MOST COMMON CASE, EVERY GAP FITS IN A BYTE
+    if max(gaps) < 0x80:
+        out.extend(gaps)
+    else:
+        for gap in gaps:
+            encode_varint(gap, out)
+
+
+def decode_set(buff, pos):
+    """
+    Inverse of encode_set
+    returns (list of values, position after the set)
+    """
+    size, pos = decode_varint(buff, pos)
+    values = []
+    value = 0
+    for _ in range(size):
+        gap, pos = decode_varint(buff, pos)
+        value += gap
+        values.append(value)
+    return values, pos
+
+#****************************************
+# Record writers
+#****************************************
+class RecordWriter(object):
+    """
+    Abstract buffered writer of records (lists of values)
+    Records are encoded in memory and written in blocks of block_size bytes,
+    only the stream and the current block are kept
+    """
+    EXTENSION = ''
+    # WHETHER VALUES SHOULD BE TRANSLATED TO LABELS BEFORE BEING WRITTEN
+    LABELS = False
+
+    def __init__(self, path, append=False, compression=None, block_size=1 << 20):
+        self.path = path
+        self.compression = compression
+        self.block_size = block_size
+        # BYTES WRITTEN TO THE STREAM, OFFSETS ARE ONLY MEANINGFUL WITHOUT COMPRESSION
+        self.written = os.path.getsize(path) if append and os.path.exists(path) else 0
+        self.fout = open_stream(path, 'a' if append else 'w', compression)
+
+    def write(self, record):
+        """
+        Adds a record to the current block
+        """
+        raise NotImplementedError
+
+    def take_block(self):
+        """
+        Returns the encoded records of the current block and empties it
+        """
+        raise NotImplementedError
+
+    def tell(self):
+        """
+        Offset of the next record in the uncompressed output
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """
+        Writes the current block to the stream
+        """
+        block = self.take_block()
+        if bool(block):
+            self.fout.write(block)
+            self.written += len(block)
+        self.fout.flush()
+
+    def sync(self):
+        """
+        Writes the current block and ends the compressed member or frame, if any,
+        so that the file can be truncated at the returned size
+        returns the size of the file
+        """
+        self.flush()
+        if self.compression is not None:
+            self.fout.close()
+            self.fout = open_stream(self.path, 'a', self.compression)
+        return os.path.getsize(self.path)
+
+    def truncate(self, offset):
+        """
+        Removes everything written after offset, obtained with sync
+        """
+        self.take_block()
+        self.fout.close()
+        with open(self.path, 'r+b') as fobj:
+            fobj.truncate(offset)
+        self.written = offset
+        self.fout = open_stream(self.path, 'a', self.compression)
+
+    def close(self):
+        """
+        Writes the current block and closes the stream
+        """
+        self.flush()
+        self.fout.close()
+
+
+class TSVWriter(RecordWriter):
+    """
+    Tab separated values, in the format of csv.writer
+    Records are written to an in-memory buffer by a csv writer
+    """
+    EXTENSION = '.csv'
+    LABELS = True
+
+    def __init__(self, path, header=None, append=False, compression=None, block_size=1 << 20):
+        super(TSVWriter, self).__init__(path, append, compression, block_size)
+        self.new_block()
+        if header is not None and not append:
+            self.write(header)
+
+    def new_block(self):
+        """
+        Starts a new in-memory block
+        """
+        self.block = StringIO()
+        self.writer = csv.writer(self.block, delimiter='\t', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+
+    def write(self, record):
+        self.writer.writerow(record)
+        if self.block.tell() >= self.block_size:
+            self.flush()
+
+    def take_block(self):
+        block = self.block.getvalue()
+        self.new_block()
+        return block
+
+    def tell(self):
+        return self.written + self.block.tell()
+
+
+class BinaryWriter(RecordWriter):
+    """
+    Length-prefixed records of varints
+    kinds: one per value in the record,
+        'int' signed integers (zigzag encoded)
+        'set' sets of non negative integers (size and gaps), or bitsets
+    The file starts with a header holding the kinds, so that it can be read back
+    Values are written as indices, they are never translated to labels
+    """
+    EXTENSION = '.bin'
+    MAGIC = bytearray(b'FCAR\x01')
+    KINDS = {'int': 0, 'set': 1}
+
+    def __init__(self, path, kinds, append=False, compression=None, block_size=1 << 20):
+        super(BinaryWriter, self).__init__(path, append, compression, block_size)
+        self.kinds = tuple(kinds)
+        self.sets = [kind == 'set' for kind in self.kinds]
+        self.block = bytearray()
+        if not append:
+            self.block.extend(self.MAGIC)
+            encode_varint(len(self.kinds), self.block)
+            self.block.extend([self.KINDS[kind] for kind in self.kinds])
+
+    def write(self, record):
+        payload = bytearray()
+        for is_set, value in zip(self.sets, record):
+            if is_set:
+                encode_set(value, payload)
+            else:
+                encode_varint(zigzag(value), payload)
+        encode_varint(len(payload), self.block)
+        self.block.extend(payload)
+        if len(self.block) >= self.block_size:
+            self.flush()
+
+    def take_block(self):
+        block, self.block = self.block, bytearray()
+        return bytes(block)
+
+    def tell(self):
+        return self.written + len(self.block)
+
+
+# format -> writer class
+WRITERS = {'tsv': TSVWriter, 'binary': BinaryWriter}
+
+def open_writer(path, fmt='tsv', header=None, kinds=None, **kwargs):
+    """
+    Opens a record writer
+    header: names of the values, written as the first row of TSV files
+    kinds: kinds of the values, required by binary files
+    kwargs: append, compression, block_size
+    """
+    if fmt not in WRITERS:
+        raise ValueError('Unknown format {}'.format(fmt))
+    if fmt == 'binary':
+        return BinaryWriter(path, kinds, **kwargs)
+    return TSVWriter(path, header, **kwargs)
+
+#****************************************
+# Record readers
+#****************************************
+def read_tsv(path, compression=None, header=False):
+    """
+    Records of a TSV file as lists of strings
+    header: whether the first row should be skipped
+    """
+    stream = open_stream(path, 'r', compression)
+    try:
+        reader = csv.reader(iter_lines(stream), delimiter='\t', quotechar='|')
+        if header:
+            next(reader, None)
+        for row in reader:
+            yield row
+    finally:
+        stream.close()
+
+
+def read_binary_header(stream, path=None):
+    """
+    Reads the header of a binary file: magic, number of kinds (a single byte) and kinds
+    returns a list telling which values of the records are sets
+    """
+    magic = bytearray(stream.read(len(BinaryWriter.MAGIC) + 1))
+    if magic[:-1] != BinaryWriter.MAGIC:
+        raise ValueError('{} is not a binary record file'.format(path))
+    return [kind == BinaryWriter.KINDS['set'] for kind in bytearray(stream.read(magic[-1]))]
+
+
+def decode_record(buff, pos, kinds):
+    """
+    Decodes the payload of a binary record
+    kinds: list telling which values are sets, see read_binary_header
+    returns (record, position after the record)
+    """
+    record = []
+    for is_set in kinds:
+        if is_set:
+            value, pos = decode_set(buff, pos)
+        else:
+            value, pos = decode_varint(buff, pos)
+            value = unzigzag(value)
+        record.append(value)
+    return record, pos
+
+
+def read_binary(path, compression=None, header=None):
+    """
+    Records of a binary file as lists of integers and lists of integers
+    header: not used, the kinds are read from the file
+    """
+    stream = open_stream(path, 'r', compression)
+    try:
+        kinds = read_binary_header(stream, path)
+        buff = bytearray()
+        pos = 0
+        for block in iter_blocks(stream):
+            buff = buff[pos:] + bytearray(block)
+            pos = 0
+            # ONLY RECORDS COMPLETELY IN THE BUFFER ARE DECODED
+            while pos < len(buff):
+                start = pos
+                try:
+                    length, pos = decode_varint(buff, pos)
+                except IndexError:
+                    pos = start
+                    break
+                if pos + length > len(buff):
+                    pos = start
+                    break
+                record, pos = decode_record(buff, pos, kinds)
+                yield record
+        if pos < len(buff):
+            raise ValueError('{} ends with a truncated record'.format(path))
+    finally:
+        stream.close()
+
+
+# format -> reader function
+READERS = {'tsv': read_tsv, 'binary': read_binary}
+
+def read_records(path, fmt='tsv', compression=None, header=False):
+    """
+    Iterates the records written by open_writer
+    """
+    if fmt not in READERS:
+        raise ValueError('Unknown format {}'.format(fmt))
+    return READERS[fmt](path, compression, header)
@@ -4,6 +4,11 @@ TRANSFOMERS: Transform list of symbols to representations
 suitable for patterns structures
 **********************************************************
 """
+from fca.defs.patterns.bitsets import bits_from_indices, indices_from_bits
+from fca.defs.patterns.columnar import columns_from_intervals, intervals_from_columns, is_columnar
+from fca.defs.patterns.hypergraphs import partition_classes, is_array_partition
+
+
 class Transformer(object):
     """
     Abstract transformer
@@ -111,6 +116,27 @@ class List2SetTransformer(Transformer):
     def parse(self, lst):
         return set([self.register_attribute(att) for att in lst])
 
+class List2BitSetTransformer(List2SetTransformer):
+    """
+    Transform a list of symbols into an integer bitmask
+    suitable for BitSetPattern
+    It registers a map to transform bits back to symbols
+    """
+    def parse(self, lst):
+        return bits_from_indices([self.register_attribute(att) for att in lst])
+
+    def real_objects(self, args):
+        """
+        Returns the real objects behind the bits set in args
+        """
+        return super(List2BitSetTransformer, self).real_objects(list(indices_from_bits(args)))
+
+    def real_attributes(self, args):
+        """
+        Returns the real attributes behind the bits set in args
+        """
+        return super(List2BitSetTransformer, self).real_attributes(list(indices_from_bits(args)))
+
 class List2IntervalsTransformer(Transformer):
     """
     Transform a list of symbols into a list of intervals
@@ -138,6 +164,25 @@ class List2IntervalsTransformer(Transformer):
         return interval
 
 
+class List2ColumnarIntervalsTransformer(List2IntervalsTransformer):
+    """
+    Transform a list of symbols into a columnar interval description
+    (lows, highs) as used by ColumnarIntervalPattern
+    """
+    def parse(self, lst):
+        return columns_from_intervals(super(List2ColumnarIntervalsTransformer, self).parse(lst))
+
+    def real_objects(self, args):
+        if is_columnar(args):
+            return intervals_from_columns(args)
+        return super(List2ColumnarIntervalsTransformer, self).real_objects(args)
+
+    def real_attributes(self, args):
+        if is_columnar(args):
+            return intervals_from_columns(args)
+        return super(List2ColumnarIntervalsTransformer, self).real_attributes(args)
+
+
 class List2PartitionsTransformer(List2IntervalsTransformer):
     """
     Transforms a list of values to a partition containing equivalence classes of indices
@@ -161,7 +206,8 @@ class List2PartitionsTransformer(List2IntervalsTransformer):
 
         return list of tuples
         """
-        
+        if is_array_partition(args):
+            args = partition_classes(args)
         return sorted([tuple(sorted(i)) for i in args])
 
     def parse(self, lst):
@@ -16,7 +16,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from distutils.core import setup
+from setuptools import setup
 setup(
     name='fca',
     packages=[
@@ -24,18 +24,36 @@ setup(
         'fca.algorithms',
         'fca.algorithms.addIntent',
         'fca.algorithms.cbo',
-        'fca.algorithms.next_closure',
-        'fca.algorithms.previous_closure',
+        'fca.algorithms.cbo.parallel',
+        'fca.algorithms.cbo.pattern_structures',
+        'fca.algorithms.covers',
+        'fca.algorithms.in_close',
+        'fca.algorithms.lecenum_closures',
+        'fca.algorithms.lexenum_closures',
+        'fca.algorithms.metrics',
         'fca.algorithms.pre_closure',
         'fca.algorithms.canonical_base',
+        'fca.algorithms.canonical_base.parallel',
         'fca.defs.patterns',
         'fca.defs.patterns.hypergraphs',
+        'fca.defs.patterns.bitsets',
+        'fca.defs.patterns.columnar',
+        'fca.defs.patterns.enumerators',
         'fca.defs',
+        'fca.defs.backends',
+        'fca.defs.backends.vectorized',
+        'fca.defs.caches',
+        'fca.defs.compact',
         'fca.io',
         'fca.io.file_models',
         'fca.io.input_models',
+        'fca.io.output_models',
+        'fca.io.concept_store',
         'fca.io.sorters',
-        'fca.io.transformers'
+        'fca.io.transformers',
+        'fca.reader',
+        'fca.bench',
+        'fca.bench.contexts'
         ],
     version='3.2',
     description='A library to implement Formal Concept Analysis tasks and other tools',
@@ -56,5 +74,9 @@ setup(
     classifiers=[],
     install_requires=[
         "enum34"
-        ]
+        ],
+    # VECTORIZED BACKENDS AND COLUMNAR PATTERNS, pip install fca[numpy]
+    extras_require={
+        'numpy': ["numpy"]
+        }
     )